@@ -1,261 +1,117 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 import pandas as pd
-import matplotlib.font_manager as fm
 import base64
+import os
+import sqlite3
+import time
 from io import BytesIO
-from PIL import Image, ImageFile
 
-# ReportLab imports
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
-from streamlit_paste_button import paste_image_button
+from oring import (
+    AXIAL, RADIAL, STANDARD, IRREGULAR, RECTANGULAR, TRAPEZOIDAL,
+    DimSpec, DesignSpec, oring_display_dims, run_simulation,
+    SAMPLER_RANDOM, SAMPLER_LHS, SAMPLER_SOBOL, SAMPLER_IMPORTANCE,
+    MEMORY_STANDARD, MEMORY_LEAN, MEMORY_LEAN32,
+)
+from oring.analytic import run_estimate, compare_with_mc
+from oring.sweep import DIM_LABELS, SWEEP_SAMPLES, run_sweep
+from oring.optimize import OBJECTIVE_YIELD, OBJECTIVE_COST, BOUND_PCT, run_optimize
+from oring.sensitivity import run_sensitivity
+from oring.catalog import STANDARDS, METHOD_ANALYTIC, METHOD_MC, run_rank
+from oring.empirical import dataset_summary, ingest_bytes, measured_names, normal_approx
+from oring.timing import StageTimer, log_path
+from oring.service import SERVICE_ENV, ServiceError, submit as service_submit, wait as service_wait
+from oring.compare import make_scenarios, run_compare
+from oring.store import ResultStore, report_key
+from oring.pipeline import (
+    MAX_BYTES as PIPELINE_MAX_BYTES, MAX_SAMPLES as PIPELINE_MAX_SAMPLES, Pipeline, supports as pipeline_supports,
+)
+from oring.environment import GROOVE_CTE, ORING_CTE, T_REF, ENV_SAMPLES, run_env_sweep
+from oring.plots import cad_schematic_png, fig_to_png, get_chinese_font, hist_png, new_figure, overlay_hist_png
 
-# --- 0. PDF 生成引擎設定 (ReportLab) ---
-ImageFile.LOAD_TRUNCATED_IMAGES = True
+# --- 0. PDF 報告 (ReportLab，見 oring/report.py) ---
 
 # Sercomm logo Base64
 SERCOMM_LOGO_BASE64 = """
 iVBORw0KGgoAAAANSUhEUgAAAYAAAABoCAYAAAD4pyfkAAAAAXNSR0IArs4c6QAAAARnQU1BAACxjwv8YQUAAAAJcEhZcwAADsMAAA7DAcdvqGQAABXYSURBVHhe7Z15lB1VncfZZBAQVBYFZRUQXEYW0WEWJOKcQT2Ag44sx3Ecz1FncFAOwigynhkZhFGG7GTrDgnZyDIhO1sSQhYgC4Gk9737daf79b7v22/O92JjuLW8uq/q9atKfT/nfP9ITle9qltV93uX3/3d44QQQkgsOU7/D0IIIfGABkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITGFBkAIITHlmDGA4bFx6Rkek/KOIXm2sF1+ur1evvF8tdy4qjI0un1DQl6p6ZbR8XH98t8H7mN9eZf8w6aE5RzZ1m3ra2RnXZ/Y3cHY+Li809wvf7+hxnJcEPoKynB9jXq2iwo7pLhtUJXV4Oi47fWYMFHm391Ua/ndbOub66rlpZoeGXW5SbxS/SPj8lJ1t9wVhvdmZYXctSUhs99pk5quIfWM/DDxfb9e3yeP7GmU29aF69t2Euqgh3YmZVuiVzoHR2XIZzkETaQNAC99sndEtlR1yf07GuSzi8vkgzMK5Lin8kKr8+YXy95kv34rCrwa+5J9cvOaKjlpWr7l2LDo1JkFsjXRo1++7KnvlU/OL7b8faZ08vR8uSinWO7ZklCmX9A6kNJc7chrGVDG9mfTw1vmJ0/Ll2VFHfqlv0dB66DcsaFGPhDC9+bM2YVyz5ZaebupX8YNn8/I2Ljsqe+TB3Ym5aIFxXLiVOv5o6ATp+XLJ+YXy79sPSLbarqlf2RMv9WsEFkDwIe+oaJbbl1XIx99ulCOj8iLgev8/f5m/XYU+S0D8sVl5ZZjwqhb/q9KtfiP5rdvNGWtAoIpXb2kTH7zeqNUdg55rmjQY7x2abkcb3POsOnuzQn98hXdQ6Pyt2uqQl85/sWKCjnYZN/4sQOV5K/3JOXS3BI5IeT35lW4jwsWFMv9O+qldWBUv+VJJ5IGAPNEt+qMWYWR+HB1/fuupH5Lqov74M5kZF7065aWyZhWx6JrfuLU7BjAhGBAn3+2VHYd6X3/xdmA6//Zqw1yfJav2avQwrfjD/ub5YQI3APe7cf3NatWfSp6h8fUEGiYe8J+hPuasrpSGnqH9VufVCJnAE19I/KDl+osBRolPbSzQb8tqe0elptWV1r+Nqy6blk4DWBCZ84qlKWFHa5d7equIbk+Ij0uyM4AMO5/zpwiy9+GVdcuLZNk34h+G+8D9/TgzoZjtvKfEL6Vf3qxLqs9gUgZACaBHt6dVN19vTCjpF/ttvYAMIb76UWllr8Nq760vNzGAJKhGoY4Y1aBzDvc5jgBebCxXz79THTK/NsbrUNArf2jkeoFf3h2gTJeN3bU9qphXf3YY1GYH1niMreTaSJlAIigOTtCrR07oRu8oqRTvzVlAFc8U2L5+7Dq5zusvZipb7XIKTPC1Wq7JLdEdtRaJ6zBgWS/XBEhA8AEok5LxAwAplzV6W4AUeoJB6EbVlSoIeBsEBkDwITj19YE/2KgQkaEBSJAMi1EKN28plrquq3jfkEYAMa/9d8MWriHqxaVSteQdWilY3BUblpdpf5GP86PMBTgZ5L/zk0J215AEAaAa9OvN2idMj1fLskplqou63vjxwAwBKH/lhedNDUv7d+8OKdY6nqs9zEBzOEEm+O8KN15EHw3iCibEP6dzvuGMklnPgnHoXGbDSJjAIeaBwKPMLlwQbHc92qD5Oa3ybLijoxrQ0WXNPbZv/x+DAAv0F+vrFTRRfpvBqqiDtlY2aWGHZzoHhqTF6q6rcemqcUF7fK7fc1q+AMhn+l85KhA9yf79Ev1ZQCoIL60vEIe29skSwrbLdcdpNZXdElzn32Zp2sAuG8EIywptP6em3Cv/7O/WU3Qfni2+TDN916otW08ADSCv7amynJMKn1sbqF8a32NGk83nQ+5YEGJ/OFAs8w91Paeph5sVY0c/W/dhKGtuzYnVLkgFNrUCL68vEINcU82kTGAJ/Y3WwrNj86dWyTbEz2hWZjhxwAQOlrW4d6tjjqoNLYleuTv1lal1Tq7d5t1+MSPAVz5TIkUtQ36XoDml3QM4Ow5haox4mfUAYuaMOejn9tN6HFMP9jqWGZYR/IRQ1O5bGGJapig4YFAiptXmxnIj145InbV7n3bjxiV6zVLy6WwbVBFL8Gwr1lSZmQC6EmicTXZRMYAvr2xxlJofvT9F+s8x4pPBukaACrD2YdaLTH5xyK4xc6hMZli+JFDF8wvtpi9HwN4ZHfj+86VLdIxACx6w3F+OdDYb/TbKGscYwee7U+3mVW6H5yRLzPebn1vhXRD74h8fW215e/c9NCupK0hPfRag9G1oBFW+sdGGIx1RXGHnPW0WW/kOxtrlIFMJpExANMHm0rf3ZRQL11YSNsAnspT3fI4gRW/5xuuOEYLq10Lt/NjABg2CAPpGAAaP07DMF5B4+mpA2a9cqwGdlqpXdAyoFrN+jFuwvfSNfSnZxoWAwCoyG82nMz+1MIS2e1h/UqQRMYAMHaoF5gfIZpodWmnDER8CCiOBoDKK533obX//fHnNID0QcV740rvFRzmbpwW5+ELXJDXpiaX9ePcNA3DSUd9vmEyAID5FZOwaDRSsJLdLmAhU0TGAHLz2y0F5lcwgTs3J+TlaswF+Psg/EID8A5Wkj76ZpPRqukPzSyQHq3SowGkz/PlXUYh2dcvL3dMZoehuS88a9b6xwT00a1/EDYDQC/AdJ3JZxeXqvuYLCJjAG0DI3J2hhaHoCJBvhFM/GCisaV/RPqGx1TKCYcea+DQALyDmOn/fAMG4H2SbcqqKsuzpAGkx8DIuFoHop/XSWgFIz+TE28ZziVA099u1U8TOgMAOYfbjHoB+M1nCjpsrykTRMYAwJMHmjOe7RMPC1n7kMb1N68nZVVJh7zZ0Kdi9wcz2EsI2gDQSkZqZiyCwsrKIIQJPCQeyzZYOv/1571/6MjEuNJm8R0NID3wrl6c4/1dnbKq0rH1j/f0SsNncP78IilqG9BPFUoDaO4fkasWeS8r6DOLS6VjIP3nY0KkDKCxb0RNJE1WjhC8AKfNLJBP5ZaoBU4/fPmIPPVWi7ya6JHmvhFfYXQ6QRoAJuiQIAzdyU/ML1KGFoTQnX3szSbLUMpkg+EHrCjVy8JJGH5os8m3QgNIjyf2NVnO6SQsrFpe7JzqYFNlt/H137u9XnptcjyF0QAmeqsma5je7QW0215X0ETKAFCxHekZljsCDgn1KjwYvNCnzyqQ8+cVqVYoDCGvpV+GfLpBkAbQPjiqrlP/2yAEQ0SXPVscbBqQj8/1PvZ8+swCNRln93RoAOb0DY8axer/5XMVUtlpv/gRn8w3DCvsjz5dZNubA2E0APBqbY9adKof4ybk2sLK+kwTKQOYAJNGOXltcu2ycvWB64U32UKPBDln7t5SK3MPtcreZJ/U94w4dnvtCNIADiT7LH8XpDAc5AbG2mGIiGYIQoj9R97+2e+0yscMKn+0urB7GBYt2UEDMAOv88y3WyzncxK+i1/vTjqut3mtrlet7taPcxN22ep2iJUPqwFghe+dm2qMFjCeNadQ1pZ32V5bkETSAADeKeQNmXOoTW0TiJW9Jg8sU8I1nDWnSO3q9djeZjnU3O8p/3mQBoBdxfS/C1Jo0bixtqxTHnitQe3S5lc/e7VehXxevbRc5aHRr8VJyO/0k631rhEVNAAzEByB4VD9fE46d06hHG6x7y2iEYeVxCYT+RAaAU6E1QDAc8Ud6p3Uj3MSAlP++eU66czwnFtkDWAC1K3N/aOyL9kvj+9rUg/CZLwtk8J1IKcIhon0Vag6QRoA8t7ofxekdtS59wCwattkGXzQQirhJw+0SOegeyVHA/AOGlxPH2pVeZX08zkJK1udfqWma1guzTVr/Z82I9/1usNsAAgJ/YxhfiEMG2HIM5NE3gB0kBKhomNIVQDoLqIyOHVGQdoZ/oIQXqS7tyRcI2iCNADMk5jEyJvo5OkFKirKDWzag+RcmZqHsBOeLXoIGBZEjicPnS4agAEYRrtjY8JyLid9YFqe2q/bidUlncbXPeeQc+sfhNkAwOL8duNMp7/d22x7fUFxzBnA0YyOjavwzY0VXWrhECKI/uq5Crkkp0ROn+V9IisIoUWM9BNOH0WQBoAXBkmuzplT+Mf0tu9+kH6Fyb+fbD3iaQcjREn91xtN8vF53sfs0xHGmbFZ+K3rqmXe4VZLugc3aADeeaWmR71P+rmchKyYThUX5nVMJ0URhYbgBjfCbgCYF/vcYrP37eLcYmlyqDOC4Jg2gKPBRBS2B8RuRK/X96o0EL/b26Re1CsXlU7KRiaIoMGmKTYRbIEaAECX88Wqbnm2oF0WBaRNlV3S4JLLXQfDXi/X9KhU1UH1SE6fWajS7SK65Eev1Mn8w20qfwoqQoe5RkdoAN54d+/kest5nIQd+/bUO/cSc/Naja/5P/Y0pgyqCLsBgGkHW4yGqNGzfWJ/k+01BkFsDEAHhoAXCqaA7m1p+5DaPvD2DTVGS9xNhdh8DFHpBG0AE+DFCUrpgjS9iJAKYr/guzbXqvUgWIuAlqSfLKg0AG9g/weTaDvs3eDUS0QAj+lYODIAoCGRiigYAPY1uXyh2f0j8WFjhnoBsTUAN/BxrCzpUJtToNWuPxA/QiSAXca/TBlAWEDSvf9+s0l15U0+LDv9zcoKeaO+L+XEeipoAKlBCZvk/UeKZvTKnFhV0ilnGizig9BL97JZShQMAD3ze7fVy0kGjSEM42IC3imTqh9oAC7AdX+1KxnwyuPDMtfmAznWDWAC7Bb21TWVRt1gXbhnVNwzDrZIn914mkdoAKnB9o0mrf8vLCmTKodN31GJf//FWqNgjFNmFKjcOF6IggEAbMZzlkFeM8wf3rK22jWkOV1oAClA7DNW/eoPxY8ettlMJC4GgPHk6s4h+fErR4xjwHUhHcRt66tdE425QQNwBxXjw7u9t/6hX7zW4DgXg16bySpu6Lx5xY4Lv3SiYgAwwhtXVljO4SYMS2+s7HZcVJcuNIAUYBHXnxumqk2lx/dZK4+0DWBqnuTktTt+dGEmJ79dRZaYfGh2wlqLrTU9Ku+KCX4M4NE3rSaeDdIxAAypILtuKlChIiWBfryTsEbALVIHodn6ManktvBLJyoGAJYUmIeE/njrERkIOCElDcAFDDEj7UGQ8wDITImwVJ10DQBCTiKnSbcwgwlclO/Nayp9D7OhZfn43iap7xn2bIZ+DOCG5yrUeodsk44BXJhTIq+7ROkABEdgJTsievTj7YRhin/ddsS2MgUY+z7XMLjivHlFMmhg6lEygIGRMfm8YcMSaVBK2gb1U/kiUgaAqA8U8sGmfnmrsS+j2tvQp0K2MKZp8iKk0keeLpR3mqzL4/0YACrPOzbUyAvV3Zb7CFIod0RL+U18dzQ4E6KiHtqZlFN9huJiXgHrAVC5eblEPwYAI//Whhq1ATiS4+llFZRQ5sVtg47pRNIxAPz9DSsqVJI85I3SfxML6R54LakqYP1YJ505u0BqXUKEEXKtH5NKT77Vop/GlSgZAFiY3268C9rPd9Q7rq5Oh8gYADahQNf1Q7MKVIt8MuRnotJJqDQwr6DjxwAgDAVhrwT9HoIWyv/OTQnj4ZZU4HzryrtUlJB+bybCR/vJBcUq2iTVeKkfA5j4LQx76GUUtFDmtzxfZTsWno4BTAgrp/XfgtDqN9nEBLpve73jO4HNlbAaXz/GTQj9hPmZEDUDwIjGI7uTxu/6I3saHXuEpkTGAL5psANUGIWX+ofI7ueQoCxqBnDDinLHitUvWDiG6BNkeNV/10QYpvnq6ioVemq3ZABDN1csjE6Zf2dTQr+FUBgAds/Dzld2ICXIlNXeN4+HkL8LK/VNiZoBAGTWvchgdzUIw9JIjx4EkTEAky0AwyZU/ghXdJs0RCjjl1eYhYZlU9ctK8uYAQAsHEMlcNlCf0NCCDXFFoIYg8ZmJkdT2j4oVy8xm4jLpjDPo9M7PC6nzTRrQQYp5Iia7tIbxDPEBu76cW66ZkmZa+JEJ6JoAHh+eK76+dyEDamwlsiuUWMKDSDDwrj8P75QK71a5aODOQ5EUZi8dNlUpg1gAkw6X7+8wribbKdb19eoCeeJ68ZKYjwb/e/CKjsDAOq9MRyzD0rYctRue0YAE/+37d5zCE1olkHo59FE0QDAiuIO45BQ7IHi1OsyITIGcPt6swebbWFy8Lpl5TL7nTbPW7shJPJiwx2SsqWvrKr0lYfHBKz2xYpsLMjzU9Hhg8aHurasS2WKBUhtfYFhZspsCdlk7Uj2Dr8breajbNIRJop/v9+6pmUC9LBMW/8IdXQYJU0Jeti3rjNrTWO/Xru3+NE3mowMAL33ijQXJPYOjRqHhKJctyVS50dKRWQMAPlFgkgmlknhA0TK5FvWVklufpsUtQ3avlxOINfH5qru0JsAMnsuLbKfzM4UiCPHTmPXLPUflovwRoQ7AjyfrYlulabX73kzKVzb/7qERSJ084vLyyftHlD5f++FOtXKtwMRWPcbZBCF8P3Mz7OmSfEKwpPxm17rCeTlwvatdhxuHpAzPKaMR5nfuTnha/cuRK2dPM16bjdhRbd96XsnMgaAWW+soMUeoufMLQqNLlxQItcvK5cfvFgnq0o7VaZKfBTpto5xGLqyD+5MymW5JZbfy7ZQ/tjhbGQszWaaD1CmGBtG1lakg0ZFrl+fF12aW6K26pwAlRVy3vxyV4Nc/kyp5e+zrQtzilVCNrfkdygblbtqd1JNbJ8zx3qeoITIKaTCwF7NTuA9vmdzreVYJ6F3hy1AvSR9cwMh1ndvTsi5cwstv3G0Ll9YIsuKOhwrUFw/Ips+t7jMvSznFKpJ8ES3v9BMPNrH9jYZ1W/oETpdv1ciYwCEEEKChQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCExhQZACCEx5f8BIqD/uHbR2s8AAAAASUVORK5CYII=
 """.strip()
 
-def ascii_only(s: str) -> str:
-    """只保留 ASCII 字元"""
-    return "".join(ch for ch in str(s) if ord(ch) < 128)
-
-def build_oring_pdf_report(
-    project_name,
-    engineer_name,
-    title,
-    input_data,       # list of dicts
-    result_data,      # list of dicts
-    verdict_data,     # dict
-    diagram_img_bytes, 
-    hist_comp_bytes,   
-    hist_fill_bytes,   
-    sercomm_logo_bytes,
-) -> BytesIO:
-    """
-    建立 O-Ring PDF 報告（Landscape A4）
-    """
-    buffer = BytesIO()
-    page_size = landscape(A4)
-    c = canvas.Canvas(buffer, pagesize=page_size)
-    width, height = page_size
-
-    # --- 浮水印 Helper ---
-    logo_reader = None
-    if sercomm_logo_bytes:
-        try:
-            img_logo = Image.open(BytesIO(sercomm_logo_bytes)).convert("RGBA")
-            img_rgb = img_logo.convert("RGB")
-            img_hsv = img_rgb.convert("HSV")
-            h, s, v = img_hsv.split()
-            h_arr = np.array(h, dtype=np.uint8)
-            s_arr = np.array(s, dtype=np.uint8)
-            v_arr = np.array(v, dtype=np.uint8)
-            mask = ((s_arr > 60) & (v_arr > 50) & (h_arr >= 120) & (h_arr <= 210))
-            alpha_arr = np.where(mask, 100, 0).astype("uint8")
-            alpha = Image.fromarray(alpha_arr, mode="L")
-            white = Image.new("RGB", img_rgb.size, (255, 255, 255))
-            light_rgb = Image.blend(white, img_rgb, 0.18)
-            img_final = Image.merge("RGBA", (*light_rgb.split(), alpha))
-            buf_logo = BytesIO()
-            img_final.save(buf_logo, format="PNG")
-            buf_logo.seek(0)
-            logo_reader = ImageReader(buf_logo)
-        except Exception:
-            logo_reader = None
-
-    def draw_watermark():
-        if not logo_reader: return
-        c.saveState()
-        img_w, img_h = logo_reader.getSize()
-        target_w = width * 0.55
-        scale = target_w / float(img_w)
-        draw_w = img_w * scale
-        draw_h = img_h * scale
-        c.translate(width / 2.0, height / 2.0)
-        c.rotate(45)
-        # 繪製浮水印 (因為是最後繪製，所以會在最上層)
-        c.drawImage(logo_reader, -draw_w/2.0, -draw_h/2.0, width=draw_w, height=draw_h, mask="auto")
-        c.restoreState()
-
-    # =================== Page 1: Header + Input + Schematic ===================
-    y = height - 15 * mm
-
-    # Header
-    c.setFont("Helvetica-Bold", 18)
-    c.drawString(20 * mm, y, "O-Ring Design Analysis Report (V1.0)")
-    y -= 12 * mm
-
-    c.setFont("Helvetica", 10)
-    c.drawString(20 * mm, y, f"Project : {ascii_only(project_name)}")
-    y -= 5 * mm
-    c.drawString(20 * mm, y, f"Engineer: {engineer_name}")
-    y -= 5 * mm
-    c.drawString(20 * mm, y, f"Title   : {ascii_only(title)}")
-    y -= 10 * mm
-
-    # 1. Input Parameters
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(20 * mm, y, "1. Input Parameters (Dimension & Tolerance)")
-    y -= 10 * mm
-
-    c.setFont("Helvetica-Bold", 9)
-    c.drawString(20 * mm, y, "Item Name")
-    c.drawString(80 * mm, y, "Nominal (mm)")
-    c.drawString(110 * mm, y, "Tol (+/-)")
-    c.drawString(140 * mm, y, "Cpk")
-    y -= 6 * mm
-    c.setFont("Helvetica", 9)
-
-    for item in input_data:
-        name = item["name"]
-        nom = item.get("nom", 0.0)
-        tol = item.get("tol", 0.0)
-        cpk = item.get("cpk", 0.0)
-        c.drawString(20 * mm, y, ascii_only(name))
-        c.drawString(80 * mm, y, f"{nom:.3f}")
-        c.drawString(110 * mm, y, f"{tol:.3f}")
-        c.drawString(140 * mm, y, f"{cpk:.2f}")
-        y -= 6 * mm
-    
-    y -= 10 * mm
+@st.cache_resource(show_spinner=False)
+def load_logo_bytes():
+    try:
+        return base64.b64decode(SERCOMM_LOGO_BASE64)
+    except Exception:
+        return None
 
-    # Cad Schematic
-    if diagram_img_bytes:
-        try:
-            img = ImageReader(BytesIO(diagram_img_bytes))
-            img_w, img_h = img.getSize()
-            remaining_h = y - 15 * mm
-            max_w = width - 40 * mm
-            target_h = min(remaining_h, 90 * mm)
-            scale = min(max_w / img_w, target_h / img_h)
-            draw_w = img_w * scale
-            draw_h = img_h * scale
-
-            c.setFont("Helvetica-Bold", 12)
-            c.drawString(20 * mm, y, "Cad Schematic")
-            y -= 6 * mm
-            c.drawImage(img, 20*mm, y - draw_h, width=draw_w, height=draw_h, mask="auto")
-        except:
-            pass
-
-    # Page 1 結束前繪製浮水印 (確保在最上層)
-    draw_watermark()
-    c.showPage()
-
-    # =================== Page 2: Results -> Charts -> Verdict ===================
-    y = height - 15 * mm
-
-    # 2. Simulation Results (Table)
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(20 * mm, y, "2. Simulation Results (Monte Carlo)")
-    y -= 10 * mm
-
-    c.setFont("Helvetica-Bold", 9)
-    c.drawString(20 * mm, y, "Metric")
-    c.drawString(70 * mm, y, "Mean (%)")
-    c.drawString(100 * mm, y, "Yield (%)")
-    c.drawString(130 * mm, y, "Defect (PPM)")
-    c.drawString(160 * mm, y, "Target (%)")
-    y -= 6 * mm
-    c.setFont("Helvetica", 9)
-
-    for res in result_data:
-        c.drawString(20 * mm, y, ascii_only(res["item"]))
-        
-        mean_val = res['mean']
-        if isinstance(mean_val, (int, float)):
-             c.drawString(70 * mm, y, f"{mean_val:.3f}")
-        else:
-             c.drawString(70 * mm, y, str(mean_val))
-             
-        c.drawString(100 * mm, y, f"{res['yield']:.2f}")
-        c.drawString(130 * mm, y, f"{int(res['ppm'])}")
-        c.drawString(160 * mm, y, ascii_only(res['target']))
-        y -= 6 * mm
-    
-    y -= 8 * mm # 減少間距
+@st.cache_resource(show_spinner=False)
+def get_result_store():
+    """持久化結果儲存 (環境變數 ORING_STORE，見 oring/store.py)；無法開啟時回傳 None，只用行程內快取"""
+    try:
+        return ResultStore()
+    except (OSError, sqlite3.Error):
+        return None
 
-    # --- Charts (Histograms) ---
-    chart_height = 42 * mm 
-    
-    # Chart 1: Compression
-    if hist_comp_bytes:
-        try:
-            img = ImageReader(BytesIO(hist_comp_bytes))
-            img_w, img_h = img.getSize()
-            scale = chart_height / img_h
-            draw_w = img_w * scale
-            draw_h = chart_height
-            
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(20 * mm, y, "Compression Rate Distribution")
-            y -= 5 * mm
-            c.drawImage(img, 20*mm, y - draw_h, width=draw_w, height=draw_h, mask="auto")
-            y -= (draw_h + 8 * mm) # 減少間距
-        except:
-            pass
-
-    # Chart 2: Fill Rate
-    if hist_fill_bytes:
-        try:
-            img = ImageReader(BytesIO(hist_fill_bytes))
-            img_w, img_h = img.getSize()
-            scale = chart_height / img_h
-            draw_w = img_w * scale
-            draw_h = chart_height
-            
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(20 * mm, y, "Fill Rate Distribution")
-            y -= 5 * mm
-            c.drawImage(img, 20*mm, y - draw_h, width=draw_w, height=draw_h, mask="auto")
-            y -= (draw_h + 8 * mm) # 減少間距
-        except:
-            pass
-
-    # --- 3. Final Verdict (嘗試擠在 Page 2) ---
-    if y < 35 * mm:
-        # Page 2 結束前繪製浮水印 (確保在最上層)
-        draw_watermark()
-        c.showPage()
-        y = height - 15 * mm
-
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(20 * mm, y, "3. Final Verdict (Combined)")
-    y -= 8 * mm
-    
-    # 畫框與文字
-    c.setFillColorRGB(0.95, 0.95, 0.95) # 淺灰底
-    c.rect(20*mm, y - 15*mm, width - 40*mm, 15*mm, fill=1, stroke=0)
-    c.setFillColorRGB(0, 0, 0) # 黑字
-    
-    v_yield = verdict_data.get("yield", 0.0)
-    v_ppm = verdict_data.get("ppm", 0.0)
-    
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(25 * mm, y - 10*mm, f"Combined Yield:  {v_yield:.2f} %")
-    c.setFillColorRGB(0.8, 0, 0) # 紅字 PPM
-    c.drawString(100 * mm, y - 10*mm, f"Defect Rate:  {int(v_ppm)} PPM")
-    c.setFillColorRGB(0, 0, 0)
+_store_warned = False  # 每次執行 script 最多顯示一次儲存錯誤
+
+def store_call(method, *args, default=None, quiet=False):
+    """
+    結果儲存的讀寫；SQLite 錯誤 (鎖定逾時、磁碟已滿、檔案損毀…) 時回傳 default，頁面照常以無儲存模式運作
+    quiet=True 時不顯示警告 (st.cache_data 函式內使用，避免快取重播訊息)
+    """
+    global _store_warned
+    try:
+        return method(*args)
+    except sqlite3.Error as e:
+        if not quiet and not _store_warned:
+            st.warning(f"結果儲存暫時無法使用 ({type(e).__name__}: {e})，本次不讀寫儲存。")
+            _store_warned = True
+        return default
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_pdf_report(design_hash, **report_kwargs) -> bytes:
+    """
+    以全部輸入 (含圖片 bytes) 的雜湊為 key 快取完成的 PDF；重複下載或無關的 widget 變更不重算。
+    另存入持久化結果儲存，其他 session / 重啟後的相同報告直接讀取。
+    """
+    store = get_result_store()
+    key = report_key(**report_kwargs)
+    pdf_bytes = store_call(store.get_pdf, key, quiet=True) if store else None
+    if pdf_bytes is not None:
+        return pdf_bytes
+    from oring.report import build_oring_pdf_report  # ReportLab / PIL 只在第一次下載 PDF 時載入
+    timer = StageTimer()
+    with timer.stage("pdf"):
+        pdf_bytes = build_oring_pdf_report(**report_kwargs).getvalue()
+    timer.write_jsonl(log_path(), event="pdf")
+    if store:
+        store_call(store.put_pdf, key, pdf_bytes, design_hash, quiet=True)
+    return pdf_bytes
+
+def run_via_service(url, spec):
+    """
+    蒙地卡羅送到本機模擬服務 (環境變數 ORING_SERVICE_URL，見 oring/service.py) 並顯示進度；
+    相同輸入由服務端去重 (執行中 / 已完成的工作直接沿用)。→ (SimResult, 是否沿用既有工作)
+    """
+    job = service_submit(url, spec)
+    bar = st.empty()
 
-    # 最後一頁結束前繪製浮水印
-    draw_watermark()
+    def show_progress(job):
+        label = "排隊中…" if job["status"] == "queued" else f"模擬服務計算中… {job['progress'] * 100:.0f}%"
+        bar.progress(job["progress"], text=label)
 
-    c.save()
-    buffer.seek(0)
-    return buffer
+    try:
+        return service_wait(url, job, progress=show_progress), job["dedup"]
+    finally:
+        bar.empty()
 
 # --- 以下為 Streamlit 主程式 ---
 
 st.set_page_config(page_title="O-Ring Design Tool (V1.0)", layout="wide")
 
+# 各階段計時 (頁尾「效能偵錯」面板；設定環境變數 ORING_TIMING_LOG 時另附加寫入 JSONL)
+script_t0 = time.perf_counter()
+stage_timer = StageTimer()
+
 # CSS Style
 st.markdown("""
 <style>
@@ -279,89 +135,144 @@ st.markdown("""
 st.title("🔧 O-Ring Design Tool (V1.0)")
 st.caption("產能驅動模擬 (Monte Carlo) | 介面文字優化 | ReportLab PDF 匯出")
 
-def get_chinese_font():
-    font_names = [f.name for f in fm.fontManager.ttflist]
-    preferred_fonts = ['Microsoft YaHei', 'SimHei', 'Arial Unicode MS', 'PingFang SC', 'Heiti TC']
-    for font in preferred_fonts:
-        if font in font_names:
-            return font
-    return None
 chinese_font = get_chinese_font()
 
-def generate_dim(nominal, tol, cpk, size):
-    if cpk == 0 or tol == 0:
-        return np.full(size, nominal)
-    sigma = tol / (3 * cpk)
-    return np.random.normal(nominal, sigma, size)
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_hist_png(edges, counts, color, t_min, t_max, title):
+    """相同 counts 於 rerun 時直接取快取 (繪圖見 oring.plots.hist_png)"""
+    return hist_png(edges, counts, color, t_min, t_max, title)
+
+def sigma_table(mean, std, hist=None):
+    """6-Sigma 表：各 σ 水準的值；有直方圖時另列累積比例 (由 counts 內插)"""
+    levels = np.arange(-6, 7)
+    values = mean + levels * std
+    data = {("Mean" if i == 0 else f"{i:+}σ"): [v] for i, v in zip(levels, values)}
+    index = ["Value (%)"]
+    if hist is not None:
+        for key, p in zip(data, hist.cdf(values)):
+            data[key].append(p * 100)
+        index.append("Cum. (%)")
+    return pd.DataFrame(data, index=index)
+
+def draw_sweep_heatmap(sweep_res, slice_idx=None, title=None):
+    """綜合良率熱圖 (X = 第 1 軸, Y = 第 2 軸)，黑色輪廓為公稱值可行區 (壓縮 & 填充皆在目標內)"""
+    y_comb = sweep_res.yield_combined; feas = sweep_res.feasible
+    if slice_idx is not None:
+        y_comb = y_comb[:, :, slice_idx]; feas = feas[:, :, slice_idx]
+    x_vals, y_vals = sweep_res.axis_values[0], sweep_res.axis_values[1]
+    fig = new_figure((5, 3.6))
+    ax = fig.subplots()
+    mesh = ax.pcolormesh(x_vals, y_vals, y_comb.T, cmap='RdYlGn', vmin=0, vmax=100, shading='nearest')
+    if feas.any() and not feas.all():
+        ax.contour(x_vals, y_vals, feas.T.astype(float), levels=[0.5], colors='black', linewidths=1.0)
+    fig.colorbar(mesh, ax=ax, label="Combined Yield (%)")
+    ax.set_xlabel(DIM_LABELS[sweep_res.axis_names[0]] + " (mm)", fontsize=8)
+    ax.set_ylabel(DIM_LABELS[sweep_res.axis_names[1]] + " (mm)", fontsize=8)
+    ax.tick_params(labelsize=7)
+    if title:
+        ax.set_title(title, fontsize=9)
+    return fig
 
-def draw_cad_schematic_v11(groove_type, w_top, w_btm, depth, oring_w, oring_h, mode, font_name):
-    fig, ax = plt.subplots(figsize=(3, 1.8), dpi=250)
-    ax.set_aspect('equal')
-    ax.axis('off')
-    
-    title_size = 9
-    label_size = 6
-    title_font = fm.FontProperties(fname=fm.findfont(font_name), size=title_size) if font_name else None
-    label_font = fm.FontProperties(fname=fm.findfont(font_name), size=label_size) if font_name else None
-    lbl_top = "上底" if font_name else "Top"
-    lbl_btm = "下底" if font_name else "Bottom"
-    lbl_h = "高" if font_name else "Height"
-    dim_lw = 0.5
-    main_lw = 1.0
-
-    if mode == "正壓 (Axial)":
-        margin = max(w_top, w_btm) * 0.5
-        verts = [
-            (-w_top/2 - margin, depth), (-w_top/2, depth), 
-            (-w_btm/2, 0), (w_btm/2, 0), 
-            (w_top/2, depth), (w_top/2 + margin, depth),
-            (w_top/2 + margin, -depth*0.2), (-w_top/2 - margin, -depth*0.2)
-        ]
-        poly = patches.Polygon(verts, facecolor='#e0e0e0', edgecolor='black', hatch='///', lw=dim_lw)
-        ax.add_patch(poly)
-        oring = patches.Ellipse((0, oring_h/2), width=oring_w, height=oring_h, 
-                                facecolor='#ffab91', edgecolor='red', alpha=0.8, lw=main_lw)
-        ax.add_patch(oring)
-        ax.annotate("", xy=(w_top/2+margin*0.2, depth), xytext=(w_top/2+margin*0.2, 0), arrowprops=dict(arrowstyle='<->', lw=dim_lw))
-        ax.text(w_top/2+margin*0.4, depth/2, lbl_h, va='center', fontproperties=label_font)
-        ax.set_xlim(-w_top/2 - margin - 1, w_top/2 + margin + 1)
-        ax.set_ylim(-depth*0.5, depth*1.5)
-        ax.set_title("Axial", fontproperties=title_font)
-    else:
-        h_half = depth / 2
-        x_left = 0
-        x_right_top = w_top
-        x_right_btm = w_btm
-        ax.plot([x_left, x_left], [h_half, -h_half], color='#004d40', lw=main_lw)
-        ax.plot([x_right_top, x_right_btm], [h_half, -h_half], color='#004d40', lw=main_lw)
-        ax.plot([x_left, x_right_top], [h_half, h_half], color='#004d40', lw=main_lw)
-        ax.plot([x_left, x_right_btm], [-h_half, -h_half], color='#004d40', lw=main_lw)
-        oring_x_center = oring_w / 2
-        oring = patches.Ellipse((oring_x_center, 0), width=oring_w, height=oring_h, 
-                                facecolor='#90a4ae', edgecolor='#004d40', lw=main_lw, alpha=0.7)
-        ax.add_patch(oring)
-        ax.text(x_right_top/2, h_half + depth*0.1, lbl_top, ha='center', va='bottom', fontproperties=label_font)
-        ax.text(x_right_btm/2, -h_half - depth*0.1, lbl_btm, ha='center', va='top', fontproperties=label_font)
-        ax.annotate("", xy=(x_left - depth*0.1, h_half), xytext=(x_left - depth*0.1, -h_half), arrowprops=dict(arrowstyle='<->', lw=dim_lw, color='#004d40'))
-        ax.text(x_left - depth*0.2, 0, lbl_h, ha='right', va='center', fontproperties=label_font, color='#004d40')
-        max_w = max(w_top, w_btm, oring_w)
-        margin_x = max_w * 0.5
-        margin_y = depth * 0.5
-        ax.set_xlim(x_left - margin_x*0.5, max_w + margin_x)
-        ax.set_ylim(-h_half - margin_y, h_half + margin_y)
-        ax.set_title("Radial", fontproperties=title_font)
+def draw_env_curves(env_res):
+    """壓縮 / 填充 / 綜合良率 vs 溫度 (每個膨潤率一條線)，標示最差操作點"""
+    fig = new_figure((12, 3.2))
+    axes = fig.subplots(1, 3)
+    panels = (("Compression Yield (%)", env_res.yield_comp), ("Fill Yield (%)", env_res.yield_fill),
+              ("Combined Yield (%)", env_res.yield_combined))
+    for ax, (title, values) in zip(axes, panels):
+        for j, swell in enumerate(env_res.swells):
+            ax.plot(env_res.temps, values[:, j], lw=1.2, label=f"Swell {swell * 100:g}%")
+        ax.set_title(title, fontsize=9)
+        ax.set_xlabel("Temperature (°C)", fontsize=8)
+        ax.set_ylim(-2, 102)
+        ax.tick_params(labelsize=7)
+        ax.grid(alpha=0.3)
+    worst_t, worst_s, worst_y = env_res.worst()
+    axes[2].plot([worst_t], [worst_y], 'rv')
+    axes[0].legend(fontsize=7)
+    fig.tight_layout()
     return fig
 
+def draw_sensitivity_pareto(sens):
+    """變異貢獻 Pareto：壓縮率 / 填充率一階 Sobol 指標 (含累積線) + 公差歸零的 PPM 降幅"""
+    fig = new_figure((12, 3.2))
+    axes = fig.subplots(1, 3)
+    panels = (("comp", "Compression Variance (%)", lambda d: d.sobol_comp * 100, '#4CAF50'),
+              ("fill", "Fill Variance (%)", lambda d: d.sobol_fill * 100, '#FF9800'),
+              ("ppm", "PPM Reduction if Tol = 0", lambda d: sens.ppm_combined - d.ppm_zero_tol, '#F44336'))
+    for ax, (key, title, value_of, color) in zip(axes, panels):
+        rows = sens.pareto(key)
+        labels = [DIM_LABELS[d.name].replace("Groove ", "G. ") for d in rows]
+        vals = np.array([value_of(d) for d in rows])
+        ax.bar(labels, vals, color=color, alpha=0.8)
+        ax.set_title(title, fontsize=9)
+        ax.tick_params(axis='x', labelsize=7, rotation=30)
+        ax.tick_params(axis='y', labelsize=7)
+        if key != "ppm" and vals.sum() > 0:
+            ax2 = ax.twinx()
+            ax2.plot(labels, np.cumsum(vals) / vals.sum() * 100, color='black', marker='o', ms=3, lw=1)
+            ax2.set_ylim(0, 105); ax2.tick_params(labelsize=7)
+    fig.tight_layout()
+    return fig
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_sensitivity_png(spec):
+    """敏感度 Pareto 圖 PNG，依 DesignSpec 快取 (未變更設計的 rerun 不重繪)"""
+    return fig_to_png(draw_sensitivity_pareto(run_sensitivity(spec)))
+
+ENGINE_MC = "蒙地卡羅 (Monte Carlo)"
+ENGINE_ANALYTIC = "解析快速估算 (Analytic)"
+SAMPLER_OPTIONS = {
+    "一般亂數 (Random)": SAMPLER_RANDOM,
+    "拉丁超立方 (LHS)": SAMPLER_LHS,
+    "Sobol 準蒙地卡羅 (QMC)": SAMPLER_SOBOL,
+    "重要性抽樣 (Importance, 低 PPM)": SAMPLER_IMPORTANCE,
+}
+MEMORY_OPTIONS = {
+    "標準 (float64)": MEMORY_STANDARD,
+    "省記憶體 (float64，結果相同)": MEMORY_LEAN,
+    "省記憶體 + float32": MEMORY_LEAN32,
+}
+
+# PDF 參數表名稱 → DesignSpec 尺寸欄位 (實測尺寸改填實測平均 / 標準差)
+PDF_PARAM_DIMS = {
+    "O-Ring CS": "cs", "O-Ring Height": "irr_h", "O-Ring Area": "irr_area",
+    "Groove Height": "g_depth", "Groove Width": "g_width", "Groove Width (Top)": "g_wtop", "Groove Width (Btm)": "g_wbtm",
+}
+
 # --- 全域設定 ---
 with st.expander("⚙️ 全域設定與目標 (Global Settings & Yield Targets)", expanded=True):
     row0_1, row0_2, row0_3 = st.columns([1, 1, 2])
     with row0_1:
-        comp_mode = st.radio("壓縮模式", ["正壓 (Axial)", "側壓 (Radial)"])
+        comp_mode = st.radio("壓縮模式", [AXIAL, RADIAL])
+        engine_mode = st.radio("計算引擎", [ENGINE_MC, ENGINE_ANALYTIC], help="解析模式以數值積分估算，毫秒級回應，適合 what-if；正式簽核請用蒙地卡羅")
     with row0_2:
-        monthly_forecast = st.number_input("月產能預估 (Monthly Forecast)", value=500000, step=10000)
+        monthly_forecast = st.number_input("月產能預估 (Monthly Forecast)", value=500000, step=10000, min_value=1)
         sim_count = int(monthly_forecast)
+        sim_seed = st.number_input("隨機種子 (Seed)", value=20240114, step=1, min_value=0, help="相同輸入 + 相同 seed → 結果完全相同，可重現報告")
+        sampler_label = st.selectbox("抽樣方法", list(SAMPLER_OPTIONS), disabled=engine_mode != ENGINE_MC,
+                                     help="LHS / Sobol 降低變異；重要性抽樣往規格界限加密取樣，適合個位數 PPM 的設計")
+        memory_label = st.selectbox("記憶體模式", list(MEMORY_OPTIONS), disabled=engine_mode != ENGINE_MC,
+                                    help="省記憶體：預先配置緩衝區並就地運算，多人共用伺服器時降低每次模擬的記憶體峰值；"
+                                         "float32 再減半，良率差異在抽樣誤差內")
     with row0_3:
-        st.info(f"💡 系統將執行 **{sim_count:,}** 次蒙地卡羅模擬，以評估該批生產的良率。")
+        ci_width_ppm = None; max_seconds = None
+        if engine_mode == ENGINE_MC:
+            is_adaptive = st.checkbox("自適應停止 (依信賴區間寬度)", value=False,
+                                      help="持續分批抽樣直到綜合良率 95% CI 寬度達標；月產能改作為樣本上限")
+            if is_adaptive:
+                a_col1, a_col2 = st.columns(2)
+                ci_width_ppm = a_col1.number_input("CI 寬度目標 (ppm)", value=50.0, step=10.0, min_value=0.1)
+                max_seconds = a_col2.number_input("時間上限 (秒)", value=30.0, step=5.0, min_value=1.0)
+                st.info(f"💡 自適應模式：抽樣至 95% CI 寬度 ≤ **{ci_width_ppm:g} ppm**，上限 **{sim_count:,}** 次 / **{max_seconds:g}** 秒。")
+            else:
+                st.info(f"💡 系統將執行 **{sim_count:,}** 次蒙地卡羅模擬，以評估該批生產的良率。"
+                        + (" (大樣本：分塊串流計算，記憶體用量固定)" if sim_count > PIPELINE_MAX_SAMPLES else "")
+                        + (f" (≤ {PIPELINE_MAX_SAMPLES:,} 次：增量計算，修改輸入只重算受影響的部分；"
+                           f"每個 session 保留中間結果，最多約 {PIPELINE_MAX_BYTES / 2**20:.0f} MiB)"
+                           if sim_count <= PIPELINE_MAX_SAMPLES and not os.environ.get(SERVICE_ENV) else ""))
+        else:
+            st.info("⚡ 解析快速估算：以常態分佈數值積分直接計算良率，不進行抽樣。")
     st.markdown("---")
     st.write("🎯 **良率判定標準**")
     row1_1, row1_2, row1_3, row1_4 = st.columns(4)
@@ -376,23 +287,25 @@ with st.expander("⚙️ 全域設定與目標 (Global Settings & Yield Targets)
 
 # --- O-Ring 設定 ---
 st.subheader("1. O-Ring 設定")
-oring_type = st.radio("類型", ["正規圓形 (Standard)", "不規則形 (Irregular)"], horizontal=True, label_visibility="collapsed")
-sim_oring_h_raw = None; sim_oring_w_raw = None; sim_oring_area_raw = None
+oring_type = st.radio("類型", [STANDARD, IRREGULAR], horizontal=True, label_visibility="collapsed")
 oring_display_w_nom = 0; oring_display_h_nom = 0
 oring_pdf_params = [] 
+oring_dims = {}
 
-if oring_type == "正規圓形 (Standard)":
+if oring_type == STANDARD:
+    # 線徑欄位以 key 綁定 session_state，目錄選型結果可直接寫回
+    st.session_state.setdefault("cs_nom", DesignSpec.cs.nom)
+    st.session_state.setdefault("cs_tol", DesignSpec.cs.tol)
+    st.session_state.setdefault("cs_cpk", DesignSpec.cs.cpk)
     c_o1, c_o2, c_o3 = st.columns([1, 1, 1])
     with c_o1:
-        cs_nom = st.number_input("線徑 (CS) mm", value=2.00, format="%.3f")
+        cs_nom = st.number_input("線徑 (CS) mm", key="cs_nom", format="%.3f")
     with c_o2:
-        cs_tol = st.number_input("CS 公差 (±) mm", value=0.08, format="%.3f")
+        cs_tol = st.number_input("CS 公差 (±) mm", key="cs_tol", format="%.3f")
     with c_o3:
-        cs_cpk = st.number_input("CS Cpk", value=1.33, step=0.1) 
+        cs_cpk = st.number_input("CS Cpk", key="cs_cpk", step=0.1)
+    oring_dims["cs"] = DimSpec(cs_nom, cs_tol, cs_cpk)
     if cs_nom > 0:
-        raw_cs_sim = generate_dim(cs_nom, cs_tol, cs_cpk, sim_count)
-        sim_oring_h_raw = sim_oring_w_raw = raw_cs_sim
-        sim_oring_area_raw = np.pi * (raw_cs_sim / 2)**2
         oring_display_w_nom = oring_display_h_nom = cs_nom
         oring_pdf_params.append({"name": "O-Ring CS", "nom": cs_nom, "tol": cs_tol, "cpk": cs_cpk})
 else:
@@ -407,10 +320,9 @@ else:
     with c_ir4:
         irr_h_cpk = st.number_input("高度 Cpk", value=1.33, step=0.1)
         irr_area_cpk = irr_h_cpk
+    oring_dims["irr_h"] = DimSpec(irr_h, irr_h_tol, irr_h_cpk)
+    oring_dims["irr_area"] = DimSpec(irr_area, irr_area_tol, irr_area_cpk)
     if irr_h > 0 and irr_area > 0:
-        sim_oring_h_raw = generate_dim(irr_h, irr_h_tol, irr_h_cpk, sim_count)
-        sim_oring_area_raw = generate_dim(irr_area, irr_area_tol, irr_area_cpk, sim_count)
-        sim_oring_w_raw = sim_oring_area_raw / sim_oring_h_raw
         oring_display_h_nom = irr_h
         oring_display_w_nom = irr_area / irr_h
         oring_pdf_params.append({"name": "O-Ring Height", "nom": irr_h, "tol": irr_h_tol, "cpk": irr_h_cpk})
@@ -421,6 +333,7 @@ st.markdown("---")
 st.subheader("2. 拉伸設定 (Stretch)")
 is_stretched = st.checkbox("啟用拉伸計算", value=False)
 stretch_factor = 1.0
+stretch_pct_eff = 0.0
 if is_stretched:
     col_s1, col_s2, col_s3, col_s4 = st.columns(4)
     with col_s1:
@@ -428,46 +341,40 @@ if is_stretched:
     with col_s2:
         install_len = st.number_input("安裝後長度 (mm)", value=100.00, step=1.0)
     stretch_factor = 1 + (stretch_pct / 100.0)
+    stretch_pct_eff = stretch_pct
     orig_len_calc = install_len / stretch_factor
-    area_new_display = (np.pi * (oring_display_h_nom/2)**2) / stretch_factor if oring_type == "正規圓形 (Standard)" else (oring_display_w_nom * oring_display_h_nom) / stretch_factor
+    area_new_display = (np.pi * (oring_display_h_nom/2)**2) / stretch_factor if oring_type == STANDARD else (oring_display_w_nom * oring_display_h_nom) / stretch_factor
     with col_s3:
         st.markdown(f"<div class='info-text'>安裝前原始長度</div><div style='font-size:20px; font-weight:bold;'>{orig_len_calc:.2f} mm</div>", unsafe_allow_html=True)
     with col_s4:
         st.markdown(f"<div class='info-text'>拉伸後平均截面積</div><div style='font-size:20px; font-weight:bold;'>{area_new_display:.3f} mm²</div>", unsafe_allow_html=True)
 
-if sim_oring_h_raw is not None:
-    sim_oring_area_final = sim_oring_area_raw / stretch_factor
-    shrink_ratio = np.sqrt(1 / stretch_factor)
-    sim_oring_h_final = sim_oring_h_raw * shrink_ratio
-    sim_oring_w_final = sim_oring_w_raw * shrink_ratio
-    oring_display_h_final = oring_display_h_nom * shrink_ratio
-    oring_display_w_final = oring_display_w_nom * shrink_ratio
-else:
-    sim_oring_h_final = sim_oring_w_final = sim_oring_area_final = None
-    oring_display_h_final = oring_display_w_final = 0
 st.markdown("---")
 
 # --- 溝槽參數 ---
 st.subheader("3. 溝槽參數 (Groove)")
-groove_type = st.radio("形狀", ["矩形 (Rectangular)", "梯形 (Trapezoidal)"], horizontal=True, label_visibility="collapsed")
-sim_groove_depth = None; sim_groove_area = None; sim_groove_width_eff = None
+groove_type = st.radio("形狀", [RECTANGULAR, TRAPEZOIDAL], horizontal=True, label_visibility="collapsed")
+# 溝槽欄位以 key 綁定 session_state，最佳化結果可直接寫回
+for _name, _dim in DesignSpec(groove_type=groove_type).groove_dims():
+    st.session_state.setdefault(f"{_name}_nom", _dim.nom)
+    st.session_state.setdefault(f"{_name}_tol", _dim.tol)
+    st.session_state.setdefault(f"{_name}_cpk", _dim.cpk)
 plot_w_top = 0; plot_w_btm = 0; plot_depth = 0
 groove_pdf_params = []
+groove_dims = {}
 
-if groove_type == "矩形 (Rectangular)":
+if groove_type == RECTANGULAR:
     rg1, rg2 = st.columns(2)
     with rg1:
-        g_depth_nom = st.number_input("溝槽高度 (Height) mm", value=1.55, format="%.3f")
-        g_depth_tol = st.number_input("H 公差 (±) mm", value=0.05, format="%.3f")
-        g_depth_cpk = st.number_input("H Cpk", value=1.33, step=0.1)
+        g_depth_nom = st.number_input("溝槽高度 (Height) mm", key="g_depth_nom", format="%.3f")
+        g_depth_tol = st.number_input("H 公差 (±) mm", key="g_depth_tol", format="%.3f")
+        g_depth_cpk = st.number_input("H Cpk", key="g_depth_cpk", step=0.1)
     with rg2:
-        g_width_nom = st.number_input("溝槽寬度 (Width) mm", value=2.40, format="%.3f")
-        g_width_tol = st.number_input("W 公差 (±) mm", value=0.05, format="%.3f")
-        g_width_cpk = st.number_input("W Cpk", value=1.33, step=0.1)
-    sim_groove_depth = generate_dim(g_depth_nom, g_depth_tol, g_depth_cpk, sim_count)
-    sim_g_width = generate_dim(g_width_nom, g_width_tol, g_width_cpk, sim_count)
-    sim_groove_area = sim_g_width * sim_groove_depth
-    sim_groove_width_eff = sim_g_width
+        g_width_nom = st.number_input("溝槽寬度 (Width) mm", key="g_width_nom", format="%.3f")
+        g_width_tol = st.number_input("W 公差 (±) mm", key="g_width_tol", format="%.3f")
+        g_width_cpk = st.number_input("W Cpk", key="g_width_cpk", step=0.1)
+    groove_dims["g_depth"] = DimSpec(g_depth_nom, g_depth_tol, g_depth_cpk)
+    groove_dims["g_width"] = DimSpec(g_width_nom, g_width_tol, g_width_cpk)
     plot_depth = g_depth_nom; plot_w_top = plot_w_btm = g_width_nom
     
     groove_pdf_params.append({"name": "Groove Height", "nom": g_depth_nom, "tol": g_depth_tol, "cpk": g_depth_cpk})
@@ -476,30 +383,113 @@ else:
     tg1, tg2, tg3 = st.columns(3)
     with tg1:
         st.markdown("**溝槽高度 (Height)**")
-        g_depth_nom = st.number_input("高度 (H) mm", value=1.55, format="%.3f")
-        g_depth_tol = st.number_input("H 公差 (±) mm", value=0.05, format="%.3f")
-        g_depth_cpk = st.number_input("H Cpk", value=1.33, step=0.1)
+        g_depth_nom = st.number_input("高度 (H) mm", key="g_depth_nom", format="%.3f")
+        g_depth_tol = st.number_input("H 公差 (±) mm", key="g_depth_tol", format="%.3f")
+        g_depth_cpk = st.number_input("H Cpk", key="g_depth_cpk", step=0.1)
     with tg2:
         st.markdown("**上底寬度 (Top Width)**")
-        g_wtop_nom = st.number_input("上底寬 (W_top) mm", value=2.00, format="%.3f")
-        g_wtop_tol = st.number_input("上底公差 (±) mm", value=0.05, format="%.3f")
-        g_wtop_cpk = st.number_input("上底 Cpk", value=1.33, step=0.1)
+        g_wtop_nom = st.number_input("上底寬 (W_top) mm", key="g_wtop_nom", format="%.3f")
+        g_wtop_tol = st.number_input("上底公差 (±) mm", key="g_wtop_tol", format="%.3f")
+        g_wtop_cpk = st.number_input("上底 Cpk", key="g_wtop_cpk", step=0.1)
     with tg3:
         st.markdown("**下底寬度 (Bottom Width)**")
-        g_wbtm_nom = st.number_input("下底寬 (W_btm) mm", value=1.50, format="%.3f")
-        g_wbtm_tol = st.number_input("下底公差 (±) mm", value=0.05, format="%.3f")
-        g_wbtm_cpk = st.number_input("下底 Cpk", value=1.33, step=0.1)
-    sim_groove_depth = generate_dim(g_depth_nom, g_depth_tol, g_depth_cpk, sim_count)
-    sim_wtop = generate_dim(g_wtop_nom, g_wtop_tol, g_wtop_cpk, sim_count)
-    sim_wbtm = generate_dim(g_wbtm_nom, g_wbtm_tol, g_wbtm_cpk, sim_count)
-    sim_groove_area = (sim_wtop + sim_wbtm) * sim_groove_depth / 2
-    sim_groove_width_eff = (sim_wtop + sim_wbtm) / 2
+        g_wbtm_nom = st.number_input("下底寬 (W_btm) mm", key="g_wbtm_nom", format="%.3f")
+        g_wbtm_tol = st.number_input("下底公差 (±) mm", key="g_wbtm_tol", format="%.3f")
+        g_wbtm_cpk = st.number_input("下底 Cpk", key="g_wbtm_cpk", step=0.1)
+    groove_dims["g_depth"] = DimSpec(g_depth_nom, g_depth_tol, g_depth_cpk)
+    groove_dims["g_wtop"] = DimSpec(g_wtop_nom, g_wtop_tol, g_wtop_cpk)
+    groove_dims["g_wbtm"] = DimSpec(g_wbtm_nom, g_wbtm_tol, g_wbtm_cpk)
     plot_depth = g_depth_nom; plot_w_top = g_wtop_nom; plot_w_btm = g_wbtm_nom
     
     groove_pdf_params.append({"name": "Groove Height", "nom": g_depth_nom, "tol": g_depth_tol, "cpk": g_depth_cpk})
     groove_pdf_params.append({"name": "Groove Width (Top)", "nom": g_wtop_nom, "tol": g_wtop_tol, "cpk": g_wtop_cpk})
     groove_pdf_params.append({"name": "Groove Width (Btm)", "nom": g_wbtm_nom, "tol": g_wbtm_tol, "cpk": g_wbtm_cpk})
 
+# --- 實測尺寸分佈 ---
+measurement_ids = ()
+with st.expander("📏 實測尺寸分佈 (Measured Data)"):
+    st.caption("上傳 CMM / 量具匯出的 CSV 或 Excel，欄位名稱同尺寸代號 (cs, irr_h, irr_area, g_depth, g_width, g_wtop, g_wbtm)；"
+               "同一列視為同一件，配對尺寸的相關性會保留。彼此無關的尺寸請分成不同檔案。")
+    measure_files = st.file_uploader("量測資料", type=["csv", "xlsx"], accept_multiple_files=True, key="measure_files")
+    # 每個上傳檔只解析一次 (依 file_id 記住 dataset id)；資料集以 memmap 開啟，rerun 不重新讀檔
+    measure_memo = st.session_state.setdefault("_measure_ids", {})
+    for f in measure_files or []:
+        if f.file_id not in measure_memo:
+            try:
+                measure_memo[f.file_id] = ingest_bytes(f.getvalue(), f.name)
+            except ValueError as e:
+                st.error(f"{f.name}：{e}")
+                continue
+        measurement_ids += (measure_memo[f.file_id],)
+    if measurement_ids:
+        st.dataframe(pd.DataFrame([
+            {"File": f.name, "Dimension": DIM_LABELS.get(name, name), "N": n, "Mean (mm)": mean, "Std (mm)": std,
+             "Min (mm)": lo, "Max (mm)": hi}
+            for f in measure_files if f.file_id in measure_memo
+            for name, (n, mean, std, lo, hi) in dataset_summary(measure_memo[f.file_id]).items()
+        ]).style.format({"Mean (mm)": "{:.4f}", "Std (mm)": "{:.4f}", "Min (mm)": "{:.4f}", "Max (mm)": "{:.4f}"}),
+            use_container_width=True, hide_index=True)
+        if not st.checkbox("蒙地卡羅改用實測分佈", value=True, key="measure_apply"):
+            measurement_ids = ()
+        st.caption("蒙地卡羅以 bootstrap 抽取實測資料 (LHS / Sobol / 重要性抽樣以反 CDF 查表)；解析估算、敏感度、掃描與最佳化"
+                   "以實測平均 / 標準差的常態近似計算。")
+
+# --- 設計輸入 (引擎快取 key) ---
+design_spec = DesignSpec(
+    comp_mode=comp_mode,
+    oring_type=oring_type,
+    groove_type=groove_type,
+    stretch_pct=stretch_pct_eff,
+    target_comp_min=target_comp_min,
+    target_comp_max=target_comp_max,
+    target_fill_min=target_fill_min,
+    target_fill_max=target_fill_max,
+    sim_count=sim_count,
+    seed=int(sim_seed),
+    sampler=SAMPLER_OPTIONS[sampler_label],
+    ci_width_ppm=ci_width_ppm,
+    max_seconds=max_seconds,
+    memory_mode=MEMORY_OPTIONS[memory_label],
+    measurements=measurement_ids,
+    **oring_dims,
+    **groove_dims,
+)
+# 解析類分析 (解析估算 / 敏感度 / 掃描 / 最佳化 / 目錄選型) 用的常態近似；沒有實測資料時即 design_spec
+analysis_spec = normal_approx(design_spec)
+for _param in oring_pdf_params + groove_pdf_params:
+    _name = PDF_PARAM_DIMS[_param["name"]]
+    if _name in measured_names(design_spec):
+        _dim = getattr(analysis_spec, _name)
+        _param.update(name=f"{_param['name']} (measured)", nom=_dim.nom, tol=_dim.tol, cpk=_dim.cpk)
+oring_display_w_final, oring_display_h_final = oring_display_dims(design_spec)
+
+# --- 標準 O-Ring 目錄選型 ---
+if oring_type == STANDARD:
+    with st.expander("📚 標準 O-Ring 目錄選型 (AS568 / ISO 3601 / JIS B2401)"):
+        ct_c1, ct_c2 = st.columns([2, 1])
+        catalog_standards = ct_c1.multiselect("標準", list(STANDARDS), default=list(STANDARDS))
+        catalog_method = ct_c2.radio("計算方式", ["解析估算", "蒙地卡羅 (共用樣本)"], horizontal=True)
+        catalog_fits = run_rank(analysis_spec, tuple(catalog_standards), method=METHOD_ANALYTIC if catalog_method == "解析估算" else METHOD_MC)
+        if not catalog_fits:
+            st.info("請至少選擇一個標準")
+        else:
+            st.dataframe(pd.DataFrame([{
+                "Standard": f.standard, "Series": f.series, "Sizes": f.sizes, "CS (mm)": f.cs, "Tol (±)": f.tol,
+                "公稱壓縮率 (%)": f.nominal_comp, "公稱填充率 (%)": f.nominal_fill,
+                "綜合良率 (%)": f.yield_combined, "綜合 PPM": f.ppm_combined,
+            } for f in catalog_fits]).style.format({"CS (mm)": "{:.2f}", "Tol (±)": "{:.2f}", "公稱壓縮率 (%)": "{:.2f}",
+                                                    "公稱填充率 (%)": "{:.2f}", "綜合良率 (%)": "{:.3f}", "綜合 PPM": "{:.0f}"}),
+                use_container_width=True, hide_index=True)
+            st.caption(f"以目前溝槽、模式、拉伸與目標區間評估；CS Cpk 沿用 {analysis_spec.cs.cpk}。公差為標準一般等級，請以供應商規格書確認。")
+            fit_idx = st.selectbox("選擇線徑", range(len(catalog_fits)),
+                                   format_func=lambda i: f"{catalog_fits[i].standard} {catalog_fits[i].series} — CS {catalog_fits[i].cs:.2f} ± {catalog_fits[i].tol:.2f}")
+
+            def apply_catalog_fit(fit=catalog_fits[fit_idx]):
+                st.session_state["cs_nom"] = fit.cs
+                st.session_state["cs_tol"] = fit.tol
+
+            st.button("✅ 套用至線徑輸入 (Apply)", on_click=apply_catalog_fit, use_container_width=True)
+
 # --- 4. 示意圖 (Picture) ---
 st.markdown("---")
 st.subheader("4. 示意圖 (Picture)")
@@ -511,21 +501,20 @@ schematic_source = st.radio(
 )
 
 final_diagram_bytes = None
+schematic_geom = None  # 自動繪製時 PDF 以向量重繪示意圖 (見 oring.report.draw_cad_schematic_vector)
 
 if schematic_source == "程式自動繪製 (Auto Generated)":
     if plot_depth > 0:
-        fig_cad = draw_cad_schematic_v11(groove_type, plot_w_top, plot_w_btm, plot_depth, 
-                                        oring_display_w_final, oring_display_h_final, comp_mode, chinese_font)
+        schematic_geom = (groove_type, plot_w_top, plot_w_btm, plot_depth,
+                          float(oring_display_w_final), float(oring_display_h_final), comp_mode)
+        # 依實際繪圖輸入快取 (oring.plots.cad_schematic_png)：幾何未變的 rerun 不重繪
+        final_diagram_bytes = stage_timer.call("schematic", cad_schematic_png, *schematic_geom, chinese_font)
         c_fig1, c_fig2, c_fig3 = st.columns([3, 2, 3]) 
         with c_fig2:
-            st.pyplot(fig_cad, use_container_width=True)
-            
-        buf_cad = BytesIO()
-        fig_cad.savefig(buf_cad, format="png", dpi=200, bbox_inches='tight', transparent=True)
-        buf_cad.seek(0)
-        final_diagram_bytes = buf_cad.getvalue()
+            st.image(final_diagram_bytes, use_container_width=True)
 
 else: # 自行貼上Screanshot
+    from streamlit_paste_button import paste_image_button  # 只有選擇貼上時才載入元件
     st.info("👇 Screanshot後請點擊下方Paste按鈕")
     
     # [FIX] 這個 paste 元件在 Streamlit 多次 rerun 後，偶發「變成 Paste Button / 點了沒反應」
@@ -573,30 +562,51 @@ else: # 自行貼上Screanshot
         st.warning("尚未貼上圖片")
 
 # --- 計算與報告 ---
-if sim_oring_h_final is not None and sim_groove_depth is not None and sim_groove_width_eff is not None:
-    if comp_mode == "正壓 (Axial)":
-        dim_oring_comp = sim_oring_h_final; dim_groove_comp = sim_groove_depth
+if design_spec.has_oring:
+    if comp_mode == AXIAL:
         comp_title = "軸向壓縮率 (Axial Compression)"; hist_color = '#4CAF50'
     else:
-        dim_oring_comp = sim_oring_w_final; dim_groove_comp = sim_groove_width_eff
         comp_title = "徑向壓縮率 (Radial Compression)"; hist_color = '#2196F3'
 
-    with np.errstate(divide='ignore', invalid='ignore'):
-        compression_sim = (dim_oring_comp - dim_groove_comp) / dim_oring_comp * 100
-        fill_sim = (sim_oring_area_final / sim_groove_area) * 100
-        compression_sim = np.nan_to_num(compression_sim, nan=0.0)
-        fill_sim = np.nan_to_num(fill_sim, nan=0.0)
-
-    mean_comp = np.mean(compression_sim); mean_fill = np.mean(fill_sim)
-    pass_comp_mask = (compression_sim >= target_comp_min) & (compression_sim <= target_comp_max)
-    yield_comp = (np.sum(pass_comp_mask) / sim_count) * 100
-    ppm_comp = (100 - yield_comp) * 10000
-    pass_fill_mask = (fill_sim >= target_fill_min) & (fill_sim <= target_fill_max)
-    yield_fill = (np.sum(pass_fill_mask) / sim_count) * 100
-    ppm_fill = (100 - yield_fill) * 10000
-    pass_combined_mask = pass_comp_mask & pass_fill_mask
-    yield_combined = (np.sum(pass_combined_mask) / sim_count) * 100
-    ppm_combined = (100 - yield_combined) * 10000
+    # 蒙地卡羅先查持久化結果儲存 (設計輸入 + seed 的雜湊)，團隊中已算過的設計直接讀取；
+    # 未命中時，有設定 ORING_SERVICE_URL 則交給共用的模擬服務 (行程池 + 去重)；
+    # 未設定或服務無法連線時在本機計算：中小樣本以本 session 的增量計算圖只重算輸入有變的節點 (oring/pipeline.py)
+    result_store = get_result_store() if engine_mode == ENGINE_MC else None
+    service_url = os.environ.get(SERVICE_ENV) if engine_mode == ENGINE_MC else None
+    sim_result = None
+    if result_store:
+        with stage_timer.stage("store", samples=design_spec.sim_count) as store_record:
+            sim_result = store_call(result_store.get, design_spec)
+            store_record.cached = sim_result is not None
+        if sim_result is not None:
+            stage_timer.add_engine_stages(sim_result, cached=True)
+    if sim_result is None and service_url:
+        try:
+            with stage_timer.stage("service", samples=design_spec.sim_count) as service_record:
+                sim_result, service_record.cached = run_via_service(service_url, design_spec)
+            stage_timer.add_engine_stages(sim_result, cached=service_record.cached)
+        except (OSError, ServiceError) as e:
+            st.warning(f"模擬服務無法使用 ({e})，改在本機計算")
+    if sim_result is None and engine_mode == ENGINE_MC and pipeline_supports(design_spec):
+        pipeline = st.session_state.setdefault("_pipeline", Pipeline())
+        with stage_timer.stage("engine", samples=design_spec.sim_count) as engine_record:
+            sim_result = pipeline.run(design_spec)
+            engine_record.cached = all(hit for _, _, hit in pipeline.last_run)
+        stage_timer.add_engine_stages(sim_result, cached={name: hit for name, _, hit in pipeline.last_run})
+    if engine_mode == ENGINE_MC:
+        if sim_result is None:
+            sim_result = stage_timer.call("engine", run_simulation, design_spec, samples=design_spec.sim_count)
+            stage_timer.add_engine_stages(sim_result, cached=stage_timer.records[-1].cached)
+        if result_store and not store_record.cached:
+            store_call(result_store.put, design_spec, sim_result)
+        comp_hist = sim_result.comp_hist; fill_hist = sim_result.fill_hist
+    else:
+        sim_result = stage_timer.call("engine", run_estimate, analysis_spec)
+        comp_hist = fill_hist = None
+    mean_comp = sim_result.mean_comp; mean_fill = sim_result.mean_fill
+    yield_comp = sim_result.yield_comp; ppm_comp = sim_result.ppm_comp
+    yield_fill = sim_result.yield_fill; ppm_fill = sim_result.ppm_fill
+    yield_combined = sim_result.yield_combined; ppm_combined = sim_result.ppm_combined
 
     st.markdown("---")
     st.header("📊 分析報告")
@@ -609,16 +619,16 @@ if sim_oring_h_final is not None and sim_groove_depth is not None and sim_groove
     with cr1:
         st.metric("平均壓縮率", f"{mean_comp:.3f} %")
         st.markdown(get_yield_html(yield_comp, ppm_comp), unsafe_allow_html=True)
+    hist_comp_bytes = None
     with cr2:
-        fig_c, ax_c = plt.subplots(figsize=(6, 2.5))
-        ax_c.hist(compression_sim, bins=50, color=hist_color, alpha=0.7, density=True)
-        ax_c.axvline(target_comp_min, color='r', ls='--'); ax_c.axvline(target_comp_max, color='r', ls='--')
-        ax_c.set_title("Compression Distribution", fontsize=10) 
-        st.pyplot(fig_c, use_container_width=True)
+        if comp_hist is not None:
+            hist_comp_bytes = stage_timer.call("hist_comp", render_hist_png, comp_hist.edges, comp_hist.counts, hist_color,
+                                              target_comp_min, target_comp_max, "Compression Distribution")
+            st.image(hist_comp_bytes, use_container_width=True)
+        else:
+            st.caption("解析模式不繪製分佈圖 (切換至蒙地卡羅以取得直方圖)")
     with st.expander("查看壓縮率 6-Sigma 詳細數據"):
-        std_c = np.std(compression_sim)
-        sigma_data = [{"Level": ("Mean" if i==0 else f"{i:+}σ"), "Value (%)": mean_comp + i * std_c} for i in range(-6, 7)]
-        st.dataframe(pd.DataFrame(sigma_data).set_index("Level").T.style.format("{:.3f}"), use_container_width=True)
+        st.dataframe(sigma_table(mean_comp, sim_result.std_comp, comp_hist).style.format("{:.3f}"), use_container_width=True)
 
     st.markdown("---")
     st.subheader("填充率 (Fill Rate)")
@@ -626,18 +636,204 @@ if sim_oring_h_final is not None and sim_groove_depth is not None and sim_groove
     with fr1:
         st.metric("平均填充率", f"{mean_fill:.3f} %")
         st.markdown(get_yield_html(yield_fill, ppm_fill), unsafe_allow_html=True)
+    hist_fill_bytes = None
     with fr2:
-        fig_f, ax_f = plt.subplots(figsize=(6, 2.5))
-        ax_f.hist(fill_sim, bins=50, color='#FF9800', alpha=0.7, density=True)
-        ax_f.axvline(target_fill_min, color='r', ls='--'); ax_f.axvline(target_fill_max, color='r', ls='--')
-        ax_f.set_title("Fill Rate Distribution", fontsize=10)
-        st.pyplot(fig_f, use_container_width=True)
+        if fill_hist is not None:
+            hist_fill_bytes = stage_timer.call("hist_fill", render_hist_png, fill_hist.edges, fill_hist.counts, '#FF9800',
+                                              target_fill_min, target_fill_max, "Fill Rate Distribution")
+            st.image(hist_fill_bytes, use_container_width=True)
+        else:
+            st.caption("解析模式不繪製分佈圖 (切換至蒙地卡羅以取得直方圖)")
     with st.expander("查看填充率 6-Sigma 詳細數據"):
-        std_f = np.std(fill_sim)
-        sigma_data_f = [{"Level": ("Mean" if i==0 else f"{i:+}σ"), "Value (%)": mean_fill + i * std_f} for i in range(-6, 7)]
-        st.dataframe(pd.DataFrame(sigma_data_f).set_index("Level").T.style.format("{:.3f}"), use_container_width=True)
+        st.dataframe(sigma_table(mean_fill, sim_result.std_fill, fill_hist).style.format("{:.3f}"), use_container_width=True)
 
     st.markdown(f"""<div class="summary-box"><h2 style="margin-top:0;">🌟 綜合評估結果 (Final Verdict)</h2><p style="font-size:16px;">同時滿足 <b>壓縮率 ({target_comp_min}-{target_comp_max}%)</b> 與 <b>填充率 ({target_fill_min}-{target_fill_max}%)</b> 之統計結果</p><div style="display: flex; justify-content: center; align-items: center; gap: 40px; margin-top: 10px;"><div><div style="color:#555; font-size:14px;">綜合良率 (Combined Yield)</div><div class="metric-value-large good-text" style="font-size:36px;">{yield_combined:.2f} %</div></div><div style="height: 50px; border-left: 2px solid #ccc;"></div><div><div style="color:#555; font-size:14px;">綜合不良率 (Defect Rate)</div><div class="metric-value-large bad-text" style="font-size:36px;">{int(ppm_combined)} ppm</div></div></div></div>""", unsafe_allow_html=True)
+    if engine_mode == ENGINE_MC:
+        ci_lo, ci_hi = sim_result.yield_combined_ci
+        st.caption(f"抽樣方法: {sampler_label}｜樣本數: {sim_result.sim_count:,}｜綜合良率 95% CI: {ci_lo:.4f} – {ci_hi:.4f} % "
+                   f"(寬度 {(ci_hi - ci_lo) * 10000:.1f} ppm)")
+        if sim_result.peak_bytes:
+            st.caption(f"記憶體峰值 (numpy 緩衝區估計)：{sim_result.peak_bytes / 2**20:.1f} MiB")
+        if sim_result.stop_reason:
+            stop_text = {"ci_width": "✅ 已達 CI 寬度目標", "sample_budget": "⚠️ 已用完樣本上限，CI 寬度未達標",
+                         "time_budget": "⚠️ 已達時間上限，CI 寬度未達標"}[sim_result.stop_reason]
+            st.caption(f"自適應停止：{stop_text}")
+
+    if engine_mode == ENGINE_ANALYTIC:
+        with st.expander(f"⚡ 解析估算 vs 蒙地卡羅 誤差比對 (解析耗時 {sim_result.elapsed_s * 1000:.1f} ms)"):
+            st.caption(f"以 {sim_count:,} 次蒙地卡羅結果為基準；誤差小於 MC 95% CI 即屬抽樣雜訊範圍。")
+            if st.checkbox("執行蒙地卡羅比對", value=False):
+                err_rows = compare_with_mc(sim_result, run_simulation(design_spec))
+                st.dataframe(pd.DataFrame(err_rows).set_index("metric").style.format("{:.4f}", na_rep="-"), use_container_width=True)
+
+    # --- 敏感度分析 ---
+    sens_result = stage_timer.call("sensitivity", run_sensitivity, analysis_spec)
+    sens_rows = [{"name": DIM_LABELS[d.name], "comp_var": d.sobol_comp * 100, "fill_var": d.sobol_fill * 100,
+                  "ppm_half": d.ppm_half_tol, "ppm_zero": d.ppm_zero_tol} for d in sens_result.pareto()]
+    sens_img_bytes = stage_timer.call("sensitivity_plot", render_sensitivity_png, analysis_spec)
+    with st.expander("📐 敏感度分析 (Sensitivity) — 哪個公差最值得收緊"):
+        st.image(sens_img_bytes, use_container_width=True)
+        st.dataframe(pd.DataFrame(sens_rows).rename(columns={
+            "name": "Dimension", "comp_var": "壓縮率變異貢獻 (%)", "fill_var": "填充率變異貢獻 (%)",
+            "ppm_half": "公差減半 → PPM", "ppm_zero": "公差歸零 → PPM"}).set_index("Dimension").style.format("{:.1f}"),
+            use_container_width=True)
+        st.caption(f"變異貢獻為一階 Sobol 指標 (解析積分)；PPM 欄為僅收緊該尺寸時的解析綜合 PPM "
+                   f"(目前 {sens_result.ppm_combined:.0f} ppm)。拉伸率為定值，不列入。")
+
+    # --- 設計空間掃描 ---
+    with st.expander("🗺️ 設計空間掃描 (Design Sweep) — 良率熱圖"):
+        sweep_dims = [(name, d) for name, d in analysis_spec.active_dims() if name.startswith("g_")] + analysis_spec.oring_dims()[:1]
+        sweep_names = [name for name, _ in sweep_dims]
+        sweep_noms = dict(sweep_dims)
+        sw_c1, sw_c2, sw_c3 = st.columns(3)
+        sweep_axes = []
+        for col, label, default_idx in ((sw_c1, "X 軸", 0), (sw_c2, "Y 軸", 1), (sw_c3, "第 3 軸 (選用)", None)):
+            with col:
+                options = sweep_names if default_idx is not None else ["(無)"] + sweep_names
+                axis_name = st.selectbox(label, options, index=default_idx or 0,
+                                         format_func=lambda n: DIM_LABELS.get(n, n), key=f"sweep_axis_{label}")
+                if axis_name == "(無)":
+                    continue
+                nom = sweep_noms[axis_name].nom
+                ax_lo = st.number_input(f"{label} 最小 (mm)", value=round(nom * 0.9, 3), format="%.3f", key=f"sweep_lo_{label}")
+                ax_hi = st.number_input(f"{label} 最大 (mm)", value=round(nom * 1.1, 3), format="%.3f", key=f"sweep_hi_{label}")
+                ax_n = st.number_input(f"{label} 點數", value=41 if default_idx is not None else 3,
+                                       min_value=2, max_value=200 if default_idx is not None else 6, key=f"sweep_n_{label}")
+                sweep_axes.append((axis_name, tuple(np.linspace(ax_lo, ax_hi, int(ax_n)))))
+        sweep_n_samples = st.number_input("每點樣本數 (共用亂數)", value=SWEEP_SAMPLES, step=5000, min_value=1000)
+        if len({name for name, _ in sweep_axes}) < len(sweep_axes):
+            st.warning("掃描軸不可重複")
+        elif st.checkbox("執行掃描", value=False, key="sweep_run"):
+            sweep_res = stage_timer.call("sweep", run_sweep, analysis_spec, tuple(sweep_axes), int(sweep_n_samples),
+                                         samples=int(sweep_n_samples))
+            best_point, best_yield = sweep_res.best()
+            st.success("最佳網格點: " + ", ".join(f"{DIM_LABELS[k]} = {v:.3f}" for k, v in best_point.items())
+                       + f" → 綜合良率 {best_yield:.2f} %")
+            with stage_timer.stage("sweep_plot"):
+                if len(sweep_axes) == 3:
+                    slice_cols = st.columns(len(sweep_axes[2][1]))
+                    for k, col in enumerate(slice_cols):
+                        with col:
+                            fig_sw = draw_sweep_heatmap(sweep_res, k, f"{DIM_LABELS[sweep_axes[2][0]]} = {sweep_axes[2][1][k]:.3f}")
+                            st.pyplot(fig_sw, use_container_width=True)
+                else:
+                    fig_sw = draw_sweep_heatmap(sweep_res)
+                    st.pyplot(fig_sw, use_container_width=True)
+            st.caption("黑色輪廓內：公稱尺寸下壓縮率與填充率皆落在目標區間 (可行區)")
+
+    # --- 多情境比較 ---
+    with st.expander("⚖️ 情境比較 (Scenario Comparison) — 共用樣本"):
+        st.caption("所有情境使用同一組尺寸樣本 (樣本數 / seed / 抽樣方法同全域設定)，差異只來自設計本身。")
+        cmp_c1, cmp_c2, cmp_c3 = st.columns(3)
+        cmp_modes = cmp_c1.multiselect("壓縮模式", [AXIAL, RADIAL], default=[AXIAL, RADIAL])
+        cmp_types = cmp_c2.multiselect("O-Ring 類型", [STANDARD, IRREGULAR], default=[oring_type])
+        cmp_stretch_text = cmp_c3.text_input("拉伸率 (%)，以逗號分隔", value=f"{stretch_pct_eff:g}")
+        try:
+            cmp_stretch = tuple(dict.fromkeys(float(v) for v in cmp_stretch_text.split(",") if v.strip()))
+        except ValueError:
+            cmp_stretch = ()
+            st.error("拉伸率需為數字，以逗號分隔")
+        cmp_scenarios = make_scenarios(design_spec, comp_mode=tuple(cmp_modes), oring_type=tuple(cmp_types),
+                                       stretch_pct=cmp_stretch)
+        if design_spec.sampler == SAMPLER_IMPORTANCE:
+            st.warning("情境比較不支援重要性抽樣，請改用 Random / LHS / Sobol")
+        elif not cmp_scenarios:
+            st.info("請至少選擇一個壓縮模式、O-Ring 類型與拉伸率")
+        elif st.checkbox(f"執行比較 ({len(cmp_scenarios)} 個情境 × {sim_count:,} 樣本)", value=False, key="compare_run"):
+            cmp_res = stage_timer.call("compare", run_compare, design_spec, cmp_scenarios,
+                                       samples=len(cmp_scenarios) * sim_count)
+            st.dataframe(pd.DataFrame(cmp_res.table()).rename(columns={
+                "scenario": "Scenario", "mean_comp": "壓縮 Mean (%)", "std_comp": "壓縮 Sigma (%)",
+                "mean_fill": "填充 Mean (%)", "std_fill": "填充 Sigma (%)", "yield_comp": "壓縮良率 (%)",
+                "yield_fill": "填充良率 (%)", "yield_combined": "綜合良率 (%)", "ppm_combined": "綜合 PPM",
+            }).set_index("Scenario").style.format("{:.2f}").format({"綜合 PPM": "{:.0f}"}), use_container_width=True)
+            cmp_h1, cmp_h2 = st.columns(2)
+            cmp_h1.image(overlay_hist_png([r.comp_hist for r in cmp_res.results], cmp_res.labels,
+                                          target_comp_min, target_comp_max, "Compression (%)"), use_container_width=True)
+            cmp_h2.image(overlay_hist_png([r.fill_hist for r in cmp_res.results], cmp_res.labels,
+                                          target_fill_min, target_fill_max, "Fill (%)"), use_container_width=True)
+
+    # --- 溫度 / 膨潤掃描 ---
+    with st.expander("🌡️ 溫度 / 膨潤掃描 (Environment Sweep)"):
+        st.caption(f"圖面尺寸視為 {T_REF:g} °C；溝槽與 O-Ring 依線膨脹係數縮放，O-Ring 另依體積膨潤率等向膨脹。"
+                   "所有操作點共用同一組樣本 (抽樣方法 / seed 同全域設定)。")
+        env_c1, env_c2, env_c3, env_c4 = st.columns(4)
+        env_t_lo = env_c1.number_input("溫度下限 (°C)", value=-40.0, step=5.0)
+        env_t_hi = env_c1.number_input("溫度上限 (°C)", value=125.0, step=5.0)
+        env_t_step = env_c1.number_input("溫度間距 (°C)", value=5.0, step=1.0, min_value=0.5)
+        env_groove_mat = env_c2.selectbox("溝槽材料", list(GROOVE_CTE))
+        env_alpha_g = env_c2.number_input("溝槽 CTE (ppm/°C)", value=GROOVE_CTE[env_groove_mat] * 1e6, step=1.0,
+                                          key=f"env_alpha_g_{env_groove_mat}")
+        env_oring_mat = env_c3.selectbox("O-Ring 材料", list(ORING_CTE))
+        env_alpha_o = env_c3.number_input("O-Ring CTE (ppm/°C)", value=ORING_CTE[env_oring_mat] * 1e6, step=10.0,
+                                          key=f"env_alpha_o_{env_oring_mat}")
+        env_swell_text = env_c4.text_input("體積膨潤率 (%)，以逗號分隔", value="0, 5, 10")
+        env_n_samples = env_c4.number_input("樣本數", value=ENV_SAMPLES, step=50000, min_value=1000)
+        try:
+            env_swells = tuple(dict.fromkeys(float(v) / 100 for v in env_swell_text.split(",") if v.strip()))
+        except ValueError:
+            env_swells = ()
+            st.error("膨潤率需為數字，以逗號分隔")
+        env_temps = tuple(np.arange(env_t_lo, env_t_hi + env_t_step / 2, env_t_step)) if env_t_hi >= env_t_lo else ()
+        if not env_temps or not env_swells:
+            st.info("請輸入有效的溫度範圍與膨潤率")
+        elif st.checkbox(f"執行掃描 ({len(env_temps)} 溫度 × {len(env_swells)} 膨潤率)", value=False, key="env_run"):
+            env_res = stage_timer.call("env_sweep", run_env_sweep, design_spec, env_temps, env_swells,
+                                       env_alpha_g * 1e-6, env_alpha_o * 1e-6, T_REF, int(env_n_samples),
+                                       samples=int(env_n_samples))
+            worst_t, worst_s, worst_y = env_res.worst()
+            st.warning(f"最差操作點：{worst_t:g} °C、膨潤 {worst_s * 100:g} % → 綜合良率 {worst_y:.2f} % "
+                       f"({(100 - worst_y) * 10000:.0f} ppm)")
+            with stage_timer.stage("env_sweep_plot"):
+                st.image(fig_to_png(draw_env_curves(env_res)), use_container_width=True)
+            env_rows = [{"Temp (°C)": t, "Swell (%)": sw * 100, "公稱壓縮率 (%)": env_res.nominal_comp[i, j],
+                         "公稱填充率 (%)": env_res.nominal_fill[i, j], "壓縮良率 (%)": env_res.yield_comp[i, j],
+                         "填充良率 (%)": env_res.yield_fill[i, j], "綜合良率 (%)": env_res.yield_combined[i, j]}
+                        for i, t in enumerate(env_res.temps) for j, sw in enumerate(env_res.swells)]
+            st.dataframe(pd.DataFrame(env_rows).style.format("{:.2f}"), use_container_width=True, hide_index=True)
+
+    # --- 溝槽最佳化 ---
+    with st.expander("🎯 溝槽最佳化 (Groove Optimizer)"):
+        st.caption("在固定的共用樣本上搜尋溝槽公稱值 (成本模式另含公差)；O-Ring、拉伸與目標區間維持不變。")
+        op_c1, op_c2, op_c3 = st.columns(3)
+        opt_label = op_c1.radio("最佳化目標", ["最大化綜合良率", "最低成本 (滿足 PPM 需求)"])
+        opt_objective = OBJECTIVE_YIELD if opt_label == "最大化綜合良率" else OBJECTIVE_COST
+        required_ppm = None
+        if opt_objective == OBJECTIVE_COST:
+            required_ppm = op_c2.number_input("需求綜合 PPM 上限", value=1000.0, step=100.0, min_value=1.0)
+        opt_bound = op_c3.number_input("公稱值搜尋範圍 (±%)", value=BOUND_PCT, step=5.0, min_value=1.0, max_value=90.0)
+        if st.checkbox("執行最佳化", value=False, key="opt_run"):
+            opt_res = stage_timer.call("optimize", run_optimize, analysis_spec, opt_objective, required_ppm, bound_pct=opt_bound)
+            opt_check = run_estimate(opt_res.spec)
+            if not opt_res.target_met:
+                st.error(f"最終驗證 {opt_res.ppm_combined:.0f} ppm 未達 {required_ppm:.0f} ppm "
+                         f"(溝槽公差收緊至解析度仍不足，O-Ring 公差主導)。")
+            st.success(f"綜合良率 {opt_res.start_yield:.2f} % → {opt_res.yield_combined:.2f} % "
+                       f"(解析驗證 {opt_check.yield_combined:.2f} %)｜評估 {opt_res.n_evals:,} 個候選點 × "
+                       f"{opt_res.search_samples:,} 樣本 (最終以 {opt_res.n_samples:,} 樣本驗證)，耗時 {opt_res.elapsed_s:.2f} s")
+            if opt_objective == OBJECTIVE_COST:
+                st.caption(f"相對加工成本 Σ1/tol：{opt_res.start_cost:.1f} → {opt_res.cost:.1f}")
+            opt_rows = [{"Dimension": DIM_LABELS[name], "Nominal (mm)": cur_dim.nom, "Tol (mm)": cur_dim.tol,
+                         "Opt Nominal (mm)": opt_dim.nom, "Opt Tol (mm)": opt_dim.tol}
+                        for (name, cur_dim), opt_dim in zip(analysis_spec.groove_dims(), opt_res.groove_dims.values())]
+            st.dataframe(pd.DataFrame(opt_rows).set_index("Dimension").style.format("{:.3f}"), use_container_width=True)
+
+            def apply_groove_optimum(opt_res=opt_res):
+                for name, dim in opt_res.groove_dims.items():
+                    st.session_state[f"{name}_nom"] = dim.nom
+                    st.session_state[f"{name}_tol"] = dim.tol
+                st.session_state["groove_opt_applied"] = {
+                    "dims": opt_res.groove_dims, "objective": opt_res.objective,
+                    "start_yield": opt_res.start_yield, "yield": opt_res.yield_combined, "n_samples": opt_res.n_samples,
+                }
+                st.session_state["opt_run"] = False
+
+            st.button("✅ 套用至溝槽輸入 (Apply)", on_click=apply_groove_optimum, use_container_width=True)
+
+    # 溝槽輸入仍為最佳化結果時，於報告註記
+    opt_applied = st.session_state.get("groove_opt_applied")
+    if opt_applied and opt_applied["dims"] != dict(analysis_spec.groove_dims()):
+        opt_applied = None
 
     # --- PDF 下載區 ---
     st.markdown("---")
@@ -648,19 +844,7 @@ if sim_oring_h_final is not None and sim_groove_depth is not None and sim_groove
     pdf_eng = p_col2.text_input("Engineer", "ME Team")
     pdf_title = st.text_input("Report Title", f"O-Ring Analysis - {comp_mode}")
 
-    try:
-        sercomm_logo_bytes = base64.b64decode(SERCOMM_LOGO_BASE64)
-    except:
-        sercomm_logo_bytes = None
-
-    # 自動備妥圖片
-    buf_hist_c = BytesIO()
-    fig_c.savefig(buf_hist_c, format="png", dpi=150, bbox_inches='tight', transparent=True)
-    buf_hist_c.seek(0)
-
-    buf_hist_f = BytesIO()
-    fig_f.savefig(buf_hist_f, format="png", dpi=150, bbox_inches='tight', transparent=True)
-    buf_hist_f.seek(0)
+    sercomm_logo_bytes = load_logo_bytes()
 
     # 資料
     all_inputs = oring_pdf_params + groove_pdf_params
@@ -671,24 +855,71 @@ if sim_oring_h_final is not None and sim_groove_depth is not None and sim_groove
     ]
     verdict_dict = {"yield": yield_combined, "ppm": ppm_combined}
 
-    # 自動計算
-    pdf_data = build_oring_pdf_report(
+    # 只在按下下載時才產生 PDF (cached_pdf_report 依輸入雜湊快取)
+    pdf_kwargs = dict(
         project_name=pdf_proj,
         engineer_name=pdf_eng,
         title=pdf_title,
         input_data=all_inputs,
         result_data=all_results,
         verdict_data=verdict_dict,
-        diagram_img_bytes=final_diagram_bytes,
-        hist_comp_bytes=buf_hist_c.getvalue(),
-        hist_fill_bytes=buf_hist_f.getvalue(),
-        sercomm_logo_bytes=sercomm_logo_bytes
+        diagram_img_bytes=None if schematic_geom else final_diagram_bytes,
+        diagram_geometry=schematic_geom,
+        hist_comp_bytes=hist_comp_bytes,
+        hist_fill_bytes=hist_fill_bytes,
+        sercomm_logo_bytes=sercomm_logo_bytes,
+        method="Monte Carlo" if engine_mode == ENGINE_MC else "Analytic Estimate",
+        seed=sim_result.seed if engine_mode == ENGINE_MC else None,
+        sampler=sim_result.sampler if engine_mode == ENGINE_MC else None,
+        sample_info={"samples": sim_result.sim_count, "ci": sim_result.yield_combined_ci,
+                     "stop_reason": sim_result.stop_reason} if engine_mode == ENGINE_MC else None,
+        optimization_info=opt_applied,
+        sensitivity_data=sens_rows,
+        sensitivity_img_bytes=sens_img_bytes,
     )
 
     st.download_button(
         label="📥 下載完整 PDF 報告 (Download Report)",
-        data=pdf_data,
+        data=lambda: cached_pdf_report(design_spec.digest(), **pdf_kwargs),
         file_name=f"O_Ring_Report_{comp_mode[:2]}.pdf",
         mime="application/pdf",
         use_container_width=True
     )
+
+# --- 歷史結果 (持久化結果儲存) ---
+with st.expander("🗄️ 歷史結果 (Result Store)"):
+    result_store = get_result_store()
+    if result_store is None:
+        st.info("結果儲存無法開啟，本次只使用行程內快取。")
+    elif (store_stats := store_call(result_store.stats)) is not None:
+        st.caption(f"{result_store.path}：{store_stats['runs']} 筆結果、{store_stats['pdfs']} 份 PDF，"
+                   f"{store_stats['bytes'] / 2**20:.1f} / {store_stats['max_bytes'] / 2**20:.0f} MiB (超過時依 LRU 刪除)。"
+                   "也可用 `python -m oring.store` 查詢。")
+        store_filters = {}
+        if st.checkbox("只顯示目前 O-Ring / 溝槽類型", key="store_filter"):
+            store_filters = {"oring_type": oring_type, "groove_type": groove_type}
+        store_rows = store_call(lambda: result_store.history(50, **store_filters), default=[])
+        if store_rows:
+            st.dataframe(pd.DataFrame([{
+                "設計": row["input_hash"], "樣本數": row["sim_count"], "Seed": row["seed"], "抽樣": row["sampler"],
+                "壓縮模式": row["comp_mode"], "O-Ring": row["oring_type"], "溝槽": row["groove_type"],
+                "平均壓縮率 (%)": row["mean_comp"], "平均填充率 (%)": row["mean_fill"],
+                "綜合良率 (%)": row["yield_combined"], "不良 (ppm)": row["ppm_combined"], "讀取次數": row["hits"],
+                "最後使用": pd.Timestamp(row["last_access"], unit="s"),
+            } for row in store_rows]).set_index("設計"), use_container_width=True)
+
+# --- 效能偵錯 (各階段計時) ---
+with st.expander("🐞 效能偵錯 (Stage Timing)"):
+    script_s = time.perf_counter() - script_t0
+    if stage_timer.records:
+        st.dataframe(pd.DataFrame([{
+            "階段": r.stage, "耗時 (ms)": r.wall_s * 1000, "樣本數": r.samples,
+            "樣本/秒": r.samples_per_s, "快取": r.cached,
+            "RSS 高水位 (MiB)": r.rss_peak_bytes / 2**20 if r.rss_peak_bytes else None,
+        } for r in stage_timer.records]).set_index("階段"), use_container_width=True)
+    st.caption(f"本次執行 {script_s * 1000:.0f} ms，其中已計時階段 {stage_timer.total_s * 1000:.0f} ms；"
+               f"engine.* 為引擎內部各階段 (快取命中時為原始計算的耗時) 或增量計算圖的節點 (沿用的節點為 0)。RSS 高水位為整個行程 (含其他 session) 的值。PDF 於下載時產生，只記錄於 JSONL。"
+               + (f" JSONL：{log_path()}" if log_path() else " 設定環境變數 ORING_TIMING_LOG 可將每次執行附加寫入 JSONL。"))
+stage_timer.write_jsonl(log_path(), event="rerun", design=design_spec.digest(),
+                        engine="mc" if engine_mode == ENGINE_MC else "analytic",
+                        script_s=time.perf_counter() - script_t0)
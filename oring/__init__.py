@@ -0,0 +1,26 @@
+"""O-Ring 設計計算核心 (不依賴 Streamlit)"""
+from .engine import (
+    AXIAL,
+    RADIAL,
+    STANDARD,
+    IRREGULAR,
+    RECTANGULAR,
+    TRAPEZOIDAL,
+    DimSpec,
+    DesignSpec,
+    SimResult,
+    Histogram,
+    STREAM_THRESHOLD,
+    CHUNK_SIZE,
+    DEFAULT_WORKERS,
+    ENGINE_STAGES,
+    generate_dim,
+    sample_ratios,
+    ratios_from_z,
+    oring_display_dims,
+    simulate,
+    simulate_adaptive,
+    run_simulation,
+)
+from .spec import MEMORY_STANDARD, MEMORY_LEAN, MEMORY_LEAN32, MEMORY_MODES
+from .sampling import SAMPLER_RANDOM, SAMPLER_LHS, SAMPLER_SOBOL, SAMPLER_IMPORTANCE, SAMPLERS
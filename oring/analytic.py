@@ -0,0 +1,240 @@
+"""
+解析快速估算 (Semi-analytic)
+
+壓縮率與填充率在「條件變數」上皆為單調：
+- 正壓 (Axial)：對溝槽高度 depth 單調
+- 側壓 (Radial)：對溝槽等效寬度 width_eff 單調
+
+因此固定其他尺寸後，合格區間可直接換算成條件變數的區間並以常態 CDF 求機率，
+其他尺寸再以 Gauss-Hermite 求積分。平均值 / 標準差則以全變數 Gauss-Hermite 計算。
+"""
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from .empirical import normal_approx
+from .spec import AXIAL, STANDARD, RECTANGULAR, DesignSpec
+from .timing import tracked_cache
+
+try:
+    from scipy.special import ndtr as _ndtr
+except ImportError:  # scipy 為選用套件
+    _ndtr = None
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+YIELD_NODES = 48   # 合格率積分 (外層變數) 節點數
+MOMENT_NODES = 24  # 平均 / 標準差積分節點數
+HIST_BINS = 50     # 直方圖目標 bin 數
+HIST_SPAN = 6.0    # 直方圖涵蓋 mean ± HIST_SPAN·sigma
+
+
+@dataclass(frozen=True)
+class AnalyticResult:
+    """解析估算結果 (欄位與 SimResult 的統計值一致)"""
+    mean_comp: float
+    std_comp: float
+    yield_comp: float
+    ppm_comp: float
+    mean_fill: float
+    std_fill: float
+    yield_fill: float
+    ppm_fill: float
+    yield_combined: float
+    ppm_combined: float
+    elapsed_s: float
+
+
+def _norm_cdf(x):
+    if _ndtr is not None:
+        return _ndtr(x)
+    return 0.5 * _erfc(-np.asarray(x, dtype=float) / math.sqrt(2)).astype(float)
+
+
+def _norm_prob(mu, sigma, lo, hi):
+    """P(lo <= X <= hi), X ~ N(mu, sigma)；sigma = 0 時退化為指示函數"""
+    lo, hi = np.broadcast_arrays(lo, hi)
+    if sigma == 0:
+        return ((lo <= mu) & (mu <= hi)).astype(float)
+    with np.errstate(invalid='ignore'):
+        p = _norm_cdf((hi - mu) / sigma) - _norm_cdf((lo - mu) / sigma)
+    return np.where(hi > lo, np.clip(p, 0.0, 1.0), 0.0)
+
+
+@lru_cache(maxsize=None)
+def _gh(n):
+    """機率學者 Hermite 節點，權重已正規化為 N(0, 1)"""
+    x, w = np.polynomial.hermite_e.hermegauss(n)
+    return x, w / math.sqrt(2 * math.pi)
+
+
+def _grid(variables, n):
+    """多個獨立常態變數 [(mu, sigma), ...] 的張量積節點 → (各變數節點列表, 權重)"""
+    axes = []; weights = []
+    for mu, sigma in variables:
+        if sigma == 0:
+            axes.append(np.array([mu], dtype=float)); weights.append(np.array([1.0]))
+        else:
+            x, w = _gh(n)
+            axes.append(mu + sigma * x); weights.append(w)
+    mesh = np.meshgrid(*axes, indexing='ij')
+    wmesh = np.meshgrid(*weights, indexing='ij')
+    return [m.ravel() for m in mesh], np.prod([w.ravel() for w in wmesh], axis=0)
+
+
+def _variables(spec: DesignSpec):
+    """(O-Ring 變數, depth 變數, width_eff 變數)，每個為 (mu, sigma)"""
+    if spec.oring_type == STANDARD:
+        oring_vars = [(spec.cs.nom, spec.cs.sigma)]
+    else:
+        oring_vars = [(spec.irr_h.nom, spec.irr_h.sigma), (spec.irr_area.nom, spec.irr_area.sigma)]
+    depth_var = (spec.g_depth.nom, spec.g_depth.sigma)
+    if spec.groove_type == RECTANGULAR:
+        width_var = (spec.g_width.nom, spec.g_width.sigma)
+    else:
+        # (W_top + W_btm) / 2 仍為常態
+        width_var = ((spec.g_wtop.nom + spec.g_wbtm.nom) / 2,
+                     math.hypot(spec.g_wtop.sigma, spec.g_wbtm.sigma) / 2)
+    return oring_vars, depth_var, width_var
+
+
+def _oring_final(spec: DesignSpec, oring_values):
+    """O-Ring 節點值 → 拉伸後 (h, w, area)"""
+    shrink_ratio = math.sqrt(1 / spec.stretch_factor)
+    if spec.oring_type == STANDARD:
+        cs = oring_values[0]
+        return cs * shrink_ratio, cs * shrink_ratio, np.pi * (cs / 2)**2 / spec.stretch_factor
+    h, area = oring_values
+    return h * shrink_ratio, area / h * shrink_ratio, area / spec.stretch_factor
+
+
+def _ratio_bounds(pct_min, pct_max):
+    """壓縮率 c% 合格 ⇔ groove/oring ∈ [1 - max/100, 1 - min/100]"""
+    return 1 - pct_max / 100.0, 1 - pct_min / 100.0
+
+
+def _inv_bounds(scale, pct_min, pct_max):
+    """填充率 f% = 100·scale / x 合格 ⇔ x ∈ [100·scale / max, 100·scale / min]"""
+    lo = 100.0 * scale / pct_max if pct_max > 0 else np.full_like(scale, np.inf)
+    hi = 100.0 * scale / pct_min if pct_min > 0 else np.full_like(scale, np.inf)
+    return lo, hi
+
+
+def _yields(spec: DesignSpec):
+    oring_vars, depth_var, width_var = _variables(spec)
+    axial = spec.comp_mode == AXIAL
+    # 條件變數：正壓 → depth；側壓 → width_eff
+    cond_var, other_var = (depth_var, width_var) if axial else (width_var, depth_var)
+    nodes, weights = _grid(oring_vars + [other_var], YIELD_NODES)
+    oring_h, oring_w, oring_area = _oring_final(spec, nodes[:-1])
+    other = nodes[-1]
+
+    r_lo, r_hi = _ratio_bounds(spec.target_comp_min, spec.target_comp_max)
+    oring_comp = oring_h if axial else oring_w
+    comp_lo, comp_hi = oring_comp * r_lo, oring_comp * r_hi
+    with np.errstate(divide='ignore'):
+        fill_lo, fill_hi = _inv_bounds(oring_area / other, spec.target_fill_min, spec.target_fill_max)
+
+    mu, sigma = cond_var
+    p_comp = _norm_prob(mu, sigma, comp_lo, comp_hi)
+    p_fill = _norm_prob(mu, sigma, fill_lo, fill_hi)
+    p_both = _norm_prob(mu, sigma, np.maximum(comp_lo, fill_lo), np.minimum(comp_hi, fill_hi))
+    return (float(weights @ p_comp) * 100, float(weights @ p_fill) * 100, float(weights @ p_both) * 100)
+
+
+def _moments(spec: DesignSpec):
+    oring_vars, depth_var, width_var = _variables(spec)
+    nodes, weights = _grid(oring_vars + [depth_var, width_var], MOMENT_NODES)
+    oring_h, oring_w, oring_area = _oring_final(spec, nodes[:-2])
+    depth, width = nodes[-2], nodes[-1]
+    if spec.comp_mode == AXIAL:
+        comp = (oring_h - depth) / oring_h * 100
+    else:
+        comp = (oring_w - width) / oring_w * 100
+    fill = oring_area / (depth * width) * 100
+    out = []
+    for v in (comp, fill):
+        mean = float(weights @ v)
+        out.append((mean, math.sqrt(max(float(weights @ (v - mean)**2), 0.0))))
+    return out
+
+
+def estimate(spec: DesignSpec) -> AnalyticResult:
+    """解析估算 mean / sigma / yield / PPM (毫秒級，不抽樣)；實測尺寸以動差配對的常態近似"""
+    if not spec.has_oring:
+        raise ValueError("O-Ring 尺寸必須大於 0")
+    spec = normal_approx(spec)
+    t0 = time.perf_counter()
+    yield_comp, yield_fill, yield_combined = _yields(spec)
+    (mean_comp, std_comp), (mean_fill, std_fill) = _moments(spec)
+    return AnalyticResult(
+        mean_comp=mean_comp,
+        std_comp=std_comp,
+        yield_comp=yield_comp,
+        ppm_comp=(100 - yield_comp) * 10000,
+        mean_fill=mean_fill,
+        std_fill=std_fill,
+        yield_fill=yield_fill,
+        ppm_fill=(100 - yield_fill) * 10000,
+        yield_combined=yield_combined,
+        ppm_combined=(100 - yield_combined) * 10000,
+        elapsed_s=time.perf_counter() - t0,
+    )
+
+
+def _edges(mean, std, t_min, t_max, bins=HIST_BINS):
+    """
+    固定 bin 邊界：涵蓋 mean ± 6σ，且目標上下限恰好落在 bin 邊界上，
+    因此合格數可由 bin counts 精確加總，不同批次的 counts 也可直接相加。
+    """
+    lo, hi = mean - HIST_SPAN * std, mean + HIST_SPAN * std
+    window = t_max - t_min
+    if std <= 0 or window <= 0:
+        lo, hi = min(lo, t_min) - 1.0, max(hi, t_max) + 1.0
+        return np.linspace(lo, hi, bins + 1)
+    width = window / max(1, round(window / ((hi - lo) / bins)))
+    k_lo = math.floor((lo - t_min) / width)
+    k_hi = math.ceil((hi - t_min) / width)
+    if k_hi - k_lo > 4 * bins:  # 目標區間遠小於分佈寬度 → 不強制對齊
+        return np.linspace(lo, hi, bins + 1)
+    return t_min + width * np.arange(k_lo, k_hi + 1)
+
+
+@lru_cache(maxsize=64)
+def histogram_edges(spec: DesignSpec):
+    """壓縮率 / 填充率直方圖的固定 bin 邊界 (由解析動差與目標區間決定，與樣本無關)"""
+    (mean_comp, std_comp), (mean_fill, std_fill) = _moments(normal_approx(spec))
+    edges_comp = _edges(mean_comp, std_comp, spec.target_comp_min, spec.target_comp_max)
+    edges_fill = _edges(mean_fill, std_fill, spec.target_fill_min, spec.target_fill_max)
+    edges_comp.flags.writeable = False
+    edges_fill.flags.writeable = False
+    return edges_comp, edges_fill
+
+
+@tracked_cache(maxsize=64)
+def run_estimate(spec: DesignSpec) -> AnalyticResult:
+    """以 DesignSpec 為 key 的快取入口"""
+    return estimate(spec)
+
+
+def compare_with_mc(analytic: AnalyticResult, mc):
+    """
+    解析值與蒙地卡羅結果的誤差表 (list of dicts)
+
+    mc_ci95 為 MC 良率的 95% 信賴區間半寬 (%)，誤差小於此值即屬抽樣雜訊範圍。
+    """
+    rows = []
+    for label, key in (("Compression Mean (%)", "mean_comp"), ("Compression Sigma (%)", "std_comp"),
+                       ("Fill Mean (%)", "mean_fill"), ("Fill Sigma (%)", "std_fill"),
+                       ("Compression Yield (%)", "yield_comp"), ("Fill Yield (%)", "yield_fill"),
+                       ("Combined Yield (%)", "yield_combined")):
+        a = getattr(analytic, key); m = getattr(mc, key)
+        row = {"metric": label, "analytic": a, "monte_carlo": m, "abs_error": abs(a - m), "mc_ci95": None}
+        if key.startswith("yield"):
+            p = m / 100
+            row["mc_ci95"] = 196 * math.sqrt(max(p * (1 - p), 0.0) / max(mc.sim_count, 1))
+        rows.append(row)
+    return rows
@@ -0,0 +1,256 @@
+"""
+批次計算 (Batch CLI)：由 CSV / Excel 設計表一次計算多個設計，不載入 Streamlit
+
+    python -m oring.batch designs.csv -o results.csv
+    python -m oring.batch designs.xlsx -o results.parquet --engine analytic --workers 8
+    python -m oring.batch designs.csv -o results.csv --report review.pdf   # 另輸出彙整 PDF 報告
+
+設計表每列一個設計，欄位名稱同 DesignSpec：
+- design_id (選用，預設為列號)
+- comp_mode / oring_type / groove_type：可填完整選項字串或 axial / radial、standard / irregular、
+  rectangular / trapezoidal
+- 尺寸：cs, cs_tol, cs_cpk, irr_h, irr_area, g_depth, g_width, g_wtop, g_wbtm (各自的 _tol / _cpk)
+- stretch_pct, target_comp_min/max, target_fill_min/max, sim_count, seed, sampler, ci_width_ppm, max_seconds,
+  memory_mode (standard / lean / lean32)
+- measurements (選用)：實測資料 CSV / Excel 路徑，多個以 ; 分隔 (見 oring.empirical；同一檔案只解析一次)
+缺少的欄位或空白儲存格沿用 DesignSpec 預設值。
+
+續跑：每完成一個設計即附加寫入 <output>.partial.csv；中斷後以相同指令重新執行，
+design_id、輸入雜湊 (DesignSpec.digest) 與引擎皆相同的設計會直接沿用，輸入有變更者重新計算。
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+
+import pandas as pd
+
+from .analytic import estimate
+from .empirical import ingest
+from .engine import simulate, simulate_adaptive
+from .spec import AXIAL, RADIAL, STANDARD, IRREGULAR, RECTANGULAR, TRAPEZOIDAL, MEMORY_MODES, DesignSpec, DimSpec
+
+ENGINE_MC = "mc"
+ENGINE_ANALYTIC = "analytic"
+DEFAULT_SEED = 20240114
+
+CHOICES = {
+    "comp_mode": (AXIAL, RADIAL),
+    "oring_type": (STANDARD, IRREGULAR),
+    "groove_type": (RECTANGULAR, TRAPEZOIDAL),
+}
+STAT_COLUMNS = [
+    "mean_comp", "std_comp", "yield_comp", "ppm_comp",
+    "mean_fill", "std_fill", "yield_fill", "ppm_fill",
+    "yield_combined", "ppm_combined",
+]
+RESULT_COLUMNS = ["design_id", "input_hash", "status", "error", "engine", "sim_count", "seed"] + STAT_COLUMNS + ["elapsed_s"]
+_DIM_FIELDS = [f.name for f in fields(DesignSpec) if f.type is DimSpec]
+_INT_FIELDS = ("sim_count", "seed")
+
+
+def _blank(value):
+    return value is None or (isinstance(value, float) and math.isnan(value)) or (isinstance(value, str) and not value.strip())
+
+
+def _choice(field, value):
+    """完整選項字串或英文關鍵字 (不分大小寫) → 選項常數"""
+    text = str(value).strip()
+    for option in CHOICES[field]:
+        if text == option or text.lower() == option.split("(")[-1].rstrip(")").lower():
+            return option
+    raise ValueError(f"{field} 無法辨識: {value!r}")
+
+
+def spec_from_row(row, defaults=None) -> DesignSpec:
+    """設計表的一列 (dict) → DesignSpec；空白欄位沿用 defaults (DesignSpec 預設值)"""
+    base = defaults or DesignSpec()
+    kwargs = {}
+    for f in fields(DesignSpec):
+        name = f.name
+        if name in _DIM_FIELDS:
+            dim = getattr(base, name)
+            nom, tol, cpk = (row.get(name), row.get(f"{name}_tol"), row.get(f"{name}_cpk"))
+            kwargs[name] = DimSpec(dim.nom if _blank(nom) else float(nom),
+                                   dim.tol if _blank(tol) else float(tol),
+                                   dim.cpk if _blank(cpk) else float(cpk))
+        elif _blank(row.get(name)):
+            kwargs[name] = getattr(base, name)
+        elif name in CHOICES:
+            kwargs[name] = _choice(name, row[name])
+        elif name in _INT_FIELDS:
+            kwargs[name] = int(row[name])
+        elif name in ("sampler", "memory_mode"):
+            kwargs[name] = str(row[name]).strip()
+        elif name == "measurements":
+            kwargs[name] = tuple(ingest(path.strip()) for path in str(row[name]).split(";") if path.strip())
+        else:
+            kwargs[name] = float(row[name])
+    return DesignSpec(**kwargs)
+
+
+def compute(spec: DesignSpec, engine=ENGINE_MC):
+    """以指定引擎計算單一設計 (蒙地卡羅為串流模式，只保留直方圖)"""
+    if engine == ENGINE_ANALYTIC:
+        return estimate(spec)
+    return simulate_adaptive(spec) if spec.ci_width_ppm else simulate(spec, keep_samples=False)
+
+
+def evaluate_design(design_id, spec: DesignSpec, engine=ENGINE_MC, keep_result=False):
+    """
+    單一設計 → 結果列 (dict)；在 worker 行程中執行，失敗時回傳 status = error
+    keep_result=True 時另以 "result" 回傳結果物件 (含直方圖，供彙整報告使用)
+    """
+    t0 = time.perf_counter()
+    row = {"design_id": design_id, "input_hash": spec.digest(), "engine": engine, "status": "ok", "error": ""}
+    try:
+        res = compute(spec, engine)
+        if keep_result:
+            row["result"] = res
+        if engine == ENGINE_ANALYTIC:
+            row.update(sim_count=0, seed=None)
+        else:
+            row.update(sim_count=res.sim_count, seed=res.seed)
+        for key in STAT_COLUMNS:
+            row[key] = getattr(res, key)
+    except Exception as e:  # 單一設計錯誤不中斷整批
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+    row["elapsed_s"] = time.perf_counter() - t0
+    return row
+
+
+def read_designs(path):
+    """CSV / Excel 設計表 → DataFrame (Excel 需要 openpyxl)"""
+    if str(path).lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(path)
+    return pd.read_csv(path)
+
+
+def _partial_path(output):
+    return f"{output}.partial.csv"
+
+
+def _load_done(output):
+    """已完成的結果 (前次完整輸出 + 中斷留下的 partial) → {(design_id, input_hash, engine): row}"""
+    done = {}
+    for path in (output, _partial_path(output)):
+        if not os.path.exists(path):
+            continue
+        prev = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path, dtype={"design_id": str, "input_hash": str})
+        for row in prev.to_dict("records"):
+            if row.get("status") == "ok":
+                done[(str(row["design_id"]), row["input_hash"], row["engine"])] = row
+    return done
+
+
+def _write_output(df, output):
+    if output.lower().endswith(".parquet"):
+        df.to_parquet(output, index=False)  # 需要 pyarrow 或 fastparquet
+    else:
+        df.to_csv(output, index=False)
+
+
+def design_specs(designs: pd.DataFrame, defaults=None):
+    """
+    設計表 → [(design_id, DesignSpec 或輸入錯誤訊息)]，依輸入順序
+    design_id 空白時以列號代替，不可重複。
+    """
+    records = designs.to_dict("records")
+    ids = [str(r["design_id"]) if not _blank(r.get("design_id")) else str(i + 1) for i, r in enumerate(records)]
+    if len(set(ids)) != len(ids):
+        raise ValueError("design_id 不可重複")
+    items = []
+    for design_id, record in zip(ids, records):
+        try:
+            items.append((design_id, spec_from_row(record, defaults)))
+        except (ValueError, TypeError, OSError) as e:
+            items.append((design_id, f"輸入錯誤: {e}"))
+    return items
+
+
+def run_batch(designs: pd.DataFrame, output, engine=ENGINE_MC, workers=None, defaults=None, progress=None,
+              results_out=None):
+    """
+    計算設計表並寫出結果 (依輸入順序)；回傳結果 DataFrame
+
+    每個設計在獨立行程中以單執行緒計算 (串流模式，記憶體固定)，行程數預設為 CPU 核心數。
+    results_out (dict) 不為 None 時，本次實際計算的設計另存 {design_id: 結果物件} (續跑沿用者不含)。
+    """
+    items = design_specs(designs, defaults)
+    ids = [design_id for design_id, _ in items]
+
+    results = {}; pending = []
+    done = _load_done(output)
+    for design_id, spec in items:
+        if isinstance(spec, str):
+            results[design_id] = {"design_id": design_id, "status": "error", "error": spec}
+            continue
+        prev = done.get((design_id, spec.digest(), engine))
+        if prev is not None:
+            results[design_id] = prev
+        else:
+            pending.append((design_id, spec))
+
+    partial = _partial_path(output)
+    write_header = not os.path.exists(partial)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(evaluate_design, design_id, spec, engine, results_out is not None)
+                   for design_id, spec in pending]
+        for k, fut in enumerate(as_completed(futures), 1):
+            row = fut.result()
+            if "result" in row:
+                results_out[row["design_id"]] = row.pop("result")
+            results[row["design_id"]] = row
+            # 逐筆附加寫入，中斷後可續跑
+            pd.DataFrame([row], columns=RESULT_COLUMNS).to_csv(partial, mode="a", header=write_header, index=False)
+            write_header = False
+            if progress:
+                progress(k, len(pending), row)
+
+    df = pd.DataFrame([results[i] for i in ids], columns=RESULT_COLUMNS)
+    # 空值 (解析引擎 / 錯誤列) 會讓整欄變成 float；seed 可能超過 int64，保留為 Python int
+    df["sim_count"] = df["sim_count"].astype("Int64")
+    df["seed"] = pd.Series([None if _blank(results[i].get("seed")) else int(results[i]["seed"]) for i in ids], dtype=object)
+    _write_output(df, output)
+    if os.path.exists(partial):
+        os.remove(partial)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m oring.batch", description="O-Ring 設計批次計算 (CSV / Excel → CSV / Parquet)")
+    parser.add_argument("designs", help="設計表 (.csv / .xlsx)")
+    parser.add_argument("-o", "--output", required=True, help="結果檔 (.csv / .parquet)")
+    parser.add_argument("--engine", choices=(ENGINE_MC, ENGINE_ANALYTIC), default=ENGINE_MC)
+    parser.add_argument("--workers", type=int, default=None, help="行程數 (預設 = CPU 核心數)")
+    parser.add_argument("--sim-count", type=int, default=DesignSpec.sim_count, help="設計表未指定時的模擬次數")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="設計表未指定時的隨機種子 (固定 → 可重現、可續跑)")
+    parser.add_argument("--sampler", default=DesignSpec.sampler)
+    parser.add_argument("--memory-mode", choices=MEMORY_MODES, default=DesignSpec.memory_mode,
+                        help="設計表未指定時的記憶體模式 (lean / lean32 降低每個行程的記憶體峰值)")
+    parser.add_argument("--report", default=None, help="另輸出多設計彙整 PDF 報告 (同 python -m oring.report)")
+    args = parser.parse_args(argv)
+
+    defaults = DesignSpec(sim_count=args.sim_count, seed=args.seed, sampler=args.sampler, memory_mode=args.memory_mode)
+    designs = read_designs(args.designs)
+    t0 = time.perf_counter()
+
+    def progress(k, total, row):
+        status = f"{row['ppm_combined']:.0f} ppm" if row["status"] == "ok" else row["error"]
+        print(f"[{k}/{total}] {row['design_id']}: {status}", file=sys.stderr)
+
+    computed = {} if args.report else None
+    df = run_batch(designs, args.output, args.engine, args.workers, defaults, progress, results_out=computed)
+    if args.report:
+        from .report import build_batch_report  # 只有需要報告時才載入 ReportLab / matplotlib
+        build_batch_report(design_specs(designs, defaults), args.report, args.engine, args.workers, results=computed)
+    n_err = int((df["status"] != "ok").sum())
+    print(f"{len(df)} designs → {args.output} ({n_err} errors, {time.perf_counter() - t0:.1f} s)", file=sys.stderr)
+    return 1 if n_err else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
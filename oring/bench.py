@@ -0,0 +1,266 @@
+"""
+效能基準 (Benchmark)：不經 Streamlit 量測壓縮率 / 填充率 / 良率流程的延遲、吞吐量與記憶體峰值
+
+    python -m oring.bench -o bench.json                                   # quick：1e4 / 1e5 / 1e6 樣本
+    python -m oring.bench --preset full -o bench.json                     # 1e4 – 1e8 樣本 (耗時)
+    python -m oring.bench --save-baseline benchmarks/baseline.json        # 在本機產生基準 (benchmarks/ 不納入版控)
+    python -m oring.bench -o bench.json --baseline benchmarks/baseline.json   # 與基準比較，退步時結束碼為 1
+
+代表性設計 (design_cases)：標準 / 異形 O-Ring × 矩形 / 梯形溝槽 × 軸向 / 徑向 × 無 / 有拉伸，共 16 種。
+執行模式 (MODES)：記憶體內 (保留樣本)、串流、省記憶體 (lean / lean32)、多執行緒、多行程、
+LHS / Sobol / 重要性抽樣 (串流) 與解析估算 (與樣本數無關，每個設計只量一次)。
+記憶體內模式只在 STREAM_THRESHOLD 以下執行 (保留樣本的建議上限)，其餘標記為 skipped。
+
+- 延遲：重複 repeat 次取中位數與最小值 (≥ 1e7 樣本只跑一次)；吞吐量 = 樣本數 / 中位數
+- 記憶體峰值：另跑一次並以 tracemalloc 量測本行程的配置峰值；多行程模式的 worker 不在量測範圍內 (記為 None)
+- 基準比較：同 (design, mode, samples) 的最小延遲比基準慢超過 tolerance，或記憶體峰值高出超過 tolerance
+  即視為退步 (退步的 case 先重跑確認，見 recheck)；基準與機器相關，請在同一台機器上產生與比較，不要提交到版控
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+
+import numpy as np
+
+from .analytic import estimate
+from .engine import DEFAULT_WORKERS, STREAM_THRESHOLD, simulate
+from .sampling import SAMPLER_IMPORTANCE, SAMPLER_LHS, SAMPLER_SOBOL
+from .spec import (
+    AXIAL, RADIAL, STANDARD, IRREGULAR, RECTANGULAR, TRAPEZOIDAL, MEMORY_LEAN, MEMORY_LEAN32, DesignSpec,
+)
+
+BENCH_SEED = 20240114
+STRETCH_PCT = 3.0
+PRESETS = {
+    "quick": (10**4, 10**5, 10**6),
+    "full": (10**4, 10**5, 10**6, 10**7, 10**8),
+}
+SINGLE_RUN_SIZE = 10**7   # 此樣本數以上只跑一次
+TOLERANCE = 0.2
+MIN_DELTA_S = 0.005       # 延遲差小於此值不判定退步 (小樣本數的計時雜訊)
+MIN_DELTA_BYTES = 1 << 20
+MODE_ANALYTIC = "analytic"
+PARALLEL_WORKERS = max(2, DEFAULT_WORKERS)
+
+# 模式名稱 → (DesignSpec 覆寫欄位, simulate 參數)
+MODES = {
+    "in_memory": ({}, {"keep_samples": True}),
+    "stream": ({}, {"keep_samples": False}),
+    "stream_lean": ({"memory_mode": MEMORY_LEAN}, {"keep_samples": False}),
+    "stream_lean32": ({"memory_mode": MEMORY_LEAN32}, {"keep_samples": False}),
+    "threads": ({}, {"keep_samples": False, "workers": PARALLEL_WORKERS, "executor": "thread"}),
+    "processes": ({}, {"keep_samples": False, "workers": PARALLEL_WORKERS, "executor": "process"}),
+    "lhs": ({"sampler": SAMPLER_LHS}, {"keep_samples": False}),
+    "sobol": ({"sampler": SAMPLER_SOBOL}, {"keep_samples": False}),
+    "importance": ({"sampler": SAMPLER_IMPORTANCE}, {"keep_samples": False}),
+    MODE_ANALYTIC: None,
+}
+
+
+def design_cases():
+    """代表性設計 {名稱: DesignSpec}，例如 std-rect-axial、irr-trap-radial-stretch"""
+    cases = {}
+    for oring_type, o in ((STANDARD, "std"), (IRREGULAR, "irr")):
+        for groove_type, g in ((RECTANGULAR, "rect"), (TRAPEZOIDAL, "trap")):
+            for comp_mode, m in ((AXIAL, "axial"), (RADIAL, "radial")):
+                for stretch_pct, s in ((0.0, ""), (STRETCH_PCT, "-stretch")):
+                    cases[f"{o}-{g}-{m}{s}"] = DesignSpec(comp_mode=comp_mode, oring_type=oring_type,
+                                                         groove_type=groove_type, stretch_pct=stretch_pct,
+                                                         seed=BENCH_SEED)
+    return cases
+
+
+def _run(spec: DesignSpec, mode):
+    if MODES[mode] is None:
+        return estimate(spec)
+    overrides, kwargs = MODES[mode]
+    return simulate(replace(spec, **overrides), **kwargs)
+
+
+def _traced_peak(spec, mode):
+    """單次執行的 tracemalloc 配置峰值 (bytes)"""
+    tracemalloc.start()
+    try:
+        _run(spec, mode)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(design, spec: DesignSpec, mode, samples, repeat=3, measure_memory=True):
+    """單一 (設計, 模式, 樣本數) → 結果列 (dict)"""
+    row = {"design": design, "mode": mode, "samples": samples if mode != MODE_ANALYTIC else None,
+           "workers": MODES[mode][1].get("workers", 1) if MODES[mode] else 1,
+           "status": "ok", "wall_s": None, "min_s": None, "samples_per_s": None, "peak_bytes": None, "repeat": 0}
+    if mode == "in_memory" and samples > STREAM_THRESHOLD:
+        row["status"] = "skipped"
+        return row
+    spec = replace(spec, sim_count=samples)
+    n = 1 if samples >= SINGLE_RUN_SIZE else repeat
+    try:
+        times = []
+        for _ in range(n):
+            t0 = time.perf_counter()
+            _run(spec, mode)
+            times.append(time.perf_counter() - t0)
+        wall = statistics.median(times)
+        row.update(wall_s=wall, min_s=min(times), repeat=n)
+        if mode != MODE_ANALYTIC:
+            row["samples_per_s"] = samples / wall
+        in_process = MODES[mode] is None or MODES[mode][1].get("executor") != "process"
+        if measure_memory and in_process:
+            row["peak_bytes"] = _traced_peak(spec, mode)
+    except Exception as e:  # 單一 case 錯誤不中斷整個基準
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+    return row
+
+
+def run_benchmark(sizes=PRESETS["quick"], designs=None, modes=None, repeat=3, measure_memory=True, progress=None):
+    """執行所有 (設計, 模式, 樣本數) 組合；解析模式每個設計只量一次 (以最小樣本數記錄)"""
+    cases = design_cases()
+    designs = designs or list(cases)
+    modes = modes or list(MODES)
+    jobs = [(d, m, n) for d in designs for m in modes for n in (sizes[:1] if m == MODE_ANALYTIC else sizes)]
+    results = []
+    for k, (design, mode, samples) in enumerate(jobs, 1):
+        row = run_case(design, cases[design], mode, samples, repeat, measure_memory)
+        results.append(row)
+        if progress:
+            progress(k, len(jobs), row)
+    return results
+
+
+def environment():
+    """基準執行環境 (比較時確認是否為同一台機器 / 同版本套件)"""
+    try:
+        import scipy
+        scipy_version = scipy.__version__
+    except ImportError:
+        scipy_version = None
+    return {"python": platform.python_version(), "numpy": np.__version__, "scipy": scipy_version,
+            "platform": platform.platform(), "machine": platform.machine(), "cpu_count": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+
+
+def _key(row):
+    return row["design"], row["mode"], row["samples"]
+
+
+def _best(row, field):
+    """量測值與重跑值 (recheck_<field>) 中較佳 (較小) 者"""
+    values = [v for v in (row.get(field), row.get(f"recheck_{field}")) if v is not None]
+    return min(values) if values else None
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """與基準比較 (有重跑時取較佳值) → 退步清單 [(結果列, 基準列, 說明)]"""
+    base = {_key(r): r for r in baseline["results"] if r["status"] == "ok"}
+    regressions = []
+    for row in results:
+        ref = base.get(_key(row))
+        if ref is None or row["status"] != "ok":
+            continue
+        min_s = _best(row, "min_s")
+        if min_s > ref["min_s"] * (1 + tolerance) and min_s - ref["min_s"] > MIN_DELTA_S:
+            regressions.append((row, ref, f"latency {ref['min_s'] * 1000:.1f} → {min_s * 1000:.1f} ms"))
+        peak = _best(row, "peak_bytes")
+        if (peak is not None and ref["peak_bytes"] is not None
+                and peak > ref["peak_bytes"] * (1 + tolerance) and peak - ref["peak_bytes"] > MIN_DELTA_BYTES):
+            regressions.append((row, ref, f"peak {ref['peak_bytes'] / 2**20:.1f} → {peak / 2**20:.1f} MiB"))
+    return regressions
+
+
+def recheck(results, baseline, tolerance=TOLERANCE, rounds=2, repeat=3, measure_memory=True, progress=None):
+    """
+    退步的 case 重跑 rounds 輪 (每輪 repeat 次) 後重新比較；共用主機上計時常有 ±30% 的雙峰雜訊，單次變慢不算退步。
+    原始量測 (wall_s / min_s / samples_per_s / peak_bytes) 不變，重跑的最佳值另記於
+    recheck_min_s / recheck_wall_s / recheck_peak_bytes，重跑輪數記於 rechecks
+    """
+    cases = design_cases()
+    regressions = compare(results, baseline, tolerance)
+    for _ in range(rounds):
+        flagged = {id(row): row for row, _, _ in regressions}
+        if not flagged:
+            break
+        for k, row in enumerate(flagged.values(), 1):
+            again = run_case(row["design"], cases[row["design"]], row["mode"], row["samples"] or PRESETS["quick"][0],
+                             repeat, measure_memory)
+            row["rechecks"] = row.get("rechecks", 0) + 1
+            if again["status"] == "ok":
+                for field in ("min_s", "wall_s", "peak_bytes"):
+                    if again[field] is not None:
+                        previous = row.get(f"recheck_{field}")
+                        row[f"recheck_{field}"] = again[field] if previous is None else min(previous, again[field])
+            if progress:
+                progress(k, len(flagged), again)
+        regressions = compare(results, baseline, tolerance)
+    return regressions
+
+
+def _parse_sizes(text):
+    return tuple(int(float(s)) for s in text.split(","))
+
+
+def _case_label(row):
+    samples = f"{row['samples']:.0e}" if row["samples"] else "-"
+    return f"{row['design']} / {row['mode']} / {samples}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m oring.bench", description="O-Ring 模擬效能基準")
+    parser.add_argument("-o", "--output", default=None, help="結果 JSON 檔")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--sizes", type=_parse_sizes, default=None, help="樣本數 (逗號分隔，例如 1e4,1e6；覆寫 preset)")
+    parser.add_argument("--designs", default=None, help="設計名稱 (逗號分隔，預設全部；見 design_cases)")
+    parser.add_argument("--modes", default=None, help=f"執行模式 (逗號分隔，預設全部：{','.join(MODES)})")
+    parser.add_argument("--repeat", type=int, default=3, help=f"重複次數 (≥ {SINGLE_RUN_SIZE:.0e} 樣本只跑一次)")
+    parser.add_argument("--no-memory", action="store_true", help="不量測記憶體峰值 (省下每個 case 一次額外執行)")
+    parser.add_argument("--baseline", default=None, help="基準 JSON 檔；有退步時結束碼為 1")
+    parser.add_argument("--save-baseline", default=None, help="將本次結果寫為基準")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="容許的相對退步 (預設 0.2 = 20%%)")
+    parser.add_argument("--recheck", type=int, default=2, help="退步的 case 重跑輪數 (取最佳值，排除計時雜訊)")
+    args = parser.parse_args(argv)
+
+    designs = args.designs.split(",") if args.designs else None
+    modes = args.modes.split(",") if args.modes else None
+    unknown = sorted(set(designs or []) - set(design_cases())) + sorted(set(modes or []) - set(MODES))
+    if unknown:
+        parser.error(f"未知的設計 / 模式: {', '.join(unknown)}")
+
+    def progress(k, total, row):
+        if row["status"] == "ok":
+            rate = f"{row['samples_per_s'] / 1e6:.2f} M/s" if row["samples_per_s"] else ""
+            peak = f"{row['peak_bytes'] / 2**20:.1f} MiB" if row["peak_bytes"] is not None else ""
+            status = f"{row['wall_s'] * 1000:.1f} ms {rate} {peak}"
+        else:
+            status = row.get("error", row["status"])
+        print(f"[{k}/{total}] {_case_label(row)}: {status}", file=sys.stderr)
+
+    results = run_benchmark(args.sizes or PRESETS[args.preset], designs, modes, args.repeat,
+                            not args.no_memory, progress)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = recheck(results, baseline, args.tolerance, args.recheck, args.repeat, not args.no_memory, progress)
+        for row, _, reason in regressions:
+            print(f"REGRESSION {_case_label(row)}: {reason}", file=sys.stderr)
+        print(f"{len(results)} cases vs {args.baseline}: {len(regressions)} regressions", file=sys.stderr)
+
+    report = {"environment": environment(), "preset": None if args.sizes else args.preset, "results": results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=1)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+標準 O-Ring 線徑目錄 (AS568 / ISO 3601 / JIS B2401) 與選型排序
+
+目錄 (data/oring_catalog.csv) 於第一次使用時載入，依線徑排序成 numpy 陣列；
+每列為一個線徑系列 (同系列各內徑尺寸的線徑與公差相同，本模型的壓縮率 / 填充率只與截面有關)。
+公差取自各標準的一般等級，正式選型前請以供應商規格書確認。
+
+rank_cross_sections 對目錄中每個線徑套用目前的溝槽 / 模式 / 拉伸 / 目標區間計算綜合良率：
+- analytic : 解析估算，每個線徑約 1–3 ms
+- mc       : 以共用樣本一次批次計算所有線徑 (同 sweep.batch_yields)
+"""
+import csv
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from importlib import resources
+
+import numpy as np
+
+from .analytic import estimate
+from .engine import ratios_from_values
+from .optimize import _centering
+from .spec import STANDARD, DesignSpec, DimSpec
+from .sweep import SWEEP_SAMPLES, batch_yields, common_normals
+
+CATALOG_FILE = "oring_catalog.csv"
+STANDARDS = ("AS568", "ISO 3601", "JIS B2401")
+METHOD_ANALYTIC = "analytic"
+METHOD_MC = "mc"
+TOP_N = 10
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """依線徑排序的目錄 (各欄為等長 numpy 陣列)"""
+    standard: np.ndarray
+    series: np.ndarray
+    sizes: np.ndarray
+    cs: np.ndarray
+    tol: np.ndarray
+
+    def __len__(self):
+        return len(self.cs)
+
+    def subset(self, standards=None) -> "Catalog":
+        if not standards:
+            return self
+        mask = np.isin(self.standard, list(standards))
+        return Catalog(*(getattr(self, f)[mask] for f in ("standard", "series", "sizes", "cs", "tol")))
+
+
+@lru_cache(maxsize=1)
+def load_catalog() -> Catalog:
+    """載入內建目錄 (只在第一次呼叫時讀檔)"""
+    with resources.files(__package__).joinpath("data", CATALOG_FILE).open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    order = np.argsort([float(r["cs_mm"]) for r in rows], kind="stable")
+    rows = [rows[i] for i in order]
+    catalog = Catalog(
+        standard=np.array([r["standard"] for r in rows]),
+        series=np.array([r["series"] for r in rows]),
+        sizes=np.array([r["sizes"] for r in rows]),
+        cs=np.array([float(r["cs_mm"]) for r in rows]),
+        tol=np.array([float(r["tol_mm"]) for r in rows]),
+    )
+    for arr in (catalog.standard, catalog.series, catalog.sizes, catalog.cs, catalog.tol):
+        arr.flags.writeable = False
+    return catalog
+
+
+@dataclass(frozen=True)
+class CatalogFit:
+    standard: str
+    series: str
+    sizes: str
+    cs: float
+    tol: float
+    nominal_comp: float    # 公稱尺寸下的壓縮率 (%)
+    nominal_fill: float    # 公稱尺寸下的填充率 (%)
+    yield_comp: float
+    yield_fill: float
+    yield_combined: float
+
+    @property
+    def ppm_combined(self):
+        return (100 - self.yield_combined) * 10000
+
+
+def rank_cross_sections(spec: DesignSpec, standards=None, top=TOP_N, method=METHOD_ANALYTIC,
+                        n_samples=SWEEP_SAMPLES):
+    """
+    以 spec 的溝槽 / 模式 / 拉伸 / 目標區間評估目錄中每個線徑，依綜合良率由高到低回傳前 top 筆
+    (同分時取公稱壓縮率 / 填充率最接近目標區間中心者)；線徑 Cpk 沿用 spec.cs.cpk。
+    """
+    catalog = load_catalog().subset(standards)
+    if len(catalog) == 0:
+        return []
+    base = replace(spec, oring_type=STANDARD)
+    cpk = spec.cs.cpk
+    cs_noms = {"cs": catalog.cs}
+
+    if method == METHOD_ANALYTIC:
+        results = [estimate(replace(base, cs=DimSpec(float(cs), float(tol), cpk)))
+                   for cs, tol in zip(catalog.cs, catalog.tol)]
+        yield_comp = np.array([r.yield_comp for r in results])
+        yield_fill = np.array([r.yield_fill for r in results])
+        yield_combined = np.array([r.yield_combined for r in results])
+    elif method == METHOD_MC:
+        sigmas = {"cs": catalog.tol / (3 * cpk) if cpk > 0 else np.zeros(len(catalog))}
+        z = common_normals(base, n_samples)
+        yield_comp, yield_fill, yield_combined = batch_yields(base, cs_noms, z, sigmas)
+    else:
+        raise ValueError(f"未知的計算方法: {method}")
+
+    noms = {name: np.full(len(catalog), d.nom) for name, d in base.groove_dims()}
+    nominal_comp, nominal_fill = ratios_from_values(base, {**noms, **cs_noms})
+    centering = _centering(base, cs_noms)
+    order = np.lexsort((centering, -yield_combined))[:top]
+    return [CatalogFit(standard=str(catalog.standard[i]), series=str(catalog.series[i]), sizes=str(catalog.sizes[i]),
+                       cs=float(catalog.cs[i]), tol=float(catalog.tol[i]),
+                       nominal_comp=float(nominal_comp[i]), nominal_fill=float(nominal_fill[i]),
+                       yield_comp=float(yield_comp[i]), yield_fill=float(yield_fill[i]),
+                       yield_combined=float(yield_combined[i]))
+            for i in order]
+
+
+@lru_cache(maxsize=32)
+def run_rank(spec: DesignSpec, standards=None, top=TOP_N, method=METHOD_ANALYTIC):
+    """快取入口；standards 需為 tuple"""
+    return rank_cross_sections(spec, standards, top, method)
@@ -0,0 +1,115 @@
+"""
+多情境比較 (Scenario Comparison)
+
+同一組尺寸樣本同時評估多個情境 (壓縮模式 / O-Ring 類型 / 拉伸率 / 目標區間…)，
+各情境的差異只來自設計本身，不含抽樣雜訊 (Common Random Numbers，同 oring.sweep)。
+
+樣本依 CHUNK_SIZE 分塊：每塊以各尺寸名稱抽一次標準常態 z (所有情境的聯集)，
+各情境取自己 active_dims 對應的欄位經 ratios_from_z 計算後直接累加進該情境的累加器 (良率、動差、直方圖)。
+記憶體 = 一塊樣本 + 情境數 × 直方圖 bin 數，與總樣本數無關；計算量仍為情境數 × 樣本數。
+實測尺寸 (DesignSpec.measurements) 以領頭尺寸的 z 查反 CDF 表，同一資料集在各情境取到同一列。
+"""
+from dataclasses import dataclass, replace
+from itertools import product
+
+import numpy as np
+
+from .analytic import histogram_edges
+from .engine import CHUNK_SIZE, _Accumulator, ratios_from_z
+from .sampling import SAMPLER_IMPORTANCE, SAMPLER_RANDOM, standard_normals
+from .spec import DesignSpec
+from .timing import tracked_cache
+
+MAX_SCENARIOS = 32
+
+
+@dataclass(frozen=True)
+class CompareResult:
+    """各情境的結果 (SimResult 只含統計值與直方圖，不保留樣本)，順序同輸入"""
+    labels: tuple
+    specs: tuple
+    results: tuple
+    n_samples: int
+    seed: int
+
+    def table(self):
+        """並列比較表 (list of dicts)"""
+        return [{"scenario": label, "mean_comp": r.mean_comp, "std_comp": r.std_comp, "mean_fill": r.mean_fill,
+                 "std_fill": r.std_fill, "yield_comp": r.yield_comp, "yield_fill": r.yield_fill,
+                 "yield_combined": r.yield_combined, "ppm_combined": r.ppm_combined}
+                for label, r in zip(self.labels, self.results)]
+
+
+def _option_label(value):
+    """選項字串 → 英文簡稱 (例："正壓 (Axial)" → "Axial")"""
+    return str(value).split("(")[-1].rstrip(")")
+
+
+def scenario_label(field, value):
+    if field == "stretch_pct":
+        return f"Stretch {value:g}%"
+    if isinstance(value, str):
+        return _option_label(value)
+    return f"{field} {value:g}"
+
+
+def make_scenarios(base: DesignSpec, **axes):
+    """
+    各欄位候選值的所有組合 → ((label, DesignSpec), ...)
+
+    例：make_scenarios(spec, comp_mode=(AXIAL, RADIAL), stretch_pct=(0, 2.5, 5)) → 6 個情境
+    """
+    names = list(axes)
+    scenarios = []
+    for values in product(*(axes[name] for name in names)):
+        label = " / ".join(scenario_label(name, value) for name, value in zip(names, values)) or "Base"
+        scenarios.append((label, replace(base, **dict(zip(names, values)))))
+    return tuple(scenarios)
+
+
+def compare(base: DesignSpec, scenarios) -> CompareResult:
+    """
+    scenarios: ((label, DesignSpec), ...)；樣本數、seed 與抽樣方法取自 base
+    (random / lhs / sobol；重要性抽樣的權重與情境有關，不支援)
+    """
+    if not scenarios:
+        raise ValueError("至少需要一個情境")
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"情境數不可超過 {MAX_SCENARIOS}")
+    if base.sampler == SAMPLER_IMPORTANCE:
+        raise ValueError("情境比較不支援重要性抽樣，請改用 random / lhs / sobol")
+    size = int(base.sim_count)
+    if size <= 0:
+        raise ValueError("模擬次數必須大於 0")
+    labels = tuple(label for label, _ in scenarios)
+    specs = tuple(replace(spec, sampler=base.sampler) for _, spec in scenarios)
+    for label, spec in zip(labels, specs):
+        if not spec.has_oring:
+            raise ValueError(f"{label}：O-Ring 尺寸必須大於 0")
+
+    # 所有情境尺寸的聯集；各情境以欄位索引取出自己的 z (順序同其 active_dims)
+    names = []
+    for spec in specs:
+        names += [name for name, _ in spec.active_dims() if name not in names]
+    columns = [[names.index(name) for name, _ in spec.active_dims()] for spec in specs]
+    accs = [_Accumulator(spec, *histogram_edges(spec)) for spec in specs]
+
+    root = np.random.SeedSequence(base.seed)
+    starts = range(0, size, CHUNK_SIZE)
+    for start, seed_seq in zip(starts, root.spawn(len(starts))):
+        n = min(CHUNK_SIZE, size - start)
+        rng = np.random.default_rng(seed_seq)
+        if base.sampler == SAMPLER_RANDOM:
+            z_all = rng.standard_normal((n, len(names)))
+        else:
+            z_all = standard_normals(base.sampler, n, len(names), rng)
+        for spec, cols, acc in zip(specs, columns, accs):
+            acc.add(*ratios_from_z(spec, z_all[:, cols]))
+    results = tuple(acc.result(root.entropy) for acc in accs)
+    return CompareResult(labels=labels, specs=specs, results=results, n_samples=size, seed=root.entropy)
+
+
+@tracked_cache(maxsize=8)
+def run_compare(base: DesignSpec, scenarios) -> CompareResult:
+    """快取入口；scenarios 需為 tuple of (label, DesignSpec)"""
+    return compare(base, scenarios)
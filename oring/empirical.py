@@ -0,0 +1,189 @@
+"""
+實測尺寸分佈 (Measured distributions)
+
+以量測資料 (CMM / 量具匯出的 CSV / Excel) 取代常態假設：
+- 欄位名稱同 DesignSpec 尺寸欄位 (cs, irr_h, irr_area, g_depth, g_width, g_wtop, g_wbtm)，其餘欄位忽略；
+  同一列視為同一件，含空白的列整列捨棄 (保留配對)。彼此無關的尺寸請分成不同檔案
+- ingest() 只解析一次：轉成 float32 結構化 .npy (依第一欄排序) 存入快取目錄，以內容雜湊命名 (dataset id)；
+  同一檔案 (路徑 + 大小 + mtime) 再次匯入直接查索引，不重新讀檔
+- DesignSpec.measurements 記錄 dataset id；引擎以 np.load(mmap_mode="r") 開啟 (每行程一次)，
+  多個 worker 行程共用作業系統的 page cache
+- 每個資料集每批次只抽一次列索引，同一列的尺寸一起取用 → 配對尺寸間的相關性保留
+  - random：bootstrap (均勻抽列)
+  - lhs / sobol / importance：以資料集中第一個參與抽樣尺寸的 z 值，Φ(z) 查反 CDF 表 (資料已依第一欄排序)
+- 解析估算、直方圖邊界與重要性抽樣中心以 normal_approx (平均 / 標準差動差配對的常態) 計算
+"""
+import hashlib
+import io
+import json
+import os
+from dataclasses import fields, replace
+from functools import lru_cache
+
+import numpy as np
+
+from .spec import DesignSpec, DimSpec
+
+CACHE_ENV = "ORING_CACHE_DIR"
+DIM_NAMES = tuple(f.name for f in fields(DesignSpec) if f.type is DimSpec)
+_INDEX = "index.json"
+
+
+def cache_dir():
+    """資料集快取目錄 (環境變數 ORING_CACHE_DIR，預設 ~/.cache/oring/measurements)"""
+    return os.environ.get(CACHE_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "oring", "measurements")
+
+
+def dataset_path(dataset_id):
+    return os.path.join(cache_dir(), f"{dataset_id}.npy")
+
+
+def _read_table(source, name):
+    import pandas as pd  # 只有匯入新資料時才需要
+
+    if str(name).lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(source)
+    return pd.read_csv(source)
+
+
+def _store(frame, dataset_id):
+    """DataFrame → 依第一個尺寸欄排序的 float32 結構化 .npy (原子寫入)"""
+    import pandas as pd
+
+    frame = frame.rename(columns=lambda c: str(c).strip().lower())
+    cols = [name for name in DIM_NAMES if name in frame.columns]
+    if not cols:
+        raise ValueError(f"找不到尺寸欄位 (需為 {', '.join(DIM_NAMES)} 之一)")
+    data = frame[cols].apply(pd.to_numeric, errors="coerce").dropna()
+    if len(data) < 2:
+        raise ValueError("實測資料至少需要 2 列完整資料")
+    order = np.argsort(data[cols[0]].to_numpy(), kind="stable")
+    table = np.empty(len(data), dtype=[(name, "<f4") for name in cols])
+    for name in cols:
+        table[name] = data[name].to_numpy()[order]
+    os.makedirs(cache_dir(), exist_ok=True)
+    path = dataset_path(dataset_id)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, table)
+    os.replace(tmp, path)
+
+
+def ingest_bytes(data: bytes, name="measurements.csv") -> str:
+    """上傳內容 (bytes) → dataset id；相同內容已匯入過則不重新解析"""
+    dataset_id = hashlib.sha256(data).hexdigest()[:16]
+    if not os.path.exists(dataset_path(dataset_id)):
+        _store(_read_table(io.BytesIO(data), name), dataset_id)
+    return dataset_id
+
+
+def _load_index():
+    try:
+        with open(os.path.join(cache_dir(), _INDEX), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def ingest(path) -> str:
+    """量測檔 (CSV / Excel) → dataset id；同一檔案 (路徑 + 大小 + mtime) 只解析一次"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+    index = _load_index()
+    dataset_id = index.get(key)
+    if dataset_id and os.path.exists(dataset_path(dataset_id)):
+        return dataset_id
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    dataset_id = digest.hexdigest()[:16]
+    if not os.path.exists(dataset_path(dataset_id)):
+        _store(_read_table(path, path), dataset_id)
+    index = _load_index()  # 解析期間可能有其他行程寫入
+    index[key] = dataset_id
+    tmp = os.path.join(cache_dir(), f"{_INDEX}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, os.path.join(cache_dir(), _INDEX))
+    return dataset_id
+
+
+@lru_cache(maxsize=16)
+def open_dataset(dataset_id):
+    """dataset id → 唯讀 memmap 結構化陣列 (每行程開啟一次)"""
+    path = dataset_path(dataset_id)
+    if not os.path.exists(path):
+        raise ValueError(f"找不到實測資料 {dataset_id}，請重新匯入 ({path})")
+    return np.load(path, mmap_mode="r")
+
+
+@lru_cache(maxsize=16)
+def dataset_summary(dataset_id):
+    """各尺寸欄位的 {name: (n, mean, std, min, max)} (以 float64 計算)"""
+    table = open_dataset(dataset_id)
+    summary = {}
+    for name in table.dtype.names:
+        values = np.asarray(table[name], dtype=np.float64)
+        summary[name] = (len(values), float(values.mean()), float(values.std()),
+                         float(values.min()), float(values.max()))
+    return summary
+
+
+@lru_cache(maxsize=64)
+def _plan(spec: DesignSpec):
+    """((dataset id, 領頭尺寸在 active_dims 的索引, 使用的尺寸名稱), ...)；未用到的資料集略過"""
+    active = [name for name, _ in spec.active_dims()]
+    plan, seen = [], set()
+    for dataset_id in spec.measurements:
+        names = tuple(name for name in active if name in open_dataset(dataset_id).dtype.names)
+        if not names:
+            continue
+        if seen & set(names):
+            raise ValueError(f"尺寸 {', '.join(sorted(seen & set(names)))} 出現在多個實測資料集")
+        seen.update(names)
+        plan.append((dataset_id, active.index(names[0]), names))
+    return tuple(plan)
+
+
+def measured_names(spec: DesignSpec):
+    """以實測資料取代的尺寸名稱"""
+    return [name for _, _, names in _plan(spec) for name in names] if spec.measurements else []
+
+
+def measured_values(spec: DesignSpec, size, rng=None, z=None, dtype=np.float64):
+    """
+    實測尺寸抽樣 → {name: array}；沒有實測資料時回傳 {} 且不消耗亂數
+
+    z 為 None 時以 rng 做 bootstrap；否則 z (n × d，欄位順序同 spec.active_dims()) 的領頭欄經 Φ 查反 CDF 表。
+    """
+    values = {}
+    if not spec.measurements:
+        return values
+    for dataset_id, lead, names in _plan(spec):
+        table = open_dataset(dataset_id)
+        n = len(table)
+        if z is None:
+            idx = rng.integers(0, n, size) if rng is not None else np.random.randint(0, n, size)
+        else:
+            from .analytic import _norm_cdf  # analytic 匯入本模組，延後匯入避免循環
+            idx = np.minimum((_norm_cdf(z[:, lead]) * n).astype(np.int64), n - 1)
+        rows = np.asarray(table[idx])
+        for name in names:
+            values[name] = rows[name].astype(dtype)
+    return values
+
+
+@lru_cache(maxsize=64)
+def normal_approx(spec: DesignSpec) -> DesignSpec:
+    """實測尺寸以動差配對的常態 DimSpec (nom = 平均, tol = 3σ, Cpk = 1) 取代，並移除 measurements"""
+    if not spec.measurements:
+        return spec
+    changes = {}
+    for dataset_id, _, names in _plan(spec):
+        summary = dataset_summary(dataset_id)
+        for name in names:
+            _, mean, std, _, _ = summary[name]
+            changes[name] = DimSpec(mean, 3 * std, 1.0)
+    return replace(spec, measurements=(), **changes)
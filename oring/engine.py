@@ -0,0 +1,674 @@
+"""
+O-Ring 蒙地卡羅模擬引擎 (Headless)
+
+與 Streamlit 介面完全分離，可直接由 script / service 匯入呼叫。
+
+省記憶體模式 (DesignSpec.memory_mode = lean / lean32)：每批次只配置尺寸緩衝區與輸出，
+以 in-place ufunc 計算壓縮率 / 填充率，保留樣本時直接寫入完整結果陣列；
+lean 與 standard 結果逐位元相同，lean32 以 float32 計算與保存，SimResult.peak_bytes 回報記憶體峰值估計。
+
+實測分佈 (DesignSpec.measurements)：資料中有的尺寸以 oring.empirical.measured_values 取代常態抽樣，
+每個資料集每批次抽一次列索引 (配對尺寸一起取用)；沒有實測資料時亂數序列與結果不變。
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from .spec import (
+    AXIAL, RADIAL, STANDARD, IRREGULAR, RECTANGULAR, TRAPEZOIDAL,
+    MEMORY_STANDARD, MEMORY_LEAN32, MEMORY_MODES, DimSpec, DesignSpec,
+)
+from .analytic import histogram_edges
+from .empirical import measured_names, measured_values, normal_approx
+from .sampling import (
+    SAMPLER_RANDOM, SAMPLER_IMPORTANCE, importance_normals, mpp_shifts, standard_normals,
+)
+from .timing import tracked_cache
+
+
+# 保留原始樣本 (keep_samples=True) 的建議上限；超過時請用串流模式，記憶體與樣本數無關
+STREAM_THRESHOLD = 2_000_000
+CHUNK_SIZE = 1 << 18
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+ADAPTIVE_BATCH = 1 << 15  # 自適應模式每批次樣本數
+ENGINE_STAGES = ("sample", "ratios", "accumulate")  # 抽樣 / 壓縮率與填充率 / 良率、動差與直方圖
+Z95 = 1.959963984540054
+
+
+@dataclass
+class Histogram:
+    """固定 bin 直方圖 (counts 可跨批次直接相加)"""
+    edges: np.ndarray
+    counts: np.ndarray
+    underflow: int = 0
+    overflow: int = 0
+
+    @classmethod
+    def empty(cls, edges, dtype=np.int64):
+        return cls(edges=edges, counts=np.zeros(len(edges) - 1, dtype=dtype))
+
+    def add(self, values, weights=None):
+        idx = np.searchsorted(self.edges, values, side='right') - 1
+        n_bins = len(self.counts)
+        # 最後一個 bin 含右邊界 (與 np.histogram 相同)
+        idx[values == self.edges[-1]] = n_bins - 1
+        inside = (idx >= 0) & (idx < n_bins)
+        if weights is None:
+            self.underflow += int(np.count_nonzero(idx < 0))
+            self.overflow += int(np.count_nonzero(idx >= n_bins))
+            self.counts += np.bincount(idx[inside], minlength=n_bins)
+        else:
+            self.underflow += float(weights[idx < 0].sum())
+            self.overflow += float(weights[idx >= n_bins].sum())
+            self.counts += np.bincount(idx[inside], weights=weights[inside], minlength=n_bins)
+
+    @property
+    def total(self):
+        return self.counts.sum() + self.underflow + self.overflow
+
+    def cdf(self, x):
+        """P(X ≤ x)，bin 內線性內插；超出邊界時停在邊界值 (underflow / overflow 無分佈資訊)"""
+        total = self.total
+        x = np.asarray(x, dtype=float)
+        if total == 0:
+            return np.zeros_like(x)
+        cum = np.concatenate([[0.0], np.cumsum(self.counts, dtype=float)]) + self.underflow
+        return np.interp(x, self.edges, cum) / total
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Histogram bin 邊界不一致，無法合併")
+        return Histogram(self.edges, self.counts + other.counts,
+                         self.underflow + other.underflow, self.overflow + other.overflow)
+
+
+@dataclass(frozen=True)
+class SimResult:
+    """
+    模擬結果
+
+    compression / fill 原始陣列只在記憶體內模式保留 (唯讀)，分塊模式為 None；
+    直方圖 comp_hist / fill_hist 兩種模式皆有，且 bin 邊界相同。
+    seed 為實際使用的 SeedSequence entropy，可用於重現結果。
+    重要性抽樣時 weights 為各樣本的似然比權重；yield_combined_se 為綜合良率標準誤 (%)，
+    yield_combined_ci 為綜合良率 95% 信賴區間 (%)；stop_reason 只在自適應模式下記錄停止原因。
+    """
+    sim_count: int
+    mean_comp: float
+    std_comp: float
+    yield_comp: float
+    ppm_comp: float
+    mean_fill: float
+    std_fill: float
+    yield_fill: float
+    ppm_fill: float
+    yield_combined: float
+    ppm_combined: float
+    comp_hist: Histogram
+    fill_hist: Histogram
+    seed: int
+    yield_combined_se: float = 0.0
+    yield_combined_ci: tuple = (0.0, 100.0)
+    sampler: str = SAMPLER_RANDOM
+    stop_reason: Optional[str] = None
+    compression: Optional[np.ndarray] = None
+    fill: Optional[np.ndarray] = None
+    weights: Optional[np.ndarray] = None
+    peak_bytes: Optional[int] = None  # 省記憶體模式：本次執行 numpy 緩衝區峰值 (估計，bytes)
+    stage_s: Optional[dict] = None    # 各階段耗時 (s)，見 ENGINE_STAGES；多 worker 時為各批次總和
+
+    @property
+    def reproducible(self):
+        """相同輸入必得相同結果；自適應模式因時間預算停止時，樣本數取決於當時的機器負載"""
+        return self.stop_reason != "time_budget"
+
+
+def _merge_moments(w_a, moments_a, w_b, mean_b, m2_b):
+    """Chan 合併：累計 (權重 w_a, (mean, M2)) 加入一批 (w_b, mean_b, M2_b) → 新的 (mean, M2)"""
+    mean_a, m2_a = moments_a
+    w = w_a + w_b
+    delta = mean_b - mean_a
+    return mean_a + delta * w_b / w, m2_a + m2_b + delta**2 * w_a * w_b / w
+
+
+class _Accumulator:
+    """
+    合格數 / 線上平均與變異數 (Chan 合併) / 直方圖累加器
+
+    weighted=True (重要性抽樣) 時，合格數以 n - Σ w·1{失效} 累加 (失效率為無偏估計)，
+    平均 / 變異數為自我正規化加權估計，直方圖 counts 為權重和。
+    """
+
+    def __init__(self, spec: DesignSpec, edges_comp, edges_fill, weighted=False):
+        self.spec = spec
+        self.n = 0
+        self.w = 0  # 動差用權重總和 (未加權時 = n)
+        self.pass_comp = self.pass_fill = self.pass_combined = 0
+        self.fail_sq = 0  # Σ (w·1{綜合失效})²，用於綜合良率標準誤
+        self.moments = {"comp": (0.0, 0.0), "fill": (0.0, 0.0)}  # (mean, M2)
+        dtype = np.float64 if weighted else np.int64
+        self.comp_hist = Histogram.empty(edges_comp, dtype)
+        self.fill_hist = Histogram.empty(edges_fill, dtype)
+        self.stage_s = dict.fromkeys(ENGINE_STAGES, 0.0)
+
+    @classmethod
+    def from_counts(cls, spec: DesignSpec, n, passes, moments, comp_hist: Histogram, fill_hist: Histogram):
+        """
+        由已算好的未加權統計建立 (例如 pipeline 的增量計算)
+        passes = (壓縮率, 填充率, 綜合) 合格數；moments = {"comp" / "fill": (mean, M2)}
+        """
+        acc = cls(spec, comp_hist.edges, fill_hist.edges)
+        acc.n = acc.w = int(n)
+        acc.pass_comp, acc.pass_fill, acc.pass_combined = passes
+        acc.fail_sq = acc.n - acc.pass_combined
+        acc.moments = dict(moments)
+        acc.comp_hist, acc.fill_hist = comp_hist, fill_hist
+        return acc
+
+    def _merge_moments(self, key, w_b, mean_b, m2_b):
+        self.moments[key] = _merge_moments(self.w, self.moments[key], w_b, mean_b, m2_b)
+
+    def add(self, compression_sim, fill_sim, weights=None):
+        n_b = len(compression_sim)
+        if n_b == 0:
+            return
+        spec = self.spec
+        pass_comp_mask = (compression_sim >= spec.target_comp_min) & (compression_sim <= spec.target_comp_max)
+        pass_fill_mask = (fill_sim >= spec.target_fill_min) & (fill_sim <= spec.target_fill_max)
+        pass_combined_mask = pass_comp_mask & pass_fill_mask
+        if weights is None:
+            self.pass_comp += int(np.count_nonzero(pass_comp_mask))
+            self.pass_fill += int(np.count_nonzero(pass_fill_mask))
+            self.pass_combined += int(np.count_nonzero(pass_combined_mask))
+            self.fail_sq += n_b - int(np.count_nonzero(pass_combined_mask))
+            w_b = n_b
+            for key, values in (("comp", compression_sim), ("fill", fill_sim)):
+                mean_b = float(np.mean(values))
+                self._merge_moments(key, w_b, mean_b, float(np.sum((values - mean_b)**2)))
+        else:
+            self.pass_comp += n_b - float(weights[~pass_comp_mask].sum())
+            self.pass_fill += n_b - float(weights[~pass_fill_mask].sum())
+            self.pass_combined += n_b - float(weights[~pass_combined_mask].sum())
+            self.fail_sq += float(np.sum(weights[~pass_combined_mask]**2))
+            w_b = float(weights.sum())
+            for key, values in (("comp", compression_sim), ("fill", fill_sim)):
+                mean_b = float(weights @ values) / w_b
+                self._merge_moments(key, w_b, mean_b, float(weights @ (values - mean_b)**2))
+        self.comp_hist.add(compression_sim, weights)
+        self.fill_hist.add(fill_sim, weights)
+        self.n += n_b
+        self.w += w_b
+
+    def merge(self, other: "_Accumulator"):
+        """合併另一批次的累加結果 (依固定批次順序合併 → 結果與 worker 數無關)"""
+        if other.n == 0:
+            return
+        self.pass_comp += other.pass_comp
+        self.pass_fill += other.pass_fill
+        self.pass_combined += other.pass_combined
+        self.fail_sq += other.fail_sq
+        for key in ("comp", "fill"):
+            self._merge_moments(key, other.w, *other.moments[key])
+        self.comp_hist = self.comp_hist.merge(other.comp_hist)
+        self.fill_hist = self.fill_hist.merge(other.fill_hist)
+        for key, seconds in other.stage_s.items():
+            self.stage_s[key] += seconds
+        self.n += other.n
+        self.w += other.w
+
+    def yield_combined_se(self):
+        """綜合良率的標準誤 (%)；LHS / Sobol 以 iid 公式計算，屬保守估計"""
+        fail = 1 - self.pass_combined / self.n
+        var = max(self.fail_sq / self.n - fail**2, 0.0)
+        return float(np.sqrt(var / self.n)) * 100
+
+    def yield_combined_ci(self):
+        """
+        綜合良率 95% Wilson 區間 (%)
+
+        以有效樣本數 n_eff = p(1-p) / SE² 套用 Wilson 公式；零失效時仍有非零寬度
+        (約 3.84 / n)，避免自適應模式在尚未觀察到失效前就提早停止。
+        """
+        n = self.n
+        fail = min(max(1 - self.pass_combined / n, 0.0), 1.0)
+        se = self.yield_combined_se() / 100
+        n_eff = fail * (1 - fail) / se**2 if se > 0 and 0 < fail < 1 else n
+        z2 = Z95**2
+        center = (fail + z2 / (2 * n_eff)) / (1 + z2 / n_eff)
+        half = Z95 * np.sqrt(fail * (1 - fail) / n_eff + z2 / (4 * n_eff**2)) / (1 + z2 / n_eff)
+        fail_lo, fail_hi = max(center - half, 0.0), min(center + half, 1.0)
+        return float((1 - fail_hi) * 100), float((1 - fail_lo) * 100)
+
+    def result(self, seed, compression_sim=None, fill_sim=None, weights=None, stop_reason=None,
+               peak_bytes=None) -> SimResult:
+        sim_count = self.n
+        yield_comp = (self.pass_comp / sim_count) * 100
+        yield_fill = (self.pass_fill / sim_count) * 100
+        yield_combined = (self.pass_combined / sim_count) * 100
+        (mean_comp, m2_comp), (mean_fill, m2_fill) = self.moments["comp"], self.moments["fill"]
+        for arr in (compression_sim, fill_sim, weights):
+            if arr is not None:
+                arr.flags.writeable = False
+        return SimResult(
+            sim_count=sim_count,
+            mean_comp=mean_comp,
+            std_comp=float(np.sqrt(m2_comp / self.w)),
+            yield_comp=yield_comp,
+            ppm_comp=(100 - yield_comp) * 10000,
+            mean_fill=mean_fill,
+            std_fill=float(np.sqrt(m2_fill / self.w)),
+            yield_fill=yield_fill,
+            ppm_fill=(100 - yield_fill) * 10000,
+            yield_combined=yield_combined,
+            ppm_combined=(100 - yield_combined) * 10000,
+            comp_hist=self.comp_hist,
+            fill_hist=self.fill_hist,
+            seed=seed,
+            yield_combined_se=self.yield_combined_se(),
+            yield_combined_ci=self.yield_combined_ci(),
+            sampler=self.spec.sampler,
+            stop_reason=stop_reason,
+            compression=compression_sim,
+            fill=fill_sim,
+            weights=weights,
+            peak_bytes=peak_bytes,
+            stage_s=dict(self.stage_s),
+        )
+
+
+def generate_dim(nominal, tol, cpk, size, rng=None):
+    if cpk == 0 or tol == 0:
+        return np.full(size, nominal)
+    sigma = tol / (3 * cpk)
+    return (rng or np.random).normal(nominal, sigma, size)
+
+
+def oring_display_dims(spec: DesignSpec):
+    """示意圖用 O-Ring 公稱寬/高 (已套用拉伸收縮)"""
+    if not spec.has_oring:
+        return 0, 0
+    if spec.oring_type == STANDARD:
+        w_nom = h_nom = spec.cs.nom
+    else:
+        h_nom = spec.irr_h.nom
+        w_nom = spec.irr_area.nom / spec.irr_h.nom
+    shrink_ratio = np.sqrt(1 / spec.stretch_factor)
+    return w_nom * shrink_ratio, h_nom * shrink_ratio
+
+
+def _oring_geometry(spec: DesignSpec, values):
+    """O-Ring 尺寸值 → 原始 (h, w, area)"""
+    if spec.oring_type == STANDARD:
+        raw_cs_sim = values["cs"]
+        return raw_cs_sim, raw_cs_sim, np.pi * (raw_cs_sim / 2)**2
+    sim_h = values["irr_h"]; sim_area = values["irr_area"]
+    return sim_h, sim_area / sim_h, sim_area
+
+
+def _groove_geometry(spec: DesignSpec, values):
+    """溝槽尺寸值 → (depth, width_eff, area)"""
+    sim_groove_depth = values["g_depth"]
+    if spec.groove_type == RECTANGULAR:
+        sim_g_width = values["g_width"]
+        return sim_groove_depth, sim_g_width, sim_g_width * sim_groove_depth
+    sim_wtop = values["g_wtop"]; sim_wbtm = values["g_wbtm"]
+    return sim_groove_depth, (sim_wtop + sim_wbtm) / 2, (sim_wtop + sim_wbtm) * sim_groove_depth / 2
+
+
+def sample_oring(spec: DesignSpec, size, rng=None, measured=None):
+    """O-Ring 原始尺寸抽樣 → (h, w, area)；measured 為實測尺寸抽樣值 (見 measured_values)"""
+    measured = measured or {}
+    values = {name: measured[name] if name in measured else generate_dim(d.nom, d.tol, d.cpk, size, rng)
+              for name, d in spec.oring_dims()}
+    return _oring_geometry(spec, values)
+
+
+def apply_stretch(spec: DesignSpec, h, w, area):
+    """拉伸後截面收縮：面積 / stretch_factor，寬高各乘 sqrt(1/stretch_factor)"""
+    stretch_factor = spec.stretch_factor
+    shrink_ratio = np.sqrt(1 / stretch_factor)
+    return h * shrink_ratio, w * shrink_ratio, area / stretch_factor
+
+
+def sample_groove(spec: DesignSpec, size, rng=None, measured=None):
+    """溝槽尺寸抽樣 → (depth, width_eff, area)"""
+    measured = measured or {}
+    values = {name: measured[name] if name in measured else generate_dim(d.nom, d.tol, d.cpk, size, rng)
+              for name, d in spec.groove_dims()}
+    return _groove_geometry(spec, values)
+
+
+def compute_ratios(spec: DesignSpec, oring_h, oring_w, oring_area, groove_depth, groove_width, groove_area):
+    """壓縮率 / 填充率 (%)"""
+    if spec.comp_mode == AXIAL:
+        dim_oring_comp = oring_h; dim_groove_comp = groove_depth
+    else:
+        dim_oring_comp = oring_w; dim_groove_comp = groove_width
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        compression_sim = (dim_oring_comp - dim_groove_comp) / dim_oring_comp * 100
+        fill_sim = (oring_area / groove_area) * 100
+        compression_sim = np.nan_to_num(compression_sim, nan=0.0)
+        fill_sim = np.nan_to_num(fill_sim, nan=0.0)
+    return compression_sim, fill_sim
+
+
+def sample_ratios(spec: DesignSpec, size, rng=None):
+    """抽樣 size 組尺寸並計算壓縮率 / 填充率"""
+    measured = measured_values(spec, size, rng)
+    oring_h, oring_w, oring_area = apply_stretch(spec, *sample_oring(spec, size, rng, measured))
+    groove_depth, groove_width, groove_area = sample_groove(spec, size, rng, measured)
+    return compute_ratios(spec, oring_h, oring_w, oring_area, groove_depth, groove_width, groove_area)
+
+
+def ratios_from_values(spec: DesignSpec, values):
+    """尺寸值 dict (name → array) → 壓縮率 / 填充率"""
+    oring_h, oring_w, oring_area = apply_stretch(spec, *_oring_geometry(spec, values))
+    groove_depth, groove_width, groove_area = _groove_geometry(spec, values)
+    return compute_ratios(spec, oring_h, oring_w, oring_area, groove_depth, groove_width, groove_area)
+
+
+def ratios_from_z(spec: DesignSpec, z):
+    """標準常態 z (n × d，欄位順序同 spec.active_dims()) → 壓縮率 / 填充率"""
+    values = {name: d.nom + d.sigma * z[:, i] for i, (name, d) in enumerate(spec.active_dims())}
+    values.update(measured_values(spec, len(z), z=z))
+    return ratios_from_values(spec, values)
+
+
+def lean_dtype(spec: DesignSpec):
+    return np.float32 if spec.memory_mode == MEMORY_LEAN32 else np.float64
+
+
+def _lean_ratios(spec: DesignSpec, draw, compression_sim, fill_sim, ws):
+    """
+    省記憶體版 ratios_from_values：draw(i, out) 依 active_dims 順序把第 i 個尺寸寫入 out，
+    全部以 in-place ufunc 計算，結果寫入 compression_sim / fill_sim。
+    O-Ring 尺寸先換算成 (壓縮方向尺寸, 截面積) 再抽溝槽尺寸並重用同一組緩衝區，
+    因此工作區 ws 只需 max(O-Ring 尺寸數, 溝槽尺寸數) 列；運算順序與 compute_ratios 相同 (float64 結果逐位元相同)。
+    """
+    n_oring = len(spec.oring_dims())
+    shrink_ratio = np.sqrt(1 / spec.stretch_factor)
+    for i in range(n_oring):
+        draw(i, ws[i])
+    if spec.oring_type == STANDARD:
+        np.multiply(ws[0], 0.5, out=fill_sim)
+        np.square(fill_sim, out=fill_sim)
+        fill_sim *= np.pi
+        np.multiply(ws[0], shrink_ratio, out=compression_sim)
+    else:
+        sim_h, sim_area = ws[0], ws[1]
+        if spec.comp_mode == AXIAL:
+            np.multiply(sim_h, shrink_ratio, out=compression_sim)
+        else:
+            np.divide(sim_area, sim_h, out=compression_sim)
+            compression_sim *= shrink_ratio
+        np.copyto(fill_sim, sim_area)
+    fill_sim /= spec.stretch_factor
+
+    for j in range(len(spec.groove_dims())):
+        draw(n_oring + j, ws[j])
+    groove_depth, groove_width = ws[0], ws[1]
+    if spec.groove_type == TRAPEZOIDAL:
+        groove_width += ws[2]
+        groove_width *= 0.5
+    # 壓縮方向尺寸保留，另一個緩衝區就地乘成溝槽面積
+    if spec.comp_mode == AXIAL:
+        dim_groove_comp, groove_area = groove_depth, groove_width
+    else:
+        dim_groove_comp, groove_area = groove_width, groove_depth
+    groove_area *= dim_groove_comp
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fill_sim /= groove_area
+        fill_sim *= 100
+        np.subtract(compression_sim, dim_groove_comp, out=dim_groove_comp)
+        np.divide(dim_groove_comp, compression_sim, out=compression_sim)
+        compression_sim *= 100
+    np.nan_to_num(compression_sim, copy=False, nan=0.0)
+    np.nan_to_num(fill_sim, copy=False, nan=0.0)
+    return compression_sim, fill_sim
+
+
+def _lean_block(spec: DesignSpec, rng, size, out=None):
+    """省記憶體批次：抽樣直接寫入預先配置的緩衝區；out = (compression, fill) 時直接寫入 (例如完整結果陣列的切片)"""
+    dtype = lean_dtype(spec)
+    dims = spec.active_dims()
+    weights = None
+    if spec.sampler == SAMPLER_RANDOM:
+        measured = measured_values(spec, size, rng, dtype=dtype)
+
+        def draw(i, buf):
+            name, d = dims[i]
+            if name in measured:
+                np.copyto(buf, measured[name])
+                return
+            if d.sigma == 0:
+                buf.fill(d.nom)
+                return
+            rng.standard_normal(dtype=dtype, out=buf)
+            buf *= d.sigma
+            buf += d.nom
+    else:
+        if spec.sampler == SAMPLER_IMPORTANCE:
+            z, weights = importance_normals(size, importance_shifts(spec), rng)
+        else:
+            z = standard_normals(spec.sampler, size, len(dims), rng)
+        measured = measured_values(spec, size, z=z, dtype=dtype)
+
+        def draw(i, buf):
+            name, d = dims[i]
+            if name in measured:
+                np.copyto(buf, measured[name])
+                return
+            np.multiply(z[:, i], d.sigma, out=buf)
+            buf += d.nom
+    # 抽樣器的暫存釋放後才配置工作區，兩者的峰值不重疊
+    ws = np.empty((max(len(spec.oring_dims()), len(spec.groove_dims())), size), dtype=dtype)
+    compression_sim, fill_sim = out if out is not None else (np.empty(size, dtype), np.empty(size, dtype))
+    _lean_ratios(spec, draw, compression_sim, fill_sim, ws)
+    return compression_sim, fill_sim, weights
+
+
+def lean_peak_bytes(spec: DesignSpec, size, block, concurrent, keep_samples):
+    """
+    省記憶體模式的 numpy 緩衝區峰值估計 (bytes)，不含直譯器與套件本身
+    = 保留的完整樣本 + 同時執行的批次數 × 每批次最大階段 (抽樣器 / 計算核心 / 累加器) 的工作區
+    """
+    item = np.dtype(lean_dtype(spec)).itemsize
+    out_bytes = 0 if keep_samples else 2 * item     # 保留樣本時直接寫入完整結果陣列
+    z_bytes = 0 if spec.sampler == SAMPLER_RANDOM else 8 * len(spec.active_dims())
+    w_bytes = 8 if spec.sampler == SAMPLER_IMPORTANCE else 0
+    generate = z_bytes * (3 if spec.sampler == SAMPLER_IMPORTANCE else 2)
+    kernel = (z_bytes + w_bytes + out_bytes + item * len(measured_names(spec))
+              + item * max(len(spec.oring_dims()), len(spec.groove_dims())))
+    # 累加器：3 個 bool 遮罩 + max((x - mean)² 兩個暫存, 直方圖 searchsorted 索引與篩選)
+    accumulate = w_bytes + out_bytes + 3 + max(2 * item, 18)
+    kept = size * (2 * item + w_bytes) if keep_samples else 0
+    return int(kept + concurrent * block * max(generate, kernel, accumulate))
+
+
+@lru_cache(maxsize=64)
+def importance_shifts(spec: DesignSpec):
+    """重要性抽樣的偏移中心：各目標界限的最可能失效點 (z 空間)"""
+    limits = [(0, spec.target_comp_min, -1), (0, spec.target_comp_max, +1),
+              (1, spec.target_fill_min, -1), (1, spec.target_fill_max, +1)]
+    # 實測尺寸的反 CDF 為階梯函數，MPP 搜尋改用動差配對的常態近似
+    shifts = mpp_shifts(lambda z: ratios_from_z(normal_approx(spec), z), len(spec.active_dims()), limits)
+    shifts.flags.writeable = False
+    return shifts
+
+
+def _run_block(spec: DesignSpec, seed_seq, size, edges, keep_samples, out=None):
+    """
+    單一批次：獨立 Generator 抽樣 → 累加器 (可在 thread / process worker 中執行)
+    省記憶體模式下 out 可指定結果寫入位置 (完整結果陣列的切片，只限 thread)
+    """
+    rng = np.random.default_rng(seed_seq)
+    weights = None
+    t0 = time.perf_counter()
+    if spec.memory_mode != MEMORY_STANDARD:
+        # 省記憶體模式抽樣與計算交錯進行，全部計入 ratios
+        t1 = t0
+        compression_sim, fill_sim, weights = _lean_block(spec, rng, size, out)
+    elif spec.sampler == SAMPLER_RANDOM:
+        # 同 sample_ratios，拆開以分別計時
+        measured = measured_values(spec, size, rng)
+        oring = apply_stretch(spec, *sample_oring(spec, size, rng, measured))
+        groove = sample_groove(spec, size, rng, measured)
+        t1 = time.perf_counter()
+        compression_sim, fill_sim = compute_ratios(spec, *oring, *groove)
+    else:
+        if spec.sampler == SAMPLER_IMPORTANCE:
+            z, weights = importance_normals(size, importance_shifts(spec), rng)
+        else:
+            z = standard_normals(spec.sampler, size, len(spec.active_dims()), rng)
+        t1 = time.perf_counter()
+        compression_sim, fill_sim = ratios_from_z(spec, z)
+    t2 = time.perf_counter()
+    acc = _Accumulator(spec, *edges, weighted=weights is not None)
+    acc.add(compression_sim, fill_sim, weights)
+    acc.stage_s.update(sample=t1 - t0, ratios=t2 - t1, accumulate=time.perf_counter() - t2)
+    return acc, ((compression_sim, fill_sim, weights) if keep_samples else None)
+
+
+def _merge_blocks(spec, edges, blocks):
+    acc = _Accumulator(spec, *edges, weighted=spec.sampler == SAMPLER_IMPORTANCE)
+    samples = ([], [], [])
+    for block_acc, block_samples in blocks:
+        acc.merge(block_acc)
+        if block_samples is not None:
+            for dst, arr in zip(samples, block_samples):
+                dst.append(arr)
+    return acc, samples
+
+
+def block_plan(spec: DesignSpec, keep_samples=False):
+    """
+    simulate 的批次切分 → (root SeedSequence, edges, 批次起點, [_run_block 參數, ...])
+    依序執行各批次並以 _Accumulator.merge 合併即與 simulate 結果相同 (供 oring.service 逐批回報進度)
+    """
+    if not spec.has_oring:
+        raise ValueError("O-Ring 尺寸必須大於 0")
+    size = int(spec.sim_count)
+    if size <= 0:
+        raise ValueError("模擬次數必須大於 0")
+    if spec.memory_mode not in MEMORY_MODES:
+        raise ValueError(f"未知的記憶體模式: {spec.memory_mode}")
+    root = np.random.SeedSequence(spec.seed)
+    edges = histogram_edges(spec)
+    starts = range(0, size, CHUNK_SIZE)
+    sizes = [min(CHUNK_SIZE, size - start) for start in starts]
+    args = [(spec, ss, n, edges, keep_samples) for ss, n in zip(root.spawn(len(sizes)), sizes)]
+    return root, edges, starts, args
+
+
+def simulate(spec: DesignSpec, keep_samples=True, workers=1, executor="thread") -> SimResult:
+    """
+    執行一次完整蒙地卡羅模擬 (不快取)
+
+    樣本固定切成 CHUNK_SIZE 大小的批次，每批次使用由 SeedSequence(seed).spawn()
+    產生的獨立 Generator，並依批次順序合併 → 相同 seed 的結果與 workers 數逐位元相同。
+    keep_samples=False 時不保留原始陣列 (串流模式)，記憶體約為 workers × CHUNK_SIZE。
+    executor 可為 "thread" 或 "process"。
+    抽樣方法由 spec.sampler 決定 (見 oring.sampling)。
+    """
+    root, edges, starts, block_args = block_plan(spec, keep_samples)
+    size = int(spec.sim_count)
+    sizes = [a[2] for a in block_args]
+    parallel = workers > 1 and len(sizes) > 1
+    lean = spec.memory_mode != MEMORY_STANDARD
+    outs = [None] * len(sizes)
+    if lean and keep_samples:
+        # 完整結果陣列只配置一次；thread 批次直接寫入各自的切片 (不需 concatenate 的第二份)
+        dtype = lean_dtype(spec)
+        compression_all, fill_all = np.empty(size, dtype), np.empty(size, dtype)
+        if not (parallel and executor == "process"):
+            outs = [(compression_all[a:a + n], fill_all[a:a + n]) for a, n in zip(starts, sizes)]
+    args = [a + (out,) for a, out in zip(block_args, outs)]
+
+    if parallel:
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            acc, samples = _merge_blocks(spec, edges, pool.map(_run_block, *zip(*args)))
+    else:
+        acc, samples = _merge_blocks(spec, edges, (_run_block(*a) for a in args))
+
+    peak_bytes = None
+    if lean:
+        peak_bytes = lean_peak_bytes(spec, size, sizes[0], min(workers, len(sizes)) if parallel else 1, keep_samples)
+    if keep_samples:
+        weights = np.concatenate(samples[2]) if acc.comp_hist.counts.dtype.kind == 'f' else None
+        if not lean:
+            return acc.result(root.entropy, np.concatenate(samples[0]), np.concatenate(samples[1]), weights)
+        if outs[0] is None:
+            for a, comp_b, fill_b in zip(starts, samples[0], samples[1]):
+                compression_all[a:a + len(comp_b)] = comp_b
+                fill_all[a:a + len(fill_b)] = fill_b
+        return acc.result(root.entropy, compression_all, fill_all, weights, peak_bytes=peak_bytes)
+    return acc.result(root.entropy, peak_bytes=peak_bytes)
+
+
+def simulate_adaptive(spec: DesignSpec, workers=1, executor="thread") -> SimResult:
+    """
+    自適應停止：以 ADAPTIVE_BATCH 為批次持續抽樣，直到綜合良率 95% CI 寬度
+    ≤ spec.ci_width_ppm，或用完樣本預算 (spec.sim_count) / 時間預算 (spec.max_seconds)。
+
+    每一輪平行計算 workers 個批次，但停止條件依批次順序逐一檢查，
+    因此在未觸發時間上限時，相同 seed 的結果與 workers 數無關。
+    """
+    if not spec.has_oring:
+        raise ValueError("O-Ring 尺寸必須大於 0")
+    if not spec.ci_width_ppm or spec.ci_width_ppm <= 0:
+        raise ValueError("自適應模式需要 ci_width_ppm > 0")
+    if spec.memory_mode not in MEMORY_MODES:
+        raise ValueError(f"未知的記憶體模式: {spec.memory_mode}")
+    budget = int(spec.sim_count)
+    root = np.random.SeedSequence(spec.seed)
+    edges = histogram_edges(spec)
+    acc = _Accumulator(spec, *edges, weighted=spec.sampler == SAMPLER_IMPORTANCE)
+    t0 = time.perf_counter()
+    pool = None
+    if workers > 1:
+        pool = (ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor)(max_workers=workers)
+    try:
+        stop_reason = None
+        while stop_reason is None:
+            remaining = budget - acc.n
+            if remaining <= 0:
+                stop_reason = "sample_budget"
+                break
+            sizes = [min(ADAPTIVE_BATCH, remaining - i * ADAPTIVE_BATCH)
+                     for i in range(max(workers, 1)) if remaining - i * ADAPTIVE_BATCH > 0]
+            args = [(spec, ss, n, edges, False) for ss, n in zip(root.spawn(len(sizes)), sizes)]
+            blocks = pool.map(_run_block, *zip(*args)) if pool else (_run_block(*a) for a in args)
+            for block_acc, _ in blocks:
+                acc.merge(block_acc)
+                ci_lo, ci_hi = acc.yield_combined_ci()
+                if (ci_hi - ci_lo) * 10000 <= spec.ci_width_ppm:
+                    stop_reason = "ci_width"
+                    break
+            if stop_reason is None and spec.max_seconds and time.perf_counter() - t0 >= spec.max_seconds:
+                stop_reason = "time_budget"
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    peak_bytes = None
+    if spec.memory_mode != MEMORY_STANDARD:
+        peak_bytes = lean_peak_bytes(spec, acc.n, ADAPTIVE_BATCH, max(workers, 1), keep_samples=False)
+    return acc.result(root.entropy, stop_reason=stop_reason, peak_bytes=peak_bytes)
+
+
+@tracked_cache(maxsize=8, cache_if=lambda res: res.reproducible)
+def run_simulation(spec: DesignSpec) -> SimResult:
+    """
+    以 DesignSpec 為 key 的快取入口；相同輸入不重新抽樣，一律串流 (快取項目不含原始陣列)
+    因時間預算停止的自適應結果不快取 (下次重新計算)
+    """
+    if spec.ci_width_ppm:
+        return simulate_adaptive(spec, workers=DEFAULT_WORKERS)
+    return simulate(spec, keep_samples=False, workers=DEFAULT_WORKERS)
@@ -0,0 +1,149 @@
+"""
+溫度 / 流體膨潤掃描 (Environment Sweep)
+
+室溫幾何 (含拉伸收縮) 之外，再套用：
+- 熱膨脹：溝槽尺寸 × (1 + α_g·ΔT)，O-Ring 尺寸 × (1 + α_o·ΔT)，ΔT = T - t_ref
+- 體積膨潤 s：O-Ring 各向同性膨脹，線性尺寸 × (1 + s)^(1/3)
+
+溝槽各尺寸同倍率、O-Ring 各尺寸同倍率，因此每個操作點只差一個純量 r = k_groove / k_oring：
+    壓縮率 = 100 · (1 - (1 - c₀/100) · r)，填充率 = f₀ / r²   (c₀ / f₀ 為室溫樣本值)
+樣本只抽一次 (依 CHUNK_SIZE 分塊，與 sweep 相同的固定 seed)，各操作點以 broadcasting (樣本 × 點) 計算，
+每次運算的元素數不超過 BLOCK_ELEMS → 記憶體固定，與操作點數無關。
+橡膠的玻璃轉移 / 壓縮永久變形不在此模型內。
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .engine import CHUNK_SIZE, importance_shifts, ratios_from_values, ratios_from_z, sample_ratios
+from .sampling import SAMPLER_IMPORTANCE, SAMPLER_RANDOM, importance_normals, standard_normals
+from .spec import DesignSpec
+from .sweep import _in_window
+from .timing import tracked_cache
+
+ENV_SAMPLES = 200_000
+T_REF = 20.0  # 圖面尺寸的參考溫度 (°C)
+BLOCK_ELEMS = 1 << 20  # 每次 broadcasting 運算的 (樣本 × 操作點) 元素上限 (約 8 MiB / 陣列)
+
+# 線膨脹係數 (1/°C)，典型值；正式評估請以材料規格書為準
+GROOVE_CTE = {
+    "Aluminium": 23.1e-6,
+    "Zinc die-cast": 27.0e-6,
+    "Carbon steel": 11.7e-6,
+    "Stainless steel": 17.3e-6,
+    "PC": 65e-6,
+    "PC/ABS": 70e-6,
+}
+ORING_CTE = {
+    "NBR": 1.2e-4,
+    "EPDM": 1.6e-4,
+    "FKM": 1.6e-4,
+    "Silicone (VMQ)": 2.5e-4,
+}
+
+
+@dataclass(frozen=True)
+class EnvSweepResult:
+    """各陣列形狀 = (溫度數, 膨潤數)"""
+    temps: np.ndarray
+    swells: np.ndarray             # 體積膨潤率 (比例，0.05 = 5 %)
+    yield_comp: np.ndarray
+    yield_fill: np.ndarray
+    yield_combined: np.ndarray
+    mean_comp: np.ndarray
+    mean_fill: np.ndarray
+    nominal_comp: np.ndarray       # 公稱尺寸下的壓縮率 / 填充率
+    nominal_fill: np.ndarray
+    n_samples: int
+
+    @property
+    def ppm_combined(self):
+        return (100 - self.yield_combined) * 10000
+
+    def worst(self):
+        """綜合良率最低的操作點 → (溫度, 膨潤率, yield_combined)"""
+        i, j = np.unravel_index(np.argmin(self.yield_combined), self.yield_combined.shape)
+        return float(self.temps[i]), float(self.swells[j]), float(self.yield_combined[i, j])
+
+
+def scale_ratio(temps, swells, alpha_groove, alpha_oring, t_ref=T_REF):
+    """各操作點的 r = 溝槽倍率 / O-Ring 倍率 → (溫度數, 膨潤數)"""
+    dt = np.asarray(temps, dtype=float)[:, None] - t_ref
+    k_groove = 1 + alpha_groove * dt
+    k_oring = (1 + alpha_oring * dt) * np.cbrt(1 + np.asarray(swells, dtype=float))[None, :]
+    return k_groove / k_oring
+
+
+def _sample_block(spec: DesignSpec, rng, n):
+    """室溫樣本的 (壓縮率, 填充率, 權重)；權重只在重要性抽樣時非 None"""
+    if spec.sampler == SAMPLER_RANDOM:
+        return (*sample_ratios(spec, n, rng), None)
+    if spec.sampler == SAMPLER_IMPORTANCE:
+        z, weights = importance_normals(n, importance_shifts(spec), rng)
+    else:
+        z, weights = standard_normals(spec.sampler, n, len(spec.active_dims()), rng), None
+    return (*ratios_from_z(spec, z), weights)
+
+
+def env_sweep(spec: DesignSpec, temps, swells=(0.0,), alpha_groove=GROOVE_CTE["Aluminium"],
+              alpha_oring=ORING_CTE["NBR"], t_ref=T_REF, n_samples=ENV_SAMPLES, seed=None) -> EnvSweepResult:
+    """
+    temps (°C) × swells (體積膨潤率) 網格上的良率曲線；抽樣方法取自 spec.sampler，seed 預設為 spec.seed
+    """
+    if not spec.has_oring:
+        raise ValueError("O-Ring 尺寸必須大於 0")
+    temps = np.asarray(temps, dtype=float)
+    swells = np.asarray(swells, dtype=float)
+    if temps.size == 0 or swells.size == 0:
+        raise ValueError("溫度與膨潤率至少各需一個值")
+    if np.any(swells <= -1):
+        raise ValueError("膨潤率需大於 -100 %")
+    r = scale_ratio(temps, swells, alpha_groove, alpha_oring, t_ref).ravel()
+    n_points = r.size
+    fail = {key: np.zeros(n_points) for key in ("comp", "fill", "combined")}
+    sums = {key: np.zeros(n_points) for key in ("comp", "fill", "w")}
+
+    root = np.random.SeedSequence(spec.seed if seed is None else seed)
+    starts = range(0, n_samples, CHUNK_SIZE)
+    for start, seed_seq in zip(starts, root.spawn(len(starts))):
+        n = min(CHUNK_SIZE, n_samples - start)
+        comp0, fill0, weights = _sample_block(spec, np.random.default_rng(seed_seq), n)
+        w = np.ones(n) if weights is None else weights
+        ratio0 = 1 - comp0 / 100
+        block = max(1, BLOCK_ELEMS // n)
+        for p in range(0, n_points, block):
+            sl = slice(p, min(p + block, n_points))
+            compression = 100 * (1 - ratio0[:, None] * r[None, sl])
+            fill = fill0[:, None] / (r[None, sl] ** 2)
+            pass_comp = _in_window(compression, spec.target_comp_min, spec.target_comp_max)
+            pass_fill = _in_window(fill, spec.target_fill_min, spec.target_fill_max)
+            fail["comp"][sl] += w @ ~pass_comp
+            fail["fill"][sl] += w @ ~pass_fill
+            fail["combined"][sl] += w @ ~(pass_comp & pass_fill)
+            sums["comp"][sl] += w @ compression
+            sums["fill"][sl] += w @ fill
+        sums["w"] += w.sum()
+
+    nominal = {name: np.asarray(d.nom, dtype=float) for name, d in spec.active_dims()}
+    nom_comp, nom_fill = ratios_from_values(spec, nominal)
+    shape = (len(temps), len(swells))
+    r = r.reshape(shape)
+    return EnvSweepResult(
+        temps=temps,
+        swells=swells,
+        yield_comp=(100 - fail["comp"] / n_samples * 100).reshape(shape),
+        yield_fill=(100 - fail["fill"] / n_samples * 100).reshape(shape),
+        yield_combined=(100 - fail["combined"] / n_samples * 100).reshape(shape),
+        mean_comp=(sums["comp"] / sums["w"]).reshape(shape),
+        mean_fill=(sums["fill"] / sums["w"]).reshape(shape),
+        nominal_comp=100 * (1 - (1 - float(nom_comp) / 100) * r),
+        nominal_fill=float(nom_fill) / r ** 2,
+        n_samples=n_samples,
+    )
+
+
+@tracked_cache(maxsize=8)
+def run_env_sweep(spec: DesignSpec, temps, swells, alpha_groove, alpha_oring, t_ref=T_REF,
+                  n_samples=ENV_SAMPLES) -> EnvSweepResult:
+    """快取入口；temps / swells 需為 tuple"""
+    return env_sweep(spec, temps, swells, alpha_groove, alpha_oring, t_ref, n_samples)
@@ -0,0 +1,258 @@
+"""
+溝槽尺寸最佳化 (Groove Optimizer)
+
+在固定的共用樣本 z (Common Random Numbers) 上搜尋溝槽公稱值 (及選用的公差)：
+每個候選點只需把 nom + sigma · z 重新換算壓縮率 / 填充率，不必重新抽樣，
+因此整個搜尋的成本約等於數百個設計點的批次良率計算 (秒級)。
+
+- 良率模式 (yield) : 以 Pattern Search 最大化綜合良率；
+                     同分時取公稱壓縮率 / 填充率最接近目標區間中心者
+- 成本模式 (cost)  : 在綜合 PPM ≤ 需求值的前提下放寬公差，
+                     成本模型為 Σ 1 / tol (公差越緊加工成本越高)
+"""
+import math
+import time
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from .engine import ratios_from_values
+from .spec import DesignSpec, DimSpec
+from .sweep import batch_yields, common_normals, nominal_feasible
+from .timing import tracked_cache
+
+OBJECTIVE_YIELD = "yield"
+OBJECTIVE_COST = "cost"
+
+OPT_SAMPLES = 50000
+MIN_FAILURES = 20          # 成本模式：需求 PPM 下預期失效樣本數下限，決定樣本數
+MAX_OPT_SAMPLES = 2_000_000
+SEARCH_SAMPLES = 200_000   # 成本模式：搜尋階段的樣本數上限 (需求 100 ppm 時約 20 個失效)，最後再以全部樣本驗證
+BOUND_PCT = 30.0           # 公稱值搜尋範圍：目前公稱值 ± BOUND_PCT %
+RESOLUTION = 0.001         # 圖面尺寸解析度 (mm)
+MAX_ITERATIONS = 60
+TOL_STEP = 1.1             # 成本模式每次放寬 / 收緊公差的倍率
+MAX_TOL_STEPS = 40
+
+
+@dataclass(frozen=True)
+class OptimizeResult:
+    objective: str
+    spec: DesignSpec             # 最佳化後的設計 (只改動溝槽尺寸)
+    start_yield: float           # 起始設計在同一組樣本上的綜合良率 (%)
+    yield_combined: float        # 最佳設計在同一組樣本上的綜合良率 (%)
+    start_cost: float
+    cost: float
+    required_ppm: float = None
+    n_samples: int = 0           # 起始 / 最終良率的樣本數
+    n_evals: int = 0             # 評估過的候選設計點數
+    search_samples: int = 0      # 搜尋階段的樣本數 (n_samples 的前段)
+    elapsed_s: float = 0.0
+    target_met: bool = True      # 成本模式：最終驗證的 PPM 是否 ≤ 需求值
+
+    @property
+    def ppm_combined(self):
+        return (100 - self.yield_combined) * 10000
+
+    @property
+    def groove_dims(self):
+        """{dim_name: DimSpec}，可直接寫回溝槽輸入欄位"""
+        return dict(self.spec.groove_dims())
+
+
+def tolerance_cost(spec: DesignSpec):
+    """相對加工成本 Σ 1 / tol (只計溝槽尺寸；公差為 0 者不計)"""
+    return sum(1.0 / d.tol for _, d in spec.groove_dims() if d.tol > 0)
+
+
+def _centering(spec: DesignSpec, noms):
+    """公稱壓縮率 / 填充率離目標區間中心的正規化距離 (越小越好)"""
+    full = {name: np.asarray(noms.get(name, d.nom), dtype=float) for name, d in spec.active_dims()}
+    comp, fill = ratios_from_values(spec, full)
+    half_c = max((spec.target_comp_max - spec.target_comp_min) / 2, 1e-9)
+    half_f = max((spec.target_fill_max - spec.target_fill_min) / 2, 1e-9)
+    return (np.abs(comp - (spec.target_comp_max + spec.target_comp_min) / 2) / half_c
+            + np.abs(fill - (spec.target_fill_max + spec.target_fill_min) / 2) / half_f)
+
+
+class _Evaluator:
+    """在固定 z 上評估候選設計點，並累計評估次數"""
+
+    def __init__(self, spec, z):
+        self.spec = spec
+        self.z = z
+        self.n_evals = 0
+
+    def __call__(self, noms, sigmas=None):
+        n_points = len(next(iter(noms.values())))
+        self.n_evals += n_points
+        _, _, yield_combined = batch_yields(self.spec, noms, self.z, sigmas)
+        return yield_combined, nominal_feasible(self.spec, noms), _centering(self.spec, noms)
+
+
+def _rank(yield_combined, feasible, centering):
+    """排序鍵 (越大越好)：可行 → 綜合良率 → 置中程度"""
+    return np.lexsort((-centering, yield_combined, feasible))[-1]
+
+
+def _pattern_search(evaluate, names, start, lower, upper, sigmas=None):
+    """
+    Pattern Search：以 3^k 格點 (k ≤ 3) 環繞目前點同時評估，往最佳點移動；
+    中心點已是最佳則步長減半，直到步長小於圖面解析度。
+    """
+    k = len(names)
+    offsets = np.array(np.meshgrid(*([[-1, 0, 1]] * k), indexing='ij')).reshape(k, -1).T
+    center = np.array([start[n] for n in names], dtype=float)
+    step = np.maximum((upper - lower) / 4, RESOLUTION)
+    sig = None if sigmas is None else {n: np.full(len(offsets), sigmas[n]) for n in sigmas}
+    for _ in range(MAX_ITERATIONS):
+        cand = np.clip(center + offsets * step, lower, upper)
+        noms = {n: cand[:, i] for i, n in enumerate(names)}
+        best = _rank(*evaluate(noms, sig))
+        if np.allclose(cand[best], center):
+            if (step <= RESOLUTION).all():
+                break
+            step = np.maximum(step / 2, RESOLUTION)
+        center = cand[best]
+    return dict(zip(names, np.round(center / RESOLUTION) * RESOLUTION))
+
+
+def _with_groove(spec: DesignSpec, noms, tols=None):
+    changes = {}
+    for name, d in spec.groove_dims():
+        changes[name] = DimSpec(float(round(noms.get(name, d.nom), 6)),
+                                float(round((tols or {}).get(name, d.tol), 6)), d.cpk)
+    return replace(spec, **changes)
+
+
+def optimize_groove(spec: DesignSpec, objective=OBJECTIVE_YIELD, required_ppm=None,
+                    n_samples=None, bound_pct=BOUND_PCT, seed=None) -> OptimizeResult:
+    """
+    搜尋溝槽公稱值 (成本模式另含公差)；O-Ring 尺寸、拉伸、目標區間維持不變。
+
+    objective = "yield" : 最大化綜合良率
+    objective = "cost"  : 綜合 PPM ≤ required_ppm 下最小化 Σ 1 / tol
+    """
+    if not spec.has_oring:
+        raise ValueError("O-Ring 尺寸必須大於 0")
+    if objective not in (OBJECTIVE_YIELD, OBJECTIVE_COST):
+        raise ValueError(f"未知的最佳化目標: {objective}")
+    if objective == OBJECTIVE_COST and (required_ppm is None or required_ppm <= 0):
+        raise ValueError("成本模式需指定大於 0 的 required_ppm")
+    t0 = time.perf_counter()
+    if n_samples is None:
+        n_samples = OPT_SAMPLES
+        if objective == OBJECTIVE_COST:
+            # 需求 PPM 越低，需要越多樣本才解析得到
+            n_samples = min(MAX_OPT_SAMPLES, max(OPT_SAMPLES, math.ceil(MIN_FAILURES * 1e6 / required_ppm)))
+
+    # 搜尋在前 search_samples 列上進行 (common_normals 的前段即較小樣本數的結果)，最終設計再以全部樣本驗證
+    z = common_normals(spec, n_samples, seed)
+    search_samples = min(n_samples, SEARCH_SAMPLES)
+    evaluate = _Evaluator(spec, z[:search_samples])
+    verify = _Evaluator(spec, z) if search_samples < n_samples else evaluate
+    groove = spec.groove_dims()
+    names = [name for name, _ in groove]
+    start = {name: d.nom for name, d in groove}
+    nominal = np.array([d.nom for _, d in groove])
+    lower = np.maximum(nominal * (1 - bound_pct / 100), RESOLUTION)
+    upper = nominal * (1 + bound_pct / 100)
+
+    start_yield = float(verify({n: np.array([v]) for n, v in start.items()})[0][0])
+    best_noms = _pattern_search(evaluate, names, start, lower, upper)
+    tols = {name: d.tol for name, d in groove}
+
+    if objective == OBJECTIVE_COST:
+        tols = _relax_tolerances(spec, evaluate, best_noms, tols, required_ppm) or tols
+        sigmas = {name: tols[name] / (3 * d.cpk) if d.cpk > 0 else 0.0 for name, d in groove}
+        best_noms = _pattern_search(evaluate, names, best_noms, lower, upper, sigmas)
+
+    def final_yield_of(t):
+        dims = _with_groove(spec, best_noms, t).groove_dims()
+        return float(verify({n: np.array([v]) for n, v in best_noms.items()},
+                            {name: np.array([d.sigma]) for name, d in dims})[0][0])
+
+    final_yield = final_yield_of(tols)
+    target_met = True
+    if objective == OBJECTIVE_COST:
+        # 搜尋樣本較少 → 全部樣本上可能略超過需求：等比收緊放寬過的公差直到達標
+        for _ in range(MAX_TOL_STEPS):
+            if (100 - final_yield) * 1e4 <= required_ppm:
+                break
+            tighter = _floor_tols(spec, {n: t / TOL_STEP for n, t in tols.items()})
+            if tighter == tols:
+                break
+            tols = tighter
+            final_yield = final_yield_of(tols)
+        target_met = (100 - final_yield) * 1e4 <= required_ppm
+
+    best_spec = _with_groove(spec, best_noms, tols)
+    return OptimizeResult(
+        objective=objective,
+        spec=best_spec,
+        start_yield=start_yield,
+        yield_combined=final_yield,
+        start_cost=tolerance_cost(spec),
+        cost=tolerance_cost(best_spec),
+        required_ppm=required_ppm,
+        n_samples=n_samples,
+        n_evals=evaluate.n_evals + (verify.n_evals if verify is not evaluate else 0),
+        search_samples=search_samples,
+        elapsed_s=time.perf_counter() - t0,
+        target_met=target_met,
+    )
+
+
+def _relax_tolerances(spec: DesignSpec, evaluate, noms, tols, required_ppm):
+    """
+    貪婪法調整公差：先等比收緊直到滿足需求 PPM，再逐次放寬「成本下降最多且仍達標」的尺寸。
+    公差向下取整到圖面解析度，確保取整後不會變鬆。
+    溝槽公差為 0 仍無法達標 (O-Ring 公差主導) → None。
+    """
+    groove = dict(spec.groove_dims())
+    names = [n for n, d in groove.items() if tols[n] > 0 and d.cpk > 0]
+    if not names:
+        return tols
+    noms_1 = {n: np.array([v]) for n, v in noms.items()}
+
+    def sigmas_of(t):
+        return {n: np.array([t[n] / (3 * groove[n].cpk)]) for n in names}
+
+    def ppm_of(t):
+        return (100 - evaluate(noms_1, sigmas_of(t))[0][0]) * 10000
+
+    if ppm_of({n: 0.0 for n in names}) > required_ppm:
+        return None
+    tols = dict(tols)
+    for _ in range(MAX_TOL_STEPS):
+        if ppm_of(tols) <= required_ppm:
+            break
+        tols = {n: tols[n] / TOL_STEP if n in names else tols[n] for n in tols}
+
+    for _ in range(MAX_TOL_STEPS):
+        # 每個尺寸放寬一步 → 一次批次評估所有候選
+        cand = [{**tols, n: tols[n] * TOL_STEP} for n in names]
+        noms_k = {n: np.repeat(v, len(cand)) for n, v in noms_1.items()}
+        sig_k = {n: np.array([c[n] / (3 * groove[n].cpk) for c in cand]) for n in names}
+        ppm = (100 - evaluate(noms_k, sig_k)[0]) * 10000
+        ok = [i for i in range(len(cand)) if ppm[i] <= required_ppm]
+        if not ok:
+            break
+        # 放寬哪個尺寸成本下降最多：Δ(1/tol) = 1/tol - 1/(tol·step)
+        best = max(ok, key=lambda i: 1 / tols[names[i]] - 1 / cand[i][names[i]])
+        tols = cand[best]
+    return _floor_tols(spec, tols)
+
+
+def _floor_tols(spec: DesignSpec, tols):
+    """可調整的公差 (> 0 且 Cpk > 0) 向下取整到圖面解析度，至少一個解析度"""
+    groove = dict(spec.groove_dims())
+    return {n: max(math.floor(t / RESOLUTION + 1e-9), 1) * RESOLUTION if t > 0 and groove[n].cpk > 0 else t
+            for n, t in tols.items()}
+
+
+@tracked_cache(maxsize=8)
+def run_optimize(spec: DesignSpec, objective=OBJECTIVE_YIELD, required_ppm=None, n_samples=None,
+                 bound_pct=BOUND_PCT) -> OptimizeResult:
+    """以 DesignSpec 為 key 的快取入口"""
+    return optimize_groove(spec, objective, required_ppm, n_samples, bound_pct)
@@ -0,0 +1,193 @@
+"""
+增量重算 (Incremental recomputation)
+
+蒙地卡羅流程拆成相依圖，每個節點只保留最近一次的輸出與其 key
+(spec 中該節點直接讀取的欄位 + 上游節點的 key)；重算時由上游往下比對，只重算 key 改變的節點：
+
+    noise ─┬─ oring ──┬─ ratios ─┬─ moments ─┐
+           └─ groove ─┘          ├─ hists ───┼─ stats
+                                 └─ masks ───┘
+
+- noise：各批次的標準常態 z (CHUNK_SIZE 分塊、SeedSequence.spawn，同 simulate)；只與 seed、樣本數、抽樣方法
+  及參與抽樣的尺寸有關 → 修改公稱值 / 公差不重新抽亂數
+  (random：rng.normal(nom, σ) 與 nom + σ·z 逐位元相同；lhs / sobol：同 ratios_from_z)
+- oring：O-Ring 尺寸 nom + σ·z 並套用拉伸收縮；groove：溝槽尺寸；ratios：壓縮率 / 填充率 (comp_mode)
+- moments：逐批次 Chan 合併 (同 _Accumulator)；hists：直方圖 counts (key 為 bin 邊界，只保留 counts)
+- masks：目標區間的合格遮罩 → 合格數；stats：以 _Accumulator.from_counts 組成 SimResult
+結果與 simulate(spec) 逐位元相同。圖表與 PDF 在介面端以內容為 key 快取 (直方圖 counts / 報告輸入)，即最下游的節點。
+
+只支援 random / lhs / sobol、standard 記憶體模式、無實測資料、非自適應且樣本數 ≤ MAX_SAMPLES (supports())；
+其餘情況 (例如重要性抽樣的權重與目標區間有關) 請用 run_simulation。
+每個 Pipeline 保留 noise / oring / groove / ratios 的陣列，約 (參與抽樣的尺寸數 + 8) × 8 bytes × 樣本數
+(estimated_bytes)，最多 MAX_BYTES (約 50 MiB)。介面每個 session 一個。
+"""
+import time
+from dataclasses import dataclass, replace
+from typing import Callable
+
+import numpy as np
+
+from .analytic import histogram_edges
+from .engine import (
+    CHUNK_SIZE, Histogram, SimResult, _Accumulator, _groove_geometry, _merge_moments, _oring_geometry,
+    apply_stretch, compute_ratios,
+)
+from .sampling import SAMPLER_RANDOM, SAMPLER_LHS, SAMPLER_SOBOL, standard_normals
+from .spec import MEMORY_STANDARD, DesignSpec
+
+MAX_SAMPLES = 500_000
+SAMPLERS = (SAMPLER_RANDOM, SAMPLER_LHS, SAMPLER_SOBOL)
+_KEPT_ARRAYS = 8  # oring (h, w, area) + groove (depth, width, area) + ratios (壓縮率, 填充率)
+MAX_BYTES = (5 + _KEPT_ARRAYS) * 8 * MAX_SAMPLES  # 最多 5 個抽樣尺寸 (異形 O-Ring 2 個 + 梯形溝槽 3 個)，約 50 MiB
+
+
+def estimated_bytes(spec: DesignSpec) -> int:
+    """Pipeline 執行此設計後保留的陣列大小 (bytes)"""
+    return (len(_noise_slots(spec)) + _KEPT_ARRAYS) * 8 * int(spec.sim_count)
+
+
+def supports(spec: DesignSpec) -> bool:
+    """此設計可否以 Pipeline 增量計算 (否則請用 run_simulation)"""
+    return (spec.has_oring and spec.sampler in SAMPLERS and spec.memory_mode == MEMORY_STANDARD
+            and not spec.measurements and not spec.ci_width_ppm and 0 < int(spec.sim_count) <= MAX_SAMPLES)
+
+
+def _noise_slots(spec: DesignSpec):
+    """z 欄位對應的尺寸名稱：random 只有 σ > 0 的尺寸會消耗亂數 (同 generate_dim)，lhs / sobol 為全部尺寸"""
+    if spec.sampler == SAMPLER_RANDOM:
+        return tuple(name for name, d in spec.active_dims() if d.sigma != 0)
+    return tuple(name for name, _ in spec.active_dims())
+
+
+def _noise(spec: DesignSpec):
+    """→ (SeedSequence entropy, {尺寸名稱: z})"""
+    size = int(spec.sim_count)
+    slots = _noise_slots(spec)
+    root = np.random.SeedSequence(spec.seed)
+    starts = range(0, size, CHUNK_SIZE)
+    z = np.empty((len(slots), size))
+    for start, seed_seq in zip(starts, root.spawn(len(starts))):
+        n = min(CHUNK_SIZE, size - start)
+        rng = np.random.default_rng(seed_seq)
+        if spec.sampler == SAMPLER_RANDOM:
+            # 依序逐尺寸抽 n 個 (與 sample_oring / sample_groove 的亂數順序相同)
+            z[:, start:start + n] = rng.standard_normal((len(slots), n))
+        else:
+            z[:, start:start + n] = standard_normals(spec.sampler, n, len(slots), rng).T
+    z.flags.writeable = False
+    return root.entropy, dict(zip(slots, z))
+
+
+def _dim_values(spec: DesignSpec, dims, noise):
+    _, z = noise
+    size = int(spec.sim_count)
+    return {name: d.nom + d.sigma * z[name] if name in z else np.full(size, d.nom) for name, d in dims}
+
+
+def _ratios(spec: DesignSpec, stretched, groove):
+    compression, fill = compute_ratios(spec, *stretched, *groove)
+    compression.flags.writeable = False
+    fill.flags.writeable = False
+    return compression, fill
+
+
+def _moments(spec: DesignSpec, ratios):
+    """各批次 (mean, M2) 先在批次內、再依批次順序合併，運算順序同 simulate 的 _Accumulator"""
+    size = int(spec.sim_count)
+    moments = {}
+    for key, values in zip(("comp", "fill"), ratios):
+        w, total = 0, (0.0, 0.0)
+        for start in range(0, size, CHUNK_SIZE):
+            block = values[start:start + CHUNK_SIZE]
+            mean_b = float(np.mean(block))
+            block_moments = _merge_moments(0, (0.0, 0.0), len(block), mean_b, float(np.sum((block - mean_b)**2)))
+            total = _merge_moments(w, total, len(block), *block_moments)
+            w += len(block)
+        moments[key] = total
+    return moments
+
+
+def _hists(spec: DesignSpec, ratios):
+    """→ (壓縮率, 填充率) 直方圖；整個陣列一次計數，counts 與 simulate 逐批次累加相同"""
+    hists = []
+    for edges, values in zip(histogram_edges(spec), ratios):
+        hist = Histogram.empty(edges)
+        hist.add(values)
+        hists.append(hist)
+    return tuple(hists)
+
+
+def _masks(spec: DesignSpec, ratios):
+    """→ (壓縮率合格數, 填充率合格數, 綜合合格數)"""
+    compression, fill = ratios
+    pass_comp = (compression >= spec.target_comp_min) & (compression <= spec.target_comp_max)
+    pass_fill = (fill >= spec.target_fill_min) & (fill <= spec.target_fill_max)
+    return (int(np.count_nonzero(pass_comp)), int(np.count_nonzero(pass_fill)),
+            int(np.count_nonzero(pass_comp & pass_fill)))
+
+
+def _stats(spec: DesignSpec, noise, ratios, moments, hists, passes) -> SimResult:
+    acc = _Accumulator.from_counts(spec, spec.sim_count, passes, moments, *hists)
+    return acc.result(noise[0], *ratios)
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    inputs: tuple       # 上游節點名稱
+    key: Callable       # spec → 本節點直接讀取的欄位
+    compute: Callable   # (spec, *上游輸出) → 輸出
+
+
+def _edges_key(spec: DesignSpec):
+    return tuple(edges.tobytes() for edges in histogram_edges(spec))
+
+
+# 依拓撲順序排列
+NODES = (
+    Node("noise", (), lambda s: (s.seed, int(s.sim_count), s.sampler, _noise_slots(s)), _noise),
+    Node("oring", ("noise",), lambda s: (s.oring_type, tuple(s.oring_dims()), s.stretch_pct),
+         lambda s, noise: apply_stretch(s, *_oring_geometry(s, _dim_values(s, s.oring_dims(), noise)))),
+    Node("groove", ("noise",), lambda s: (s.groove_type, tuple(s.groove_dims())),
+         lambda s, noise: _groove_geometry(s, _dim_values(s, s.groove_dims(), noise))),
+    Node("ratios", ("oring", "groove"), lambda s: s.comp_mode, _ratios),
+    Node("moments", ("ratios",), lambda s: (), _moments),
+    Node("hists", ("ratios",), _edges_key, _hists),
+    Node("masks", ("ratios",), lambda s: (s.target_comp_min, s.target_comp_max, s.target_fill_min, s.target_fill_max),
+         _masks),
+    Node("stats", ("noise", "ratios", "moments", "hists", "masks"), lambda s: s, _stats),
+)
+
+
+class Pipeline:
+    """
+    增量蒙地卡羅：每個節點快取最近一次的 (key, 輸出)，run() 只重算 key 改變的節點
+    last_run 記錄上次 run() 各節點的 (名稱, 耗時 s, 是否沿用)
+    """
+
+    def __init__(self, nodes=NODES):
+        self.nodes = nodes
+        self._cache = {}
+        self.last_run = []
+
+    def run(self, spec: DesignSpec) -> SimResult:
+        """結果與 simulate(spec) 相同；stage_s 為本次各節點的計算耗時 (沿用的節點為 0)"""
+        if not supports(spec):
+            raise ValueError("此設計不支援增量計算，請改用 run_simulation")
+        keys, outputs, run = {}, {}, []
+        for node in self.nodes:
+            key = (node.key(spec), tuple(keys[name] for name in node.inputs))
+            cached = self._cache.get(node.name)
+            t0 = time.perf_counter()
+            if cached is not None and cached[0] == key:
+                output = cached[1]
+            else:
+                output = node.compute(spec, *(outputs[name] for name in node.inputs))
+                self._cache[node.name] = (key, output)
+            run.append((node.name, time.perf_counter() - t0, cached is not None and cached[1] is output))
+            keys[node.name], outputs[node.name] = key, output
+        self.last_run = run
+        return replace(outputs["stats"], stage_s={name: seconds for name, seconds, _ in run})
+
+    def clear(self):
+        self._cache.clear()
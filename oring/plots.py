@@ -0,0 +1,179 @@
+"""
+報告用圖表 (matplotlib)：直方圖、CAD 示意圖
+
+畫面 (Streamlit) 與 PDF 報告 (含多設計彙整報告的 worker 行程) 共用同一套繪圖函式，
+皆直接輸出 PNG bytes (示意圖依繪圖輸入快取；PDF 報告另以 ReportLab 向量繪製，見 report.draw_cad_schematic_vector)。
+figure 以 matplotlib.figure.Figure 建立 (不經 pyplot)：
+不載入 pyplot / GUI backend、不進入 pyplot 的全域 figure 清單，用完即可回收。
+中文字型只在第一次使用時搜尋一次並快取。
+"""
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+import matplotlib.patches as patches
+import matplotlib.font_manager as fm
+from matplotlib.figure import Figure
+
+from .engine import oring_display_dims
+from .spec import AXIAL, RECTANGULAR, DesignSpec
+from .timing import tracked_cache
+
+FILL_COLOR = '#FF9800'
+
+
+def comp_color(mode):
+    """壓縮率直方圖顏色：軸向綠色、徑向藍色"""
+    return '#4CAF50' if mode == AXIAL else '#2196F3'
+
+
+@lru_cache(maxsize=1)
+def get_chinese_font():
+    """可用的中文字型名稱 (沒有則為 None)；只掃描一次字型清單"""
+    font_names = {f.name for f in fm.fontManager.ttflist}
+    preferred_fonts = ['Microsoft YaHei', 'SimHei', 'Arial Unicode MS', 'PingFang SC', 'Heiti TC']
+    for font in preferred_fonts:
+        if font in font_names:
+            return font
+    return None
+
+
+@lru_cache(maxsize=8)
+def font_properties(font_name, size):
+    """字型名稱 → FontProperties (findfont 只解析一次)；font_name 為 None 時回傳 None"""
+    if not font_name:
+        return None
+    return fm.FontProperties(fname=fm.findfont(font_name), size=size)
+
+
+def new_figure(figsize, dpi=None):
+    """不經 pyplot 建立 figure"""
+    return Figure(figsize=figsize, dpi=dpi)
+
+
+def fig_to_png(fig, dpi=150):
+    """圖表只 savefig 一次：畫面 (st.image) 與 PDF 共用同一份 PNG；輸出後清空 figure 釋放 artists"""
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi, bbox_inches='tight', transparent=True)
+    fig.clear()
+    return buf.getvalue()
+
+
+def hist_png(edges, counts, color, t_min, t_max, title):
+    """由預先分箱的 counts 繪製分佈圖 PNG (成本與樣本數無關)"""
+    fig = new_figure((6, 2.5))
+    ax = fig.subplots()
+    total = counts.sum()
+    density = counts / (total * np.diff(edges)) if total else counts.astype(float)
+    ax.stairs(density, edges, fill=True, color=color, alpha=0.7)
+    ax.axvline(t_min, color='r', ls='--'); ax.axvline(t_max, color='r', ls='--')
+    ax.set_title(title, fontsize=10)
+    return fig_to_png(fig)
+
+
+def overlay_hist_png(hists, labels, t_min, t_max, title):
+    """多情境分佈疊圖 PNG (各情境的 Histogram 以密度階梯線繪製，bin 邊界可不同)"""
+    fig = new_figure((6, 2.8))
+    ax = fig.subplots()
+    for hist, label in zip(hists, labels):
+        total = hist.total
+        density = hist.counts / (total * np.diff(hist.edges)) if total else hist.counts.astype(float)
+        ax.stairs(density, hist.edges, lw=1.2, label=label)
+    ax.axvline(t_min, color='r', ls='--'); ax.axvline(t_max, color='r', ls='--')
+    ax.set_title(title, fontsize=10)
+    ax.legend(fontsize=6, ncol=2 if len(labels) > 4 else 1)
+    return fig_to_png(fig)
+
+
+def draw_cad_schematic_v11(groove_type, w_top, w_btm, depth, oring_w, oring_h, mode, font_name):
+    fig = new_figure((3, 1.8), dpi=250)
+    ax = fig.subplots()
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+    title_size = 9
+    label_size = 6
+    title_font = font_properties(font_name, title_size)
+    label_font = font_properties(font_name, label_size)
+    lbl_top = "上底" if font_name else "Top"
+    lbl_btm = "下底" if font_name else "Bottom"
+    lbl_h = "高" if font_name else "Height"
+    dim_lw = 0.5
+    main_lw = 1.0
+
+    if mode == AXIAL:
+        margin = max(w_top, w_btm) * 0.5
+        verts = [
+            (-w_top/2 - margin, depth), (-w_top/2, depth),
+            (-w_btm/2, 0), (w_btm/2, 0),
+            (w_top/2, depth), (w_top/2 + margin, depth),
+            (w_top/2 + margin, -depth*0.2), (-w_top/2 - margin, -depth*0.2)
+        ]
+        poly = patches.Polygon(verts, facecolor='#e0e0e0', edgecolor='black', hatch='///', lw=dim_lw)
+        ax.add_patch(poly)
+        oring = patches.Ellipse((0, oring_h/2), width=oring_w, height=oring_h,
+                                facecolor='#ffab91', edgecolor='red', alpha=0.8, lw=main_lw)
+        ax.add_patch(oring)
+        ax.annotate("", xy=(w_top/2+margin*0.2, depth), xytext=(w_top/2+margin*0.2, 0), arrowprops=dict(arrowstyle='<->', lw=dim_lw))
+        ax.text(w_top/2+margin*0.4, depth/2, lbl_h, va='center', fontproperties=label_font)
+        ax.set_xlim(-w_top/2 - margin - 1, w_top/2 + margin + 1)
+        ax.set_ylim(-depth*0.5, depth*1.5)
+        ax.set_title("Axial", fontproperties=title_font)
+    else:
+        h_half = depth / 2
+        x_left = 0
+        x_right_top = w_top
+        x_right_btm = w_btm
+        ax.plot([x_left, x_left], [h_half, -h_half], color='#004d40', lw=main_lw)
+        ax.plot([x_right_top, x_right_btm], [h_half, -h_half], color='#004d40', lw=main_lw)
+        ax.plot([x_left, x_right_top], [h_half, h_half], color='#004d40', lw=main_lw)
+        ax.plot([x_left, x_right_btm], [-h_half, -h_half], color='#004d40', lw=main_lw)
+        oring_x_center = oring_w / 2
+        oring = patches.Ellipse((oring_x_center, 0), width=oring_w, height=oring_h,
+                                facecolor='#90a4ae', edgecolor='#004d40', lw=main_lw, alpha=0.7)
+        ax.add_patch(oring)
+        ax.text(x_right_top/2, h_half + depth*0.1, lbl_top, ha='center', va='bottom', fontproperties=label_font)
+        ax.text(x_right_btm/2, -h_half - depth*0.1, lbl_btm, ha='center', va='top', fontproperties=label_font)
+        ax.annotate("", xy=(x_left - depth*0.1, h_half), xytext=(x_left - depth*0.1, -h_half), arrowprops=dict(arrowstyle='<->', lw=dim_lw, color='#004d40'))
+        ax.text(x_left - depth*0.2, 0, lbl_h, ha='right', va='center', fontproperties=label_font, color='#004d40')
+        max_w = max(w_top, w_btm, oring_w)
+        margin_x = max_w * 0.5
+        margin_y = depth * 0.5
+        ax.set_xlim(x_left - margin_x*0.5, max_w + margin_x)
+        ax.set_ylim(-h_half - margin_y, h_half + margin_y)
+        ax.set_title("Radial", fontproperties=title_font)
+    return fig
+
+
+def groove_plot_dims(spec: DesignSpec):
+    """示意圖用溝槽公稱 (上底, 下底, 高)"""
+    if spec.groove_type == RECTANGULAR:
+        return spec.g_width.nom, spec.g_width.nom, spec.g_depth.nom
+    return spec.g_wtop.nom, spec.g_wbtm.nom, spec.g_depth.nom
+
+
+def schematic_geometry(spec: DesignSpec):
+    """
+    DesignSpec → 示意圖的實際繪圖輸入 (groove_type, 上底, 下底, 高, O-Ring 顯示寬, 顯示高, comp_mode)
+    溝槽高度為 0 時回傳 None；PNG 快取與 PDF 向量示意圖皆以此 tuple 為輸入
+    """
+    w_top, w_btm, depth = groove_plot_dims(spec)
+    if depth <= 0:
+        return None
+    oring_w, oring_h = oring_display_dims(spec)
+    return (spec.groove_type, float(w_top), float(w_btm), float(depth), float(oring_w), float(oring_h), spec.comp_mode)
+
+
+@tracked_cache(maxsize=32)
+def cad_schematic_png(groove_type, w_top, w_btm, depth, oring_w, oring_h, mode, font_name=None, dpi=200):
+    """CAD 示意圖 PNG，依實際繪圖輸入快取：幾何未變的 rerun / 重複設計不重繪"""
+    fig = draw_cad_schematic_v11(groove_type, w_top, w_btm, depth, oring_w, oring_h, mode, font_name)
+    return fig_to_png(fig, dpi=dpi)
+
+
+def schematic_png(spec: DesignSpec, font_name=None, dpi=200):
+    """DesignSpec → CAD 示意圖 PNG；溝槽高度為 0 時回傳 None"""
+    geometry = schematic_geometry(spec)
+    if geometry is None:
+        return None
+    return cad_schematic_png(*geometry, font_name, dpi)
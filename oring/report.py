@@ -0,0 +1,737 @@
+"""
+PDF 報告 (ReportLab)，不依賴 Streamlit
+
+- build_oring_pdf_report : 單一設計報告 (Streamlit 下載按鈕使用)
+- build_batch_report     : 多設計彙整報告 (設計審查用)，首頁為所有設計的綜合良率 / PPM 總表，
+                           其後為各設計頁 (同單一設計報告版面)，總表各列可點擊跳至該設計
+
+    python -m oring.report designs.csv -o review.pdf --logo logo.png
+
+彙整報告先在行程池中計算所有設計 (串流模式，只回傳直方圖 counts) 以產生總表，再依序組頁；
+直方圖與示意圖都以 ReportLab 向量繪製 (draw_histogram_vector / draw_cad_schematic_vector)，不產生 / 嵌入 PNG。
+ReportLab Canvas 在 save() 前保留所有頁面內容，記憶體隨設計數線性增加，但每個設計只有數 KB 的向量指令。
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageFile
+from reportlab.lib.colors import HexColor, black
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .batch import DEFAULT_SEED, ENGINE_ANALYTIC, ENGINE_MC, compute, design_specs, read_designs
+from .plots import FILL_COLOR, comp_color, schematic_geometry
+from .spec import AXIAL, DesignSpec
+from .sweep import DIM_LABELS
+
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+PAGE_SIZE = landscape(A4)
+SUMMARY_ROWS = 24          # 總表每頁列數
+
+
+def ascii_only(s: str) -> str:
+    """只保留 ASCII 字元"""
+    return "".join(ch for ch in str(s) if ord(ch) < 128)
+
+
+@lru_cache(maxsize=4)
+def prepare_watermark(logo_bytes):
+    """Logo → 淡化、只保留藍色 logo 區域的 RGBA PNG (HSV 遮罩 + 與白色混合)；失敗時回傳 None"""
+    try:
+        img_logo = Image.open(BytesIO(logo_bytes)).convert("RGBA")
+        img_rgb = img_logo.convert("RGB")
+        img_hsv = img_rgb.convert("HSV")
+        h, s, v = img_hsv.split()
+        h_arr = np.array(h, dtype=np.uint8)
+        s_arr = np.array(s, dtype=np.uint8)
+        v_arr = np.array(v, dtype=np.uint8)
+        mask = ((s_arr > 60) & (v_arr > 50) & (h_arr >= 120) & (h_arr <= 210))
+        alpha_arr = np.where(mask, 100, 0).astype("uint8")
+        alpha = Image.fromarray(alpha_arr, mode="L")
+        white = Image.new("RGB", img_rgb.size, (255, 255, 255))
+        light_rgb = Image.blend(white, img_rgb, 0.18)
+        img_final = Image.merge("RGBA", (*light_rgb.split(), alpha))
+        buf_logo = BytesIO()
+        img_final.save(buf_logo, format="PNG")
+        return buf_logo.getvalue()
+    except Exception:
+        return None
+
+
+def _watermarker(c, logo_bytes):
+    """回傳在目前頁面最上層繪製浮水印的函式 (無 logo 時不繪製)"""
+    width, height = PAGE_SIZE
+    watermark_png = prepare_watermark(logo_bytes) if logo_bytes else None
+    logo_reader = ImageReader(BytesIO(watermark_png)) if watermark_png else None
+
+    def draw_watermark():
+        if not logo_reader: return
+        c.saveState()
+        img_w, img_h = logo_reader.getSize()
+        target_w = width * 0.55
+        scale = target_w / float(img_w)
+        draw_w = img_w * scale
+        draw_h = img_h * scale
+        c.translate(width / 2.0, height / 2.0)
+        c.rotate(45)
+        # 繪製浮水印 (因為是最後繪製，所以會在最上層)
+        c.drawImage(logo_reader, -draw_w/2.0, -draw_h/2.0, width=draw_w, height=draw_h, mask="auto")
+        c.restoreState()
+
+    return draw_watermark
+
+
+def _arrow(c, x1, y1, x2, y2, head=1.2 * mm):
+    """雙向箭頭 (尺寸標註線)"""
+    c.line(x1, y1, x2, y2)
+    length = math.hypot(x2 - x1, y2 - y1) or 1.0
+    ux, uy = (x2 - x1) / length, (y2 - y1) / length
+    for (px, py), sgn in (((x1, y1), 1), ((x2, y2), -1)):
+        bx, by = px + sgn * ux * head, py + sgn * uy * head
+        p = c.beginPath()
+        p.moveTo(px, py)
+        p.lineTo(bx - uy * head * 0.35, by + ux * head * 0.35)
+        p.lineTo(bx + uy * head * 0.35, by - ux * head * 0.35)
+        p.close()
+        c.drawPath(p, stroke=0, fill=1)
+
+
+def _polygon(c, points):
+    p = c.beginPath()
+    p.moveTo(*points[0])
+    for pt in points[1:]:
+        p.lineTo(*pt)
+    p.close()
+    return p
+
+
+def draw_cad_schematic_vector(c, x, y, max_w, max_h, groove_type, w_top, w_btm, depth, oring_w, oring_h, mode):
+    """
+    CAD 示意圖以 ReportLab 向量繪製 (幾何同 plots.draw_cad_schematic_v11，輸入為 plots.schematic_geometry)
+    (x, y) 為左上角，等比例縮放至 max_w × max_h 內；回傳實際繪製高度
+    """
+    title_h = 7 * mm
+    gutter = 0 if mode == AXIAL else 12 * mm   # 徑向的高度標註在溝槽左側
+    if mode == AXIAL:
+        margin = max(w_top, w_btm) * 0.5
+        x_lim = (-w_top/2 - margin - 1, w_top/2 + margin + 1)
+        y_lim = (-depth*0.5, depth*1.5)
+    else:
+        h_half = depth / 2
+        max_dim = max(w_top, w_btm, oring_w)
+        x_lim = (-max_dim * 0.25, max_dim * 1.5)
+        y_lim = (-h_half - depth*0.5, h_half + depth*0.5)
+    scale = min((max_w - gutter) / (x_lim[1] - x_lim[0]), (max_h - title_h) / (y_lim[1] - y_lim[0]))
+    plot_w = (x_lim[1] - x_lim[0]) * scale
+    plot_h = (y_lim[1] - y_lim[0]) * scale
+    x0, y0 = x + gutter, y - title_h - plot_h
+
+    def P(px, py):
+        return x0 + (px - x_lim[0]) * scale, y0 + (py - y_lim[0]) * scale
+
+    def ellipse(cx, cy, w, h, fill_hex, stroke_hex, alpha):
+        (ex1, ey1), (ex2, ey2) = P(cx - w/2, cy - h/2), P(cx + w/2, cy + h/2)
+        c.setFillColor(HexColor(fill_hex)); c.setFillAlpha(alpha)
+        c.setStrokeColor(HexColor(stroke_hex)); c.setLineWidth(1.0)
+        c.ellipse(ex1, ey1, ex2, ey2, stroke=1, fill=1)
+        c.setFillAlpha(1)
+
+    c.saveState()
+    c.setFont("Helvetica", 11)
+    c.drawCentredString(x0 + plot_w / 2, y - title_h + 2 * mm, "Axial" if mode == AXIAL else "Radial")
+    c.setFont("Helvetica", 8)
+    if mode == AXIAL:
+        verts = [P(vx, vy) for vx, vy in (
+            (-w_top/2 - margin, depth), (-w_top/2, depth),
+            (-w_btm/2, 0), (w_btm/2, 0),
+            (w_top/2, depth), (w_top/2 + margin, depth),
+            (w_top/2 + margin, -depth*0.2), (-w_top/2 - margin, -depth*0.2))]
+        c.setFillColor(HexColor("#e0e0e0")); c.setStrokeColor(black); c.setLineWidth(0.5)
+        c.drawPath(_polygon(c, verts), stroke=1, fill=1)
+        # 剖面線 (///)：以多邊形為裁切範圍畫 45° 斜線
+        c.saveState()
+        c.clipPath(_polygon(c, verts), stroke=0, fill=0)
+        c.setLineWidth(0.4)
+        xs = [v[0] for v in verts]; ys = [v[1] for v in verts]
+        span = max(ys) - min(ys)
+        step = 3 * mm
+        hx = min(xs) - span
+        while hx < max(xs):
+            c.line(hx, min(ys), hx + span, max(ys))
+            hx += step
+        c.restoreState()
+        ellipse(0, oring_h/2, oring_w, oring_h, "#ffab91", "#ff0000", 0.8)
+        c.setStrokeColor(black); c.setFillColor(black); c.setLineWidth(0.5)
+        _arrow(c, *P(w_top/2 + margin*0.2, 0), *P(w_top/2 + margin*0.2, depth))
+        tx, ty = P(w_top/2 + margin*0.4, depth/2)
+        c.drawString(tx, ty - 1 * mm, "Height")
+    else:
+        dark = HexColor("#004d40")
+        c.setStrokeColor(dark); c.setLineWidth(1.0)
+        for (ax, ay), (bx, by) in (((0, h_half), (0, -h_half)), ((w_top, h_half), (w_btm, -h_half)),
+                                   ((0, h_half), (w_top, h_half)), ((0, -h_half), (w_btm, -h_half))):
+            c.line(*P(ax, ay), *P(bx, by))
+        ellipse(oring_w / 2, 0, oring_w, oring_h, "#90a4ae", "#004d40", 0.7)
+        c.setFillColor(black)
+        tx, ty = P(w_top / 2, h_half + depth*0.1)
+        c.drawCentredString(tx, ty, "Top")
+        tx, ty = P(w_btm / 2, -h_half - depth*0.1)
+        c.drawCentredString(tx, ty - 2.5 * mm, "Bottom")
+        c.setStrokeColor(dark); c.setFillColor(dark); c.setLineWidth(0.5)
+        _arrow(c, *P(-depth*0.1, -h_half), *P(-depth*0.1, h_half))
+        tx, ty = P(-depth*0.2, 0)
+        c.drawRightString(tx, ty - 1 * mm, "Height")
+    c.restoreState()
+    return title_h + plot_h
+
+
+def _nice_ticks(lo, hi, n=5):
+    """約 n 個整齊的刻度 (1 / 2 / 5 × 10^k)"""
+    raw = (hi - lo) / max(n, 1) or 1.0
+    mag = 10 ** math.floor(math.log10(raw))
+    step = next(m * mag for m in (1, 2, 5, 10) if m * mag >= raw)
+    return np.arange(math.ceil(lo / step) * step, hi + step * 1e-9, step)
+
+
+def draw_histogram_vector(c, x, y, w, h, edges, counts, color, t_min, t_max, title):
+    """
+    分佈圖以 ReportLab 向量繪製 (同 plots.hist_png：密度階梯填色 + 目標區間虛線)
+    (x, y) 為左上角，w × h 含標題與刻度
+    """
+    title_h, axis_h = 5 * mm, 5 * mm
+    px0, py0 = x, y - h + axis_h
+    pw, ph = w, h - title_h - axis_h
+    edges = np.asarray(edges, dtype=float)
+    counts = np.asarray(counts, dtype=float)
+    total = counts.sum()
+    density = counts / (total * np.diff(edges)) if total else counts
+    top = float(density.max()) * 1.05 or 1.0
+    x_lo, x_hi = float(edges[0]), float(edges[-1])
+    span = (x_hi - x_lo) or 1.0
+
+    def X(v):
+        return px0 + (v - x_lo) / span * pw
+
+    c.saveState()
+    c.setFont("Helvetica", 9)
+    c.drawCentredString(px0 + pw / 2, y - title_h + 1.5 * mm, title)
+    p = c.beginPath()
+    p.moveTo(X(x_lo), py0)
+    for left, right, d in zip(edges[:-1], edges[1:], density):
+        yy = py0 + d / top * ph
+        p.lineTo(X(left), yy)
+        p.lineTo(X(right), yy)
+    p.lineTo(X(x_hi), py0)
+    p.close()
+    c.setFillColor(HexColor(color)); c.setFillAlpha(0.7)
+    c.drawPath(p, stroke=0, fill=1)
+    c.setFillAlpha(1)
+    c.setStrokeColor(black); c.setFillColor(black); c.setLineWidth(0.5)
+    c.rect(px0, py0, pw, ph, stroke=1, fill=0)
+    c.setFont("Helvetica", 7)
+    for tick in _nice_ticks(x_lo, x_hi):
+        c.line(X(tick), py0, X(tick), py0 - 1 * mm)
+        c.drawCentredString(X(tick), py0 - 3.5 * mm, f"{tick:g}")
+    c.setStrokeColorRGB(1, 0, 0); c.setDash(3, 2)
+    for t in (t_min, t_max):
+        if x_lo <= t <= x_hi:
+            c.line(X(t), py0, X(t), py0 + ph)
+    c.restoreState()
+
+
+def draw_oring_report(
+    c,
+    draw_watermark,
+    project_name,
+    engineer_name,
+    title,
+    input_data,       # list of dicts
+    result_data,      # list of dicts
+    verdict_data,     # dict
+    diagram_img_bytes,
+    hist_comp_bytes,
+    hist_fill_bytes,
+    method="Monte Carlo",
+    seed=None,
+    sampler=None,
+    sample_info=None,  # dict: samples / ci / stop_reason
+    optimization_info=None,  # dict: objective / start_yield / yield / n_samples (溝槽尺寸由最佳化器產生時)
+    sensitivity_data=None,   # list of dicts: name / comp_var / fill_var / ppm_half / ppm_zero
+    sensitivity_img_bytes=None,
+    diagram_geometry=None,   # plots.schematic_geometry：有值時示意圖以向量繪製 (取代 diagram_img_bytes)
+    hist_data=None,          # (壓縮率, 填充率) 各為 draw_histogram_vector 的 (edges, counts, color, t_min, t_max)：
+                             # 有值時直方圖以向量繪製 (取代 hist_comp_bytes / hist_fill_bytes)
+):
+    """在 canvas c 上由新頁開始繪製一個設計的報告頁 (最後一頁已 showPage)"""
+    width, height = PAGE_SIZE
+
+    # =================== Page 1: Header + Input + Schematic ===================
+    y = height - 15 * mm
+
+    # Header
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(20 * mm, y, "O-Ring Design Analysis Report (V1.0)")
+    y -= 12 * mm
+
+    c.setFont("Helvetica", 10)
+    c.drawString(20 * mm, y, f"Project : {ascii_only(project_name)}")
+    y -= 5 * mm
+    c.drawString(20 * mm, y, f"Engineer: {engineer_name}")
+    y -= 5 * mm
+    c.drawString(20 * mm, y, f"Title   : {ascii_only(title)}")
+    y -= 5 * mm
+    if seed is not None:
+        # 隨機種子：以相同輸入 + seed 可逐位元重現本報告結果
+        c.drawString(20 * mm, y, f"Seed    : {seed}" + (f"  |  Sampler: {sampler}" if sampler else ""))
+        y -= 5 * mm
+    y -= 5 * mm
+
+    # 1. Input Parameters
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(20 * mm, y, "1. Input Parameters (Dimension & Tolerance)")
+    y -= 10 * mm
+
+    c.setFont("Helvetica-Bold", 9)
+    c.drawString(20 * mm, y, "Item Name")
+    c.drawString(80 * mm, y, "Nominal (mm)")
+    c.drawString(110 * mm, y, "Tol (+/-)")
+    c.drawString(140 * mm, y, "Cpk")
+    y -= 6 * mm
+    c.setFont("Helvetica", 9)
+
+    for item in input_data:
+        name = item["name"]
+        nom = item.get("nom", 0.0)
+        tol = item.get("tol", 0.0)
+        cpk = item.get("cpk", 0.0)
+        c.drawString(20 * mm, y, ascii_only(name))
+        c.drawString(80 * mm, y, f"{nom:.3f}")
+        c.drawString(110 * mm, y, f"{tol:.3f}")
+        c.drawString(140 * mm, y, f"{cpk:.2f}")
+        y -= 6 * mm
+
+    if optimization_info:
+        c.setFont("Helvetica-Oblique", 8)
+        c.drawString(20 * mm, y, f"Groove dimensions optimized ({optimization_info['objective']}): combined yield "
+                                 f"{optimization_info['start_yield']:.2f} % -> {optimization_info['yield']:.2f} % "
+                                 f"on {optimization_info['n_samples']:,} common random samples")
+        y -= 5 * mm
+    
+    y -= 10 * mm
+
+    # Cad Schematic
+    if diagram_geometry:
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(20*mm, y, "Cad Schematic")
+        y -= 6 * mm
+        draw_cad_schematic_vector(c, 20*mm, y, width - 40*mm, min(y - 15*mm, 90*mm), *diagram_geometry)
+    elif diagram_img_bytes:
+        try:
+            img = ImageReader(BytesIO(diagram_img_bytes))
+            img_w, img_h = img.getSize()
+            remaining_h = y - 15 * mm
+            max_w = width - 40 * mm
+            target_h = min(remaining_h, 90 * mm)
+            scale = min(max_w / img_w, target_h / img_h)
+            draw_w = img_w * scale
+            draw_h = img_h * scale
+
+            c.setFont("Helvetica-Bold", 12)
+            c.drawString(20 * mm, y, "Cad Schematic")
+            y -= 6 * mm
+            c.drawImage(img, 20*mm, y - draw_h, width=draw_w, height=draw_h, mask="auto")
+        except:
+            pass
+
+    # Page 1 結束前繪製浮水印 (確保在最上層)
+    draw_watermark()
+    c.showPage()
+
+    # =================== Page 2: Results -> Charts -> Verdict ===================
+    y = height - 15 * mm
+
+    # 2. Simulation Results (Table)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(20 * mm, y, f"2. Simulation Results ({method})")
+    y -= 10 * mm
+
+    c.setFont("Helvetica-Bold", 9)
+    c.drawString(20 * mm, y, "Metric")
+    c.drawString(70 * mm, y, "Mean (%)")
+    c.drawString(100 * mm, y, "Yield (%)")
+    c.drawString(130 * mm, y, "Defect (PPM)")
+    c.drawString(160 * mm, y, "Target (%)")
+    y -= 6 * mm
+    c.setFont("Helvetica", 9)
+
+    for res in result_data:
+        c.drawString(20 * mm, y, ascii_only(res["item"]))
+        
+        mean_val = res['mean']
+        if isinstance(mean_val, (int, float)):
+             c.drawString(70 * mm, y, f"{mean_val:.3f}")
+        else:
+             c.drawString(70 * mm, y, str(mean_val))
+             
+        c.drawString(100 * mm, y, f"{res['yield']:.2f}")
+        c.drawString(130 * mm, y, f"{int(res['ppm'])}")
+        c.drawString(160 * mm, y, ascii_only(res['target']))
+        y -= 6 * mm
+    
+    y -= 8 * mm # 減少間距
+
+    # --- Charts (Histograms) ---
+    chart_height = 42 * mm 
+    
+    if hist_data:
+        for label, title, data in zip(("Compression Rate Distribution", "Fill Rate Distribution"),
+                                      ("Compression Distribution", "Fill Rate Distribution"), hist_data):
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(20 * mm, y, label)
+            y -= 5 * mm
+            draw_histogram_vector(c, 20 * mm, y, chart_height * 2.4, chart_height, *data, title)
+            y -= (chart_height + 8 * mm)
+        hist_comp_bytes = hist_fill_bytes = None
+
+    # Chart 1: Compression
+    if hist_comp_bytes:
+        try:
+            img = ImageReader(BytesIO(hist_comp_bytes))
+            img_w, img_h = img.getSize()
+            scale = chart_height / img_h
+            draw_w = img_w * scale
+            draw_h = chart_height
+            
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(20 * mm, y, "Compression Rate Distribution")
+            y -= 5 * mm
+            c.drawImage(img, 20*mm, y - draw_h, width=draw_w, height=draw_h, mask="auto")
+            y -= (draw_h + 8 * mm) # 減少間距
+        except:
+            pass
+
+    # Chart 2: Fill Rate
+    if hist_fill_bytes:
+        try:
+            img = ImageReader(BytesIO(hist_fill_bytes))
+            img_w, img_h = img.getSize()
+            scale = chart_height / img_h
+            draw_w = img_w * scale
+            draw_h = chart_height
+            
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(20 * mm, y, "Fill Rate Distribution")
+            y -= 5 * mm
+            c.drawImage(img, 20*mm, y - draw_h, width=draw_w, height=draw_h, mask="auto")
+            y -= (draw_h + 8 * mm) # 減少間距
+        except:
+            pass
+
+    # --- 3. Final Verdict (嘗試擠在 Page 2) ---
+    if y < 35 * mm:
+        # Page 2 結束前繪製浮水印 (確保在最上層)
+        draw_watermark()
+        c.showPage()
+        y = height - 15 * mm
+
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(20 * mm, y, "3. Final Verdict (Combined)")
+    y -= 8 * mm
+    
+    # 畫框與文字
+    c.setFillColorRGB(0.95, 0.95, 0.95) # 淺灰底
+    c.rect(20*mm, y - 15*mm, width - 40*mm, 15*mm, fill=1, stroke=0)
+    c.setFillColorRGB(0, 0, 0) # 黑字
+    
+    v_yield = verdict_data.get("yield", 0.0)
+    v_ppm = verdict_data.get("ppm", 0.0)
+    
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(25 * mm, y - 10*mm, f"Combined Yield:  {v_yield:.2f} %")
+    c.setFillColorRGB(0.8, 0, 0) # 紅字 PPM
+    c.drawString(100 * mm, y - 10*mm, f"Defect Rate:  {int(v_ppm)} PPM")
+    c.setFillColorRGB(0, 0, 0)
+
+    if sample_info:
+        ci_lo, ci_hi = sample_info["ci"]
+        c.setFont("Helvetica", 9)
+        line = f"Samples used: {sample_info['samples']:,}   |   Combined Yield 95% CI: {ci_lo:.4f} - {ci_hi:.4f} %"
+        if sample_info.get("stop_reason"):
+            line += f"   |   Adaptive stop: {sample_info['stop_reason']}"
+        c.drawString(25 * mm, y - 20*mm, line)
+
+    # =================== 4. Sensitivity (新頁) ===================
+    if sensitivity_data:
+        draw_watermark()
+        c.showPage()
+        y = height - 15 * mm
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(20 * mm, y, "4. Sensitivity (Variance Contribution)")
+        y -= 10 * mm
+
+        c.setFont("Helvetica-Bold", 9)
+        c.drawString(20 * mm, y, "Dimension")
+        c.drawString(70 * mm, y, "Comp Var (%)")
+        c.drawString(100 * mm, y, "Fill Var (%)")
+        c.drawString(130 * mm, y, "PPM @ Tol/2")
+        c.drawString(160 * mm, y, "PPM @ Tol=0")
+        y -= 6 * mm
+        c.setFont("Helvetica", 9)
+        for row in sensitivity_data:
+            c.drawString(20 * mm, y, ascii_only(row["name"]))
+            c.drawString(70 * mm, y, f"{row['comp_var']:.1f}")
+            c.drawString(100 * mm, y, f"{row['fill_var']:.1f}")
+            c.drawString(130 * mm, y, f"{int(row['ppm_half'])}")
+            c.drawString(160 * mm, y, f"{int(row['ppm_zero'])}")
+            y -= 6 * mm
+        c.setFont("Helvetica-Oblique", 8)
+        c.drawString(20 * mm, y, "Var = first-order Sobol index. PPM columns: combined PPM if only that tolerance is halved / removed.")
+        y -= 8 * mm
+
+        if sensitivity_img_bytes:
+            try:
+                img = ImageReader(BytesIO(sensitivity_img_bytes))
+                img_w, img_h = img.getSize()
+                scale = min((width - 40 * mm) / img_w, (y - 15 * mm) / img_h)
+                c.drawImage(img, 20*mm, y - img_h * scale, width=img_w * scale, height=img_h * scale, mask="auto")
+            except:
+                pass
+
+    # 最後一頁結束前繪製浮水印
+    draw_watermark()
+    c.showPage()
+
+
+def build_oring_pdf_report(project_name, engineer_name, title, input_data, result_data, verdict_data,
+                           diagram_img_bytes, hist_comp_bytes, hist_fill_bytes, sercomm_logo_bytes,
+                           **options) -> BytesIO:
+    """
+    建立 O-Ring PDF 報告（Landscape A4）
+    """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+    draw_oring_report(c, _watermarker(c, sercomm_logo_bytes), project_name, engineer_name, title,
+                      input_data, result_data, verdict_data, diagram_img_bytes, hist_comp_bytes, hist_fill_bytes,
+                      **options)
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+# =================== 多設計彙整報告 ===================
+
+def _option_label(option):
+    """選項字串 → 英文關鍵字 (例如 "正壓 (Axial)" → "Axial")"""
+    return option.split("(")[-1].rstrip(")")
+
+
+def pdf_inputs(spec: DesignSpec):
+    """報告輸入表 (同 Streamlit 頁面的 O-Ring + 溝槽參數)"""
+    return [{"name": DIM_LABELS[name], "nom": d.nom, "tol": d.tol, "cpk": d.cpk} for name, d in spec.active_dims()]
+
+
+def pdf_results(spec: DesignSpec, res):
+    """結果物件 (SimResult / AnalyticResult) → (result_data, verdict_data)"""
+    result_data = [
+        {"item": "Compression Rate", "mean": res.mean_comp, "yield": res.yield_comp, "ppm": res.ppm_comp,
+         "target": f"{spec.target_comp_min}-{spec.target_comp_max}%"},
+        {"item": "Fill Rate", "mean": res.mean_fill, "yield": res.yield_fill, "ppm": res.ppm_fill,
+         "target": f"{spec.target_fill_min}-{spec.target_fill_max}%"},
+        {"item": "Combined (Total)", "mean": "-", "yield": res.yield_combined, "ppm": res.ppm_combined, "target": "-"},
+    ]
+    return result_data, {"yield": res.yield_combined, "ppm": res.ppm_combined}
+
+
+def _evaluate(design_id, spec, engine):
+    """worker：計算單一設計 → (design_id, 結果物件 或 錯誤訊息)"""
+    try:
+        return design_id, compute(spec, engine)
+    except Exception as e:  # 單一設計錯誤不中斷整份報告
+        return design_id, f"{type(e).__name__}: {e}"
+
+
+def _hist_data(spec: DesignSpec, res):
+    """直方圖向量繪製的輸入 (解析結果無直方圖 → None)"""
+    comp_hist = getattr(res, "comp_hist", None)
+    if comp_hist is None:
+        return None
+    return ((comp_hist.edges, comp_hist.counts, comp_color(spec.comp_mode), spec.target_comp_min, spec.target_comp_max),
+            (res.fill_hist.edges, res.fill_hist.counts, FILL_COLOR, spec.target_fill_min, spec.target_fill_max))
+
+
+def _draw_summary(c, draw_watermark, items, results, project_name, engineer_name, engine):
+    """總表頁：各設計的壓縮 / 填充 / 綜合良率與 PPM，列可點擊跳至設計頁"""
+    width, height = PAGE_SIZE
+    columns = ((20, "Design ID"), (75, "Mode"), (100, "O-Ring"), (125, "Groove"),
+               (155, "Comp Yield (%)"), (185, "Fill Yield (%)"), (215, "Combined (%)"), (245, "Defect (PPM)"))
+    ok = [(i, results[i]) for i, _ in items if not isinstance(results[i], str)]
+    n_pages = max(1, math.ceil(len(items) / SUMMARY_ROWS))
+    for page in range(n_pages):
+        y = height - 15 * mm
+        c.setFont("Helvetica-Bold", 18)
+        c.drawString(20 * mm, y, "O-Ring Design Review - Summary")
+        c.setFont("Helvetica", 9)
+        c.drawRightString(width - 20 * mm, y, f"Page {page + 1} / {n_pages}")
+        y -= 9 * mm
+        c.setFont("Helvetica", 10)
+        c.drawString(20 * mm, y, f"Project : {ascii_only(project_name)}   |   Engineer: {ascii_only(engineer_name)}   |   "
+                                 f"Engine: {'Analytic Estimate' if engine == ENGINE_ANALYTIC else 'Monte Carlo'}")
+        y -= 10 * mm
+
+        c.setFont("Helvetica-Bold", 9)
+        for x, label in columns:
+            c.drawString(x * mm, y, label)
+        y -= 6 * mm
+        c.setFont("Helvetica", 9)
+        for k in range(page * SUMMARY_ROWS, min((page + 1) * SUMMARY_ROWS, len(items))):
+            design_id, spec = items[k]
+            res = results[design_id]
+            c.drawString(20 * mm, y, ascii_only(design_id)[:30])
+            if isinstance(spec, DesignSpec):
+                c.drawString(75 * mm, y, _option_label(spec.comp_mode))
+                c.drawString(100 * mm, y, _option_label(spec.oring_type))
+                c.drawString(125 * mm, y, _option_label(spec.groove_type))
+            if isinstance(res, str):
+                c.setFillColorRGB(0.8, 0, 0)
+                c.drawString(155 * mm, y, "ERROR - " + ascii_only(res)[:70])
+                c.setFillColorRGB(0, 0, 0)
+            else:
+                c.drawString(155 * mm, y, f"{res.yield_comp:.2f}")
+                c.drawString(185 * mm, y, f"{res.yield_fill:.2f}")
+                c.drawString(215 * mm, y, f"{res.yield_combined:.2f}")
+                c.drawString(245 * mm, y, f"{int(res.ppm_combined)}")
+            c.linkAbsolute("", f"design-{k}", Rect=(20 * mm, y - 1.5 * mm, width - 20 * mm, y + 4 * mm))
+            y -= 6 * mm
+
+        if page == n_pages - 1 and ok:
+            # 整機良率：所有密封同時合格 (假設各設計彼此獨立)
+            product_yield = float(np.prod([r.yield_combined / 100 for _, r in ok])) * 100
+            worst_id, worst = max(ok, key=lambda t: t[1].ppm_combined)
+            y -= 4 * mm
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(20 * mm, y, f"Designs: {len(items)}   |   Errors: {len(items) - len(ok)}   |   "
+                                     f"Worst: {ascii_only(worst_id)} ({int(worst.ppm_combined)} PPM)   |   "
+                                     f"All seals pass: {product_yield:.2f} % ({int((100 - product_yield) * 10000)} PPM)")
+            c.setFont("Helvetica-Oblique", 8)
+            c.drawString(20 * mm, y - 5 * mm, "All seals pass = product of combined yields, assuming independent seals. "
+                                              "Click a row to jump to its design pages.")
+        draw_watermark()
+        c.showPage()
+
+
+def _draw_error_page(c, draw_watermark, design_id, message):
+    width, height = PAGE_SIZE
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(20 * mm, height - 15 * mm, f"Design {ascii_only(design_id)}")
+    c.setFont("Helvetica", 10)
+    c.setFillColorRGB(0.8, 0, 0)
+    c.drawString(20 * mm, height - 27 * mm, "ERROR: " + ascii_only(message)[:150])
+    c.setFillColorRGB(0, 0, 0)
+    draw_watermark()
+    c.showPage()
+
+
+def build_batch_report(items, output_path, engine=ENGINE_MC, workers=None, logo_bytes=None,
+                       project_name="", engineer_name="", results=None, progress=None):
+    """
+    多設計彙整報告，直接寫入 output_path
+
+    items   : [(design_id, DesignSpec 或輸入錯誤訊息)]，依報告順序 (batch.design_specs 的輸出)
+    results : 已計算的 {design_id: 結果物件} (例如 run_batch 的 results_out)；缺少者在行程池中計算。
+              蒙地卡羅結果需含直方圖 (串流模式即可，不需原始樣本)。
+    progress: progress(stage, k, total)，stage = "evaluate" / "render"
+    回傳 {design_id: 結果物件 或 錯誤訊息}
+    """
+    results = dict(results or {})
+    for design_id, spec in items:
+        if isinstance(spec, str):
+            results[design_id] = spec
+    pending = [(i, s) for i, s in items if i not in results]
+    workers = workers or os.cpu_count()
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # 計算 (只回傳統計量與直方圖 counts)
+            futures = [pool.submit(_evaluate, design_id, spec, engine) for design_id, spec in pending]
+            for k, fut in enumerate(as_completed(futures), 1):
+                design_id, res = fut.result()
+                results[design_id] = res
+                if progress:
+                    progress("evaluate", k, len(pending))
+
+    c = canvas.Canvas(str(output_path), pagesize=PAGE_SIZE, pageCompression=1)
+    c.setTitle("O-Ring Design Review")
+    draw_watermark = _watermarker(c, logo_bytes)
+    _draw_summary(c, draw_watermark, items, results, project_name, engineer_name, engine)
+
+    # 依報告順序組頁 (直方圖 / 示意圖皆為向量，不需再進行程池繪圖)
+    is_mc = engine != ENGINE_ANALYTIC
+    for k, (design_id, spec) in enumerate(items):
+        res = results[design_id]
+        c.bookmarkPage(f"design-{k}")
+        c.addOutlineEntry(ascii_only(design_id) or str(k + 1), f"design-{k}", level=0)
+        if isinstance(res, str):
+            _draw_error_page(c, draw_watermark, design_id, res)
+        else:
+            result_data, verdict_data = pdf_results(spec, res)
+            draw_oring_report(
+                c, draw_watermark, project_name, engineer_name, f"Design {design_id}",
+                pdf_inputs(spec), result_data, verdict_data, None, None, None,
+                method="Monte Carlo" if is_mc else "Analytic Estimate",
+                seed=res.seed if is_mc else None,
+                sampler=res.sampler if is_mc else None,
+                sample_info={"samples": res.sim_count, "ci": res.yield_combined_ci,
+                             "stop_reason": res.stop_reason} if is_mc else None,
+                diagram_geometry=schematic_geometry(spec),
+                hist_data=_hist_data(spec, res),
+            )
+        if progress:
+            progress("render", k + 1, len(items))
+    c.save()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m oring.report", description="O-Ring 多設計彙整 PDF 報告 (CSV / Excel → PDF)")
+    parser.add_argument("designs", help="設計表 (.csv / .xlsx，欄位同 python -m oring.batch)")
+    parser.add_argument("-o", "--output", required=True, help="PDF 檔")
+    parser.add_argument("--engine", choices=(ENGINE_MC, ENGINE_ANALYTIC), default=ENGINE_MC)
+    parser.add_argument("--workers", type=int, default=None, help="行程數 (預設 = CPU 核心數)")
+    parser.add_argument("--sim-count", type=int, default=DesignSpec.sim_count, help="設計表未指定時的模擬次數")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="設計表未指定時的隨機種子")
+    parser.add_argument("--sampler", default=DesignSpec.sampler)
+    parser.add_argument("--logo", default=None, help="浮水印 logo 圖檔 (選用)")
+    parser.add_argument("--project", default="", help="專案名稱")
+    parser.add_argument("--engineer", default="", help="工程師")
+    args = parser.parse_args(argv)
+
+    defaults = DesignSpec(sim_count=args.sim_count, seed=args.seed, sampler=args.sampler)
+    items = design_specs(read_designs(args.designs), defaults)
+    logo_bytes = None
+    if args.logo:
+        with open(args.logo, "rb") as f:
+            logo_bytes = f.read()
+    t0 = time.perf_counter()
+
+    def progress(stage, k, total):
+        print(f"[{stage} {k}/{total}]", file=sys.stderr)
+
+    results = build_batch_report(items, args.output, args.engine, args.workers, logo_bytes,
+                                 args.project, args.engineer, progress=progress)
+    n_err = sum(isinstance(r, str) for r in results.values())
+    print(f"{len(items)} designs → {args.output} ({n_err} errors, {time.perf_counter() - t0:.1f} s)", file=sys.stderr)
+    return 1 if n_err else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+抽樣器 (Sampler)：在標準常態空間產生 z (n × d)，尺寸值 = nom + sigma · z
+
+- random     : 一般亂數 (預設，沿用 generate_dim 抽樣順序)
+- lhs        : Latin Hypercube，每個維度分層抽樣
+- sobol      : Scrambled Sobol 準蒙地卡羅 (需要 scipy)
+- importance : 重要性抽樣，往壓縮率 / 填充率規格界限的最可能失效點 (MPP) 偏移，
+               以 defensive mixture 計算權重，尾端 PPM 收斂更快
+"""
+import warnings
+
+import numpy as np
+
+try:
+    from scipy.special import ndtri as _ndtri
+except ImportError:  # scipy 為選用套件
+    _ndtri = None
+
+SAMPLER_RANDOM = "random"
+SAMPLER_LHS = "lhs"
+SAMPLER_SOBOL = "sobol"
+SAMPLER_IMPORTANCE = "importance"
+SAMPLERS = (SAMPLER_RANDOM, SAMPLER_LHS, SAMPLER_SOBOL, SAMPLER_IMPORTANCE)
+
+IS_NOMINAL_WEIGHT = 0.5  # defensive mixture 中保留原分佈的比例 (權重上限 = 1 / 0.5)
+MPP_ITERATIONS = 6
+# 只對「稀有但不可忽略」的失效偏移：|z*| < 1 一般抽樣已足夠，|z*| > 8 機率 < 1e-15
+MPP_MIN_NORM = 1.0
+MPP_MAX_NORM = 8.0
+
+
+def norm_ppf(u, out=None):
+    """標準常態反函數 (無 scipy 時使用 Acklam 有理近似，相對誤差 < 1.2e-9)；可指定 out 就地計算 (可與 u 相同)"""
+    if _ndtri is not None:
+        return _ndtri(u, out=out)
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00)
+    u = np.asarray(u, dtype=float)
+    if out is None:
+        out = np.empty_like(u)
+    p_low = 0.02425
+    low = u < p_low; high = u > 1 - p_low; mid = ~(low | high)  # 三區互斥，out 與 u 共用記憶體時也不會讀到已寫入的值
+
+    q = np.sqrt(-2 * np.log(u[low]))
+    out[low] = (((((c[0]*q + c[1])*q + c[2])*q + c[3])*q + c[4])*q + c[5]) / \
+               ((((d[0]*q + d[1])*q + d[2])*q + d[3])*q + 1)
+    q = np.sqrt(-2 * np.log(1 - u[high]))
+    out[high] = -(((((c[0]*q + c[1])*q + c[2])*q + c[3])*q + c[4])*q + c[5]) / \
+                ((((d[0]*q + d[1])*q + d[2])*q + d[3])*q + 1)
+    q = u[mid] - 0.5; r = q * q
+    out[mid] = (((((a[0]*r + a[1])*r + a[2])*r + a[3])*r + a[4])*r + a[5]) * q / \
+               (((((b[0]*r + b[1])*r + b[2])*r + b[3])*r + b[4])*r + 1)
+    return out
+
+
+def _uniform_open(u):
+    """就地截到 (0, 1) 開區間"""
+    return np.clip(u, 1e-16, 1 - 1e-16, out=u)
+
+
+def latin_hypercube(n, d, rng):
+    """每個維度切成 n 層，每層恰好一個樣本 (各維度獨立隨機排列)；除輸出外只多配置一個 n × d 整數陣列"""
+    strata = np.tile(np.arange(n), (d, 1))
+    rng.permuted(strata, axis=1, out=strata)
+    u = rng.random((n, d))
+    u += strata.T
+    del strata
+    u /= n
+    return norm_ppf(_uniform_open(u), out=u)
+
+
+def scrambled_sobol(n, d, rng):
+    try:
+        from scipy.stats import qmc
+    except ImportError as e:
+        raise ImportError("Sobol 抽樣需要 scipy (pip install scipy)") from e
+    with warnings.catch_warnings():
+        # 非 2 的次方樣本數會失去部分平衡性，仍為有效的 QMC 點集
+        warnings.simplefilter("ignore", UserWarning)
+        u = qmc.Sobol(d, scramble=True, seed=rng).random(n)
+    return norm_ppf(_uniform_open(u), out=u)
+
+
+def mpp_shifts(metric_fn, d, limits):
+    """
+    以 HL-RF 迭代求各規格界限的最可能失效點 (Most Probable Point)
+
+    metric_fn(z) → (compression, fill)，z 為 (m, d)；
+    limits 為 [(metric_index, limit, side), ...]，side = +1 表上限、-1 表下限。
+    名目值已失效 (不需偏移)、梯度為 0、或 |z*| 不在 [MPP_MIN_NORM, MPP_MAX_NORM] 的界限略過。
+    """
+    h = 1e-4
+    shifts = []
+    for idx, limit, side in limits:
+        g0 = metric_fn(np.zeros((1, d)))[idx][0]
+        if not np.isfinite(limit) or side * (g0 - limit) >= 0:
+            continue
+        z = np.zeros(d)
+        for _ in range(MPP_ITERATIONS):
+            g_all = metric_fn(np.vstack([z, z + h * np.eye(d)]))[idx] - limit
+            grad = (g_all[1:] - g_all[0]) / h
+            norm2 = float(grad @ grad)
+            if norm2 == 0 or not np.isfinite(norm2):
+                z = None
+                break
+            z = (grad @ z - g_all[0]) * grad / norm2
+        if z is not None and np.isfinite(z).all() and MPP_MIN_NORM <= np.linalg.norm(z) <= MPP_MAX_NORM:
+            shifts.append(z)
+    return np.array(shifts).reshape(-1, d)
+
+
+def _log_mixture_ratio(z, shifts, nominal_weight):
+    """log( q(z) / φ(z) )，q = nominal_weight·φ(z) + Σ π_k φ(z - μ_k)"""
+    k = len(shifts)
+    pi_k = (1 - nominal_weight) / k
+    terms = [np.full(len(z), np.log(nominal_weight))]
+    for mu in shifts:
+        terms.append(np.log(pi_k) + z @ mu - 0.5 * float(mu @ mu))
+    return np.logaddexp.reduce(np.vstack(terms), axis=0)
+
+
+def importance_normals(n, shifts, rng, nominal_weight=IS_NOMINAL_WEIGHT):
+    """由 defensive mixture 抽樣 → (z, weights)；weights = φ(z) / q(z)"""
+    d = shifts.shape[1]
+    z = rng.standard_normal((n, d))
+    if len(shifts) == 0:
+        return z, np.ones(n)
+    probs = np.concatenate([[nominal_weight], np.full(len(shifts), (1 - nominal_weight) / len(shifts))])
+    comp = rng.choice(len(probs), size=n, p=probs)
+    centers = np.vstack([np.zeros(d), shifts])
+    z += centers[comp]
+    return z, np.exp(-_log_mixture_ratio(z, shifts, nominal_weight))
+
+
+def standard_normals(sampler, n, d, rng):
+    """lhs / sobol 的 z (n × d)；權重恆為 1"""
+    if sampler == SAMPLER_LHS:
+        return latin_hypercube(n, d, rng)
+    if sampler == SAMPLER_SOBOL:
+        return scrambled_sobol(n, d, rng)
+    raise ValueError(f"未知的抽樣器: {sampler}")
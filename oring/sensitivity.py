@@ -0,0 +1,102 @@
+"""
+敏感度分析 (Sensitivity)
+
+- 變異貢獻：壓縮率 / 填充率的一階 Sobol 指標 S_i = Var(E[Y | X_i]) / Var(Y)，
+  以全變數 Gauss-Hermite 張量積求積分 (不抽樣，與解析估算同一套節點)；
+  Σ S_i 與 1 的差即為尺寸間交互作用的貢獻
+- PPM 貢獻：單一尺寸公差減半 / 歸零 (其餘不變) 時的綜合 PPM，以解析估算計算
+
+拉伸率在 DesignSpec 中為定值 (無公差)，不是隨機輸入，因此不列入。
+"""
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from .analytic import _gh, estimate
+from .engine import ratios_from_values
+from .spec import DesignSpec, DimSpec
+from .timing import tracked_cache
+
+SOBOL_NODES = 12  # 每個變數的 Gauss-Hermite 節點數 (5 個變數 → 12^5 ≈ 25 萬點)
+
+
+@dataclass(frozen=True)
+class DimSensitivity:
+    name: str
+    tol: float
+    sobol_comp: float      # 壓縮率變異的一階貢獻 (0–1)
+    sobol_fill: float      # 填充率變異的一階貢獻 (0–1)
+    ppm_half_tol: float    # 該尺寸公差減半時的綜合 PPM
+    ppm_zero_tol: float    # 該尺寸公差歸零時的綜合 PPM
+
+
+@dataclass(frozen=True)
+class SensitivityResult:
+    dims: tuple            # DimSensitivity，依 spec.active_dims() 順序
+    ppm_combined: float    # 目前設計的綜合 PPM (解析)
+    std_comp: float
+    std_fill: float
+
+    def pareto(self, key="ppm"):
+        """依貢獻由大到小排序；key = "ppm" (公差歸零的 PPM 降幅) / "comp" / "fill" """
+        sort_key = {"ppm": lambda d: self.ppm_combined - d.ppm_zero_tol,
+                    "comp": lambda d: d.sobol_comp,
+                    "fill": lambda d: d.sobol_fill}[key]
+        return sorted(self.dims, key=sort_key, reverse=True)
+
+
+def _first_order(values, weights):
+    """張量積格點上的 Y (各軸對應一個變數) → (std, 各變數一階 Sobol 指標)"""
+    w_all = weights[0]
+    for w in weights[1:]:
+        w_all = np.multiply.outer(w_all, w)
+    mean = float((w_all * values).sum())
+    var = float((w_all * (values - mean)**2).sum())
+    if var <= 0:
+        return 0.0, [0.0] * len(weights)
+    indices = []
+    for i, w_i in enumerate(weights):
+        # E[Y | X_i]：由後往前對其他軸加權平均 (先移除高維軸，低維軸索引不變)
+        cond_mean = values
+        for j in reversed(range(len(weights))):
+            if j != i:
+                cond_mean = np.tensordot(cond_mean, weights[j], axes=([j], [0]))
+        indices.append(float(w_i @ (cond_mean - mean)**2) / var)
+    return var**0.5, indices
+
+
+def analyze(spec: DesignSpec) -> SensitivityResult:
+    """各尺寸對壓縮率 / 填充率變異與綜合 PPM 的貢獻"""
+    if not spec.has_oring:
+        raise ValueError("O-Ring 尺寸必須大於 0")
+    dims = spec.active_dims()
+    d = len(dims)
+    values = {}; weights = []
+    for i, (name, dim) in enumerate(dims):
+        shape = [1] * d
+        if dim.sigma == 0:
+            x, w = np.array([dim.nom]), np.array([1.0])
+        else:
+            x, w = _gh(SOBOL_NODES)
+            x = dim.nom + dim.sigma * x
+        shape[i] = len(x)
+        values[name] = x.reshape(shape); weights.append(w)
+    comp, fill = ratios_from_values(spec, values)
+    full_shape = tuple(len(w) for w in weights)
+    std_comp, s_comp = _first_order(np.broadcast_to(comp, full_shape), weights)
+    std_fill, s_fill = _first_order(np.broadcast_to(fill, full_shape), weights)
+
+    rows = []
+    for (name, dim), sc, sf in zip(dims, s_comp, s_fill):
+        half = estimate(replace(spec, **{name: DimSpec(dim.nom, dim.tol / 2, dim.cpk)}))
+        zero = estimate(replace(spec, **{name: DimSpec(dim.nom, 0.0, dim.cpk)}))
+        rows.append(DimSensitivity(name=name, tol=dim.tol, sobol_comp=sc, sobol_fill=sf,
+                                   ppm_half_tol=half.ppm_combined, ppm_zero_tol=zero.ppm_combined))
+    return SensitivityResult(dims=tuple(rows), ppm_combined=estimate(spec).ppm_combined,
+                             std_comp=std_comp, std_fill=std_fill)
+
+
+@tracked_cache(maxsize=64)
+def run_sensitivity(spec: DesignSpec) -> SensitivityResult:
+    """以 DesignSpec 為 key 的快取入口"""
+    return analyze(spec)
@@ -0,0 +1,421 @@
+"""
+本機模擬服務 (Local simulation service)：asyncio JSON API + 有上限的工作佇列 + 行程池
+
+    python -m oring.service --port 8765 --workers 4
+    ORING_SERVICE_URL=http://127.0.0.1:8765 streamlit run O_Ring_G_OK_0114_V1_0114.py
+
+多人共用的 Streamlit 伺服器、批次 script 等把計算送到同一個服務，不在各自的 script thread 阻塞計算：
+- POST   /jobs        {"spec": {...}, "engine": "mc" | "analytic"} → 202 工作狀態 (相同輸入時 dedup = true)
+- GET    /jobs/<id>   狀態 (queued / running / done / error / cancelled)、進度 (0–1) 與結果
+- DELETE /jobs/<id>   取消；尚未開始的批次不再執行
+- GET    /health      佇列長度 / 執行中工作數
+spec 欄位同批次設計表 (oring.batch.spec_from_row：cs / cs_tol / cs_cpk、comp_mode: "axial" …)，
+measurements 為 dataset id 清單 (見 oring.empirical)。
+
+- 佇列滿時 POST 回 503，由呼叫端稍後重試
+- body 不是 JSON 物件、spec 有未知欄位、蒙地卡羅 sim_count 超過 max_sim_count (--max-sim-count) 時回 400
+- 相同輸入 (DesignSpec.digest + engine) 只算一次：執行中或最近完成 (history 筆) 的工作直接回傳同一個 id
+- 蒙地卡羅依 engine.block_plan 逐批送進行程池並依序合併 → 結果與 simulate(keep_samples=False) 逐位元相同；
+  每完成一批更新進度，取消時撤銷尚未開始的批次
+- 自適應停止與解析估算整個工作送進行程池 (沒有中間進度)
+
+client 端 (submit / status / cancel / wait) 只用標準函式庫 urllib，不需要 asyncio。
+"""
+import argparse
+import asyncio
+import json
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields, replace
+from http import HTTPStatus
+from typing import Optional
+
+import numpy as np
+
+from .analytic import AnalyticResult, estimate
+from .batch import ENGINE_ANALYTIC, ENGINE_MC, spec_from_row
+from .engine import (
+    DEFAULT_WORKERS, MEMORY_STANDARD, Histogram, SimResult, _Accumulator, _run_block,
+    block_plan, lean_peak_bytes, simulate_adaptive,
+)
+from .sampling import SAMPLER_IMPORTANCE
+from .spec import DesignSpec, DimSpec
+
+SERVICE_ENV = "ORING_SERVICE_URL"
+DEFAULT_PORT = 8765
+QUEUE_SIZE = 64
+HISTORY = 256          # 保留的已完成工作數 (去重與查詢結果用)
+MAX_BODY = 1 << 20
+MAX_SIM_COUNT = 50_000_000   # 單一蒙地卡羅工作的樣本數上限 (自適應模式為樣本上限)；--max-sim-count 可調整
+POLL_S = 0.25
+
+QUEUED, RUNNING, DONE, ERROR, CANCELLED = "queued", "running", "done", "error", "cancelled"
+
+
+# --- JSON <-> DesignSpec / 結果 ---
+
+def spec_to_json(spec: DesignSpec):
+    """DesignSpec → 設計表格式的 dict (spec_from_json 的反向)"""
+    data = {}
+    for f in fields(DesignSpec):
+        value = getattr(spec, f.name)
+        if isinstance(value, DimSpec):
+            data.update({f.name: value.nom, f"{f.name}_tol": value.tol, f"{f.name}_cpk": value.cpk})
+        elif f.name == "measurements":
+            data[f.name] = list(value)
+        elif value is not None:
+            data[f.name] = value
+    return data
+
+
+def _spec_keys():
+    """spec JSON 可用的欄位 (同 spec_to_json：尺寸欄位另有 _tol / _cpk)"""
+    keys = set()
+    for f in fields(DesignSpec):
+        keys.add(f.name)
+        if f.type is DimSpec:
+            keys.update((f"{f.name}_tol", f"{f.name}_cpk"))
+    return keys
+
+
+def spec_from_json(data) -> DesignSpec:
+    """設計表格式的 dict → DesignSpec；measurements 為 dataset id 清單 (不重新匯入檔案)；未知欄位 → ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("spec 需為 JSON 物件")
+    unknown = set(data) - _spec_keys()
+    if unknown:
+        raise ValueError(f"未知的 spec 欄位: {', '.join(sorted(unknown))}")
+    data = dict(data)
+    measurements = data.pop("measurements", None) or ()
+    spec = spec_from_row(data)
+    return replace(spec, measurements=tuple(str(m) for m in measurements)) if measurements else spec
+
+
+def _hist_to_json(hist: Histogram):
+    return {"edges": hist.edges.tolist(), "counts": hist.counts.tolist(),
+            "underflow": hist.underflow, "overflow": hist.overflow}
+
+
+def _hist_from_json(data):
+    counts = np.asarray(data["counts"])
+    return Histogram(np.asarray(data["edges"], dtype=float), counts, data["underflow"], data["overflow"])
+
+
+def result_to_json(res):
+    """SimResult (不含樣本陣列) / AnalyticResult → dict"""
+    if isinstance(res, AnalyticResult):
+        return {"kind": ENGINE_ANALYTIC, **asdict(res)}
+    data = {"kind": ENGINE_MC}
+    for f in fields(SimResult):
+        value = getattr(res, f.name)
+        if isinstance(value, Histogram):
+            data[f.name] = _hist_to_json(value)
+        elif not isinstance(value, np.ndarray):
+            data[f.name] = list(value) if isinstance(value, tuple) else value
+    return data
+
+
+def result_from_json(data):
+    """result_to_json 的反向 → SimResult / AnalyticResult"""
+    data = dict(data)
+    if data.pop("kind") == ENGINE_ANALYTIC:
+        return AnalyticResult(**data)
+    data["comp_hist"] = _hist_from_json(data["comp_hist"])
+    data["fill_hist"] = _hist_from_json(data["fill_hist"])
+    data["yield_combined_ci"] = tuple(data["yield_combined_ci"])
+    return SimResult(**data)
+
+
+# --- 服務端 ---
+
+@dataclass
+class Job:
+    id: str
+    key: tuple
+    spec: DesignSpec
+    engine: str
+    status: str = QUEUED
+    progress: float = 0.0
+    result: Optional[dict] = None
+    error: str = ""
+    submitted: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    task: Optional[asyncio.Task] = None
+
+    def to_json(self, dedup=False):
+        return {"id": self.id, "status": self.status, "progress": self.progress, "engine": self.engine,
+                "input_hash": self.spec.digest(), "dedup": dedup, "error": self.error,
+                "elapsed_s": (self.finished or time.time()) - self.started if self.started else None,
+                "result": self.result}
+
+
+class SimulationService:
+    """
+    工作佇列 + 行程池；workers 個 runner 同時執行工作，每個工作最多 workers 個批次在行程池中排隊
+    (多個工作時批次交錯執行，大工作不會獨占)
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=QUEUE_SIZE, history=HISTORY, max_sim_count=MAX_SIM_COUNT):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.history = history
+        self.max_sim_count = max_sim_count
+        self.jobs = OrderedDict()   # id → Job (未完成 + 最近完成的 history 筆)
+        self.by_key = {}            # (digest, engine) → id
+        self.pool = None
+        self.queue = None
+        self._runners = []
+
+    async def start(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.queue = asyncio.Queue(self.queue_size)
+        self._runners = [asyncio.create_task(self._runner()) for _ in range(self.workers)]
+
+    async def close(self):
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+
+    def submit(self, spec: DesignSpec, engine=ENGINE_MC):
+        """→ (Job, dedup)；佇列滿時 asyncio.QueueFull"""
+        if engine not in (ENGINE_MC, ENGINE_ANALYTIC):
+            raise ValueError(f"未知的引擎: {engine}")
+        if not spec.has_oring:
+            raise ValueError("O-Ring 尺寸必須大於 0")
+        if engine == ENGINE_MC and spec.sim_count > self.max_sim_count:
+            raise ValueError(f"sim_count {spec.sim_count:,} 超過服務上限 {self.max_sim_count:,}")
+        key = (spec.digest(), engine)
+        job_id = self.by_key.get(key)
+        if job_id in self.jobs and self.jobs[job_id].status in (QUEUED, RUNNING, DONE):
+            return self.jobs[job_id], True
+        job = Job(uuid.uuid4().hex[:12], key, spec, engine, submitted=time.time())
+        self.queue.put_nowait(job)
+        self.jobs[job.id] = job
+        self.by_key[key] = job.id
+        return job, False
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED)
+        elif job.status == RUNNING and job.task:
+            job.task.cancel()
+        return job
+
+    def _finish(self, job, status, result=None, error="", reusable=True):
+        job.status, job.result, job.error, job.finished = status, result, error, time.time()
+        if (status != DONE or not reusable) and self.by_key.get(job.key) == job.id:
+            del self.by_key[job.key]  # 失敗 / 取消 / 因時間預算停止的工作不作為去重結果
+        self._prune()
+
+    def _prune(self):
+        finished = [j for j in self.jobs.values() if j.status not in (QUEUED, RUNNING)]
+        for job in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job.id]
+            if self.by_key.get(job.key) == job.id:
+                del self.by_key[job.key]
+
+    async def _runner(self):
+        while True:
+            job = await self.queue.get()
+            if job.status != QUEUED:
+                continue
+            job.status, job.started = RUNNING, time.time()
+            job.task = asyncio.create_task(self._execute(job))
+            try:
+                result = await job.task
+            except asyncio.CancelledError:
+                if job.status == RUNNING:
+                    self._finish(job, CANCELLED)
+                if asyncio.current_task().cancelling():
+                    raise  # runner 本身被取消 (服務關閉)
+            except Exception as e:  # 單一工作錯誤不影響服務
+                self._finish(job, ERROR, error=f"{type(e).__name__}: {e}")
+            else:
+                job.progress = 1.0
+                self._finish(job, DONE, result=result_to_json(result),
+                             reusable=getattr(result, "reproducible", True))
+
+    async def _execute(self, job):
+        loop = asyncio.get_running_loop()
+        spec = job.spec
+        if job.engine == ENGINE_ANALYTIC:
+            return await loop.run_in_executor(self.pool, estimate, spec)
+        if spec.ci_width_ppm:
+            return await loop.run_in_executor(self.pool, simulate_adaptive, spec)
+        root, edges, _, args = block_plan(spec)
+        acc = _Accumulator(spec, *edges, weighted=spec.sampler == SAMPLER_IMPORTANCE)
+        pending = deque()
+        remaining = iter(args)
+        try:
+            for done in range(1, len(args) + 1):
+                while len(pending) < self.workers and (a := next(remaining, None)) is not None:
+                    pending.append(loop.run_in_executor(self.pool, _run_block, *a))
+                block_acc, _ = await pending.popleft()
+                acc.merge(block_acc)
+                job.progress = done / len(args)
+        finally:
+            for future in pending:
+                future.cancel()
+        peak_bytes = None
+        if spec.memory_mode != MEMORY_STANDARD:
+            peak_bytes = lean_peak_bytes(spec, acc.n, args[0][2], min(self.workers, len(args)), keep_samples=False)
+        return acc.result(root.entropy, peak_bytes=peak_bytes)
+
+    # --- HTTP ---
+
+    def route(self, method, path, body):
+        """→ (HTTPStatus, payload)"""
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if parts == ["health"] and method == "GET":
+            running = sum(j.status == RUNNING for j in self.jobs.values())
+            return HTTPStatus.OK, {"status": "ok", "queued": self.queue.qsize(), "running": running,
+                                   "workers": self.workers, "queue_size": self.queue_size,
+                                   "max_sim_count": self.max_sim_count}
+        if parts == ["jobs"] and method == "POST":
+            try:
+                data = json.loads(body or b"{}")
+                if not isinstance(data, dict):
+                    raise ValueError("request body 需為 JSON 物件")
+                spec = spec_from_json(data.get("spec"))
+                job, dedup = self.submit(spec, data.get("engine", ENGINE_MC))
+            except (ValueError, TypeError) as e:
+                return HTTPStatus.BAD_REQUEST, {"error": f"{type(e).__name__}: {e}"}
+            except asyncio.QueueFull:
+                return HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"佇列已滿 ({self.queue_size})，請稍後重試"}
+            return HTTPStatus.ACCEPTED, job.to_json(dedup)
+        if len(parts) == 2 and parts[0] == "jobs" and method in ("GET", "DELETE"):
+            job = self.jobs.get(parts[1]) if method == "GET" else self.cancel(parts[1])
+            if job is None:
+                return HTTPStatus.NOT_FOUND, {"error": f"找不到工作 {parts[1]}"}
+            return HTTPStatus.OK, job.to_json()
+        return HTTPStatus.NOT_FOUND, {"error": f"{method} {path} 不存在"}
+
+    async def handle(self, reader, writer):
+        """最小的 HTTP/1.1 處理 (每個連線一個請求，Connection: close)"""
+        try:
+            method, path, _ = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_BODY:
+                status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "request body 過大"}
+            else:
+                status, payload = self.route(method.upper(), path, await reader.readexactly(length))
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, payload = HTTPStatus.BAD_REQUEST, {"error": f"無效的 HTTP 請求: {e}"}
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, workers=DEFAULT_WORKERS, queue_size=QUEUE_SIZE,
+                history=HISTORY, ready=None, max_sim_count=MAX_SIM_COUNT):
+    """啟動服務直到被取消；ready(server) 在開始接受連線後呼叫 (測試 / 嵌入用)"""
+    service = SimulationService(workers, queue_size, history, max_sim_count)
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    try:
+        if ready:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+# --- client 端 (同步，urllib) ---
+
+class ServiceError(RuntimeError):
+    """服務回傳錯誤 (status 為 HTTP 狀態碼)"""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+def _request(method, url, payload=None, timeout=30):
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read()).get("error", e.reason)
+        except ValueError:
+            message = e.reason
+        raise ServiceError(e.code, message) from None
+
+
+def submit(url, spec: DesignSpec, engine=ENGINE_MC):
+    """送出工作 → 工作狀態 dict (相同輸入已在執行或已完成時直接回傳該工作)"""
+    return _request("POST", f"{url.rstrip('/')}/jobs", {"spec": spec_to_json(spec), "engine": engine})
+
+
+def status(url, job_id):
+    return _request("GET", f"{url.rstrip('/')}/jobs/{job_id}")
+
+
+def cancel(url, job_id):
+    return _request("DELETE", f"{url.rstrip('/')}/jobs/{job_id}")
+
+
+def wait(url, job, poll=POLL_S, timeout=None, progress=None):
+    """
+    輪詢直到工作結束 → SimResult / AnalyticResult；progress(job) 在每次輪詢時呼叫
+    job 可為 submit 回傳的 dict 或工作 id；失敗 / 取消時 ServiceError
+    """
+    job = status(url, job) if isinstance(job, str) else job
+    t0 = time.perf_counter()
+    while job["status"] in (QUEUED, RUNNING):
+        if progress:
+            progress(job)
+        if timeout is not None and time.perf_counter() - t0 > timeout:
+            raise TimeoutError(f"工作 {job['id']} 超過 {timeout} 秒未完成")
+        time.sleep(poll)
+        job = status(url, job["id"])
+    if job["status"] != DONE:
+        raise ServiceError(job["status"], job["error"] or f"工作 {job['id']} {job['status']}")
+    return result_from_json(job["result"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="O-Ring 本機模擬服務 (asyncio JSON API)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="行程池大小 (同時執行的工作數)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="等待中工作上限，滿時回 503")
+    parser.add_argument("--history", type=int, default=HISTORY, help="保留的已完成工作數 (去重 / 查詢)")
+    parser.add_argument("--max-sim-count", type=int, default=MAX_SIM_COUNT, help="單一蒙地卡羅工作的樣本數上限，超過回 400")
+    args = parser.parse_args(argv)
+
+    def ready(server):
+        addr = server.sockets[0].getsockname()
+        print(f"O-Ring simulation service on http://{addr[0]}:{addr[1]} ({args.workers} workers)", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.queue_size, args.history, ready,
+                          args.max_sim_count))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+設計輸入定義 (DesignSpec) 與選項常數
+"""
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+
+# --- 選項常數 (與介面 radio 選項字串一致) ---
+AXIAL = "正壓 (Axial)"
+RADIAL = "側壓 (Radial)"
+STANDARD = "正規圓形 (Standard)"
+IRREGULAR = "不規則形 (Irregular)"
+RECTANGULAR = "矩形 (Rectangular)"
+TRAPEZOIDAL = "梯形 (Trapezoidal)"
+
+# --- 記憶體模式 (見 oring.engine) ---
+MEMORY_STANDARD = "standard"   # 原始向量化算式
+MEMORY_LEAN = "lean"           # 預先配置緩衝區 + in-place ufunc (float64，結果與 standard 相同)
+MEMORY_LEAN32 = "lean32"       # 同 lean，以 float32 計算與保存樣本
+MEMORY_MODES = (MEMORY_STANDARD, MEMORY_LEAN, MEMORY_LEAN32)
+
+
+@dataclass(frozen=True)
+class DimSpec:
+    """單一尺寸：公稱值 / 公差 (±) / Cpk"""
+    nom: float
+    tol: float = 0.0
+    cpk: float = 0.0
+
+    @property
+    def sigma(self) -> float:
+        if self.cpk == 0 or self.tol == 0:
+            return 0.0
+        return self.tol / (3 * self.cpk)
+
+
+@dataclass(frozen=True)
+class DesignSpec:
+    """
+    完整設計輸入 (frozen → 可 hash，作為快取 key)
+
+    - Standard O-Ring 使用 cs；Irregular 使用 irr_h + irr_area
+    - Rectangular 溝槽使用 g_depth + g_width；Trapezoidal 使用 g_depth + g_wtop + g_wbtm
+    - stretch_pct = 0 表示不啟用拉伸
+    - seed 為 None 時每次使用新的隨機 entropy (結果中會記錄實際 seed)
+    - sampler: random / lhs / sobol / importance (見 oring.sampling)
+    - ci_width_ppm 有值時為自適應模式：sim_count 視為樣本上限，
+      抽樣至綜合良率 95% CI 寬度 ≤ ci_width_ppm 或超過 max_seconds 為止
+    - memory_mode: standard / lean / lean32 (省記憶體模式，結果另回報記憶體峰值)
+    - measurements: 實測資料集 id (見 oring.empirical)；資料中有的尺寸改以實測分佈抽樣，對應的 DimSpec 不使用
+    """
+    comp_mode: str = AXIAL
+    oring_type: str = STANDARD
+    groove_type: str = RECTANGULAR
+    cs: DimSpec = DimSpec(2.00, 0.08, 1.33)
+    irr_h: DimSpec = DimSpec(2.00, 0.08, 1.33)
+    irr_area: DimSpec = DimSpec(3.14, 0.0064, 1.33)
+    g_depth: DimSpec = DimSpec(1.55, 0.05, 1.33)
+    g_width: DimSpec = DimSpec(2.40, 0.05, 1.33)
+    g_wtop: DimSpec = DimSpec(2.00, 0.05, 1.33)
+    g_wbtm: DimSpec = DimSpec(1.50, 0.05, 1.33)
+    stretch_pct: float = 0.0
+    target_comp_min: float = 15.0
+    target_comp_max: float = 25.0
+    target_fill_min: float = 75.0
+    target_fill_max: float = 85.0
+    sim_count: int = 500000
+    seed: Optional[int] = None
+    sampler: str = "random"
+    ci_width_ppm: Optional[float] = None
+    max_seconds: Optional[float] = None
+    memory_mode: str = MEMORY_STANDARD
+    measurements: tuple = ()
+
+    @property
+    def stretch_factor(self) -> float:
+        return 1 + (self.stretch_pct / 100.0)
+
+    def oring_dims(self):
+        """參與抽樣的 O-Ring 尺寸 [(name, DimSpec), ...] (依抽樣順序)"""
+        if self.oring_type == STANDARD:
+            return [("cs", self.cs)]
+        return [("irr_h", self.irr_h), ("irr_area", self.irr_area)]
+
+    def groove_dims(self):
+        """參與抽樣的溝槽尺寸 [(name, DimSpec), ...] (依抽樣順序)"""
+        if self.groove_type == RECTANGULAR:
+            return [("g_depth", self.g_depth), ("g_width", self.g_width)]
+        return [("g_depth", self.g_depth), ("g_wtop", self.g_wtop), ("g_wbtm", self.g_wbtm)]
+
+    def active_dims(self):
+        return self.oring_dims() + self.groove_dims()
+
+    @property
+    def has_oring(self) -> bool:
+        if self.oring_type == STANDARD:
+            return self.cs.nom > 0
+        return self.irr_h.nom > 0 and self.irr_area.nom > 0
+
+    def digest(self) -> str:
+        """輸入內容的穩定雜湊 (跨行程 / 跨機器一致)，作為批次續跑與結果儲存的 key"""
+        payload = json.dumps(asdict(self), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,216 @@
+"""
+持久化結果儲存 (Result Store, SQLite)
+
+以 DesignSpec.digest() (完整設計輸入，含 seed) + 引擎為 key，保存統計值、直方圖 (固定 bin) 與產生過的 PDF 報告，
+跨 session / 伺服器重啟沿用：團隊中任何人算過的設計再次開啟時直接讀取，不重新抽樣。
+
+    python -m oring.store                    # 最近的結果
+    python -m oring.store --engine mc --limit 20 --stats
+    python -m oring.store --evict 128        # 縮減至 128 MiB
+
+- 路徑：環境變數 ORING_STORE (預設 ~/.cache/oring/results.sqlite)；團隊共用時放在共用磁碟 (需支援檔案鎖)
+- 容量：結果與 PDF 合計超過 max_bytes (ORING_STORE_MAX_MB，預設 256 MiB) 時，依最後存取時間 (LRU) 刪除至 90 %
+- seed 為 None 的設計每次結果不同，不寫入
+- 自適應模式因時間預算 (max_seconds) 停止的結果樣本數取決於機器負載，不寫入
+- 結果以 oring.service.result_to_json 序列化 (不含原始樣本陣列)
+- key 含 RESULT_VERSION：引擎計算或結果格式改變時遞增，舊版本的項目不再命中 (之後依 LRU 淘汰)
+- 每次操作開一條連線，可由多個 Streamlit thread / 行程同時使用；使用 SQLite 預設的 rollback journal，
+  不用 WAL (WAL 需要同一台主機的共用記憶體，放在網路磁碟時多台主機同時存取會損毀資料庫)
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+from .batch import ENGINE_MC
+from .service import result_from_json, result_to_json, spec_to_json
+from .spec import DesignSpec
+
+STORE_ENV = "ORING_STORE"
+MAX_MB_ENV = "ORING_STORE_MAX_MB"
+DEFAULT_MAX_MB = 256
+RESULT_VERSION = 1  # 引擎計算 / 結果格式改變時遞增
+EVICT_TO = 0.9  # 超過上限時刪除至上限的比例，避免每次寫入都觸發
+SUMMARY_COLUMNS = ("mean_comp", "std_comp", "mean_fill", "std_fill",
+                   "yield_comp", "yield_fill", "yield_combined", "ppm_combined")
+FILTER_COLUMNS = ("input_hash", "engine", "sampler", "comp_mode", "oring_type", "groove_type")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY, input_hash TEXT, engine TEXT, sim_count INTEGER, seed TEXT, sampler TEXT,
+    comp_mode TEXT, oring_type TEXT, groove_type TEXT, {", ".join(f"{c} REAL" for c in SUMMARY_COLUMNS)},
+    elapsed_s REAL, spec_json TEXT, result_json TEXT,
+    size_bytes INTEGER, created REAL, last_access REAL, hits INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_access ON runs (last_access);
+CREATE TABLE IF NOT EXISTS pdfs (
+    key TEXT PRIMARY KEY, input_hash TEXT, pdf BLOB,
+    size_bytes INTEGER, created REAL, last_access REAL, hits INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pdfs_access ON pdfs (last_access);
+"""
+
+
+def default_path():
+    return os.environ.get(STORE_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "oring", "results.sqlite")
+
+
+def report_key(**report_kwargs) -> str:
+    """PDF 報告輸入 (含圖片 bytes) 的穩定雜湊；bytes 以其 sha256 代表"""
+    def normalize(value):
+        if isinstance(value, (bytes, bytearray)):
+            return ("bytes", hashlib.sha256(value).hexdigest())
+        if isinstance(value, dict):
+            return tuple(sorted((k, normalize(v)) for k, v in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(normalize(v) for v in value)
+        return value
+    return hashlib.sha256(repr(normalize(report_kwargs)).encode("utf-8")).hexdigest()[:32]
+
+
+class ResultStore:
+    """SQLite 結果儲存；path 預設為 default_path()，max_bytes 預設由 ORING_STORE_MAX_MB 決定"""
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or default_path()
+        if max_bytes is None:
+            max_bytes = float(os.environ.get(MAX_MB_ENV) or DEFAULT_MAX_MB) * 2**20
+        self.max_bytes = int(max_bytes)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")  # 舊版建立的 WAL 資料庫改回 rollback journal
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            with conn:  # 交易：正常結束 commit，例外 rollback
+                yield conn
+
+    @staticmethod
+    def key(spec: DesignSpec, engine=ENGINE_MC):
+        return f"{spec.digest()}:{engine}:v{RESULT_VERSION}"
+
+    # --- 模擬結果 ---
+
+    def get(self, spec: DesignSpec, engine=ENGINE_MC):
+        """已存的結果 (SimResult / AnalyticResult)，沒有時 None；命中時更新存取時間"""
+        key = self.key(spec, engine)
+        with self._connect() as conn:
+            row = conn.execute("SELECT result_json FROM runs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE runs SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        return result_from_json(json.loads(row["result_json"]))
+
+    def put(self, spec: DesignSpec, result, engine=ENGINE_MC, elapsed_s=None):
+        """寫入 (覆蓋) 一筆結果；seed 為 None 或結果與負載有關 (因時間預算停止) 時不寫入 → 是否寫入"""
+        if spec.seed is None or not getattr(result, "reproducible", True):
+            return False
+        spec_json = json.dumps(spec_to_json(spec), ensure_ascii=False)
+        result_json = json.dumps(result_to_json(result), ensure_ascii=False)
+        now = time.time()
+        values = {
+            "key": self.key(spec, engine), "input_hash": spec.digest(), "engine": engine,
+            "sim_count": getattr(result, "sim_count", 0), "seed": str(spec.seed), "sampler": spec.sampler,
+            "comp_mode": spec.comp_mode, "oring_type": spec.oring_type, "groove_type": spec.groove_type,
+            **{c: float(getattr(result, c)) for c in SUMMARY_COLUMNS},
+            "elapsed_s": elapsed_s if elapsed_s is not None else getattr(result, "elapsed_s", None),
+            "spec_json": spec_json, "result_json": result_json,
+            "size_bytes": len(spec_json) + len(result_json), "created": now, "last_access": now,
+        }
+        with self._connect() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO runs ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                         tuple(values.values()))
+        self.evict()
+        return True
+
+    # --- PDF 報告 ---
+
+    def get_pdf(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT pdf FROM pdfs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE pdfs SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        return bytes(row["pdf"])
+
+    def put_pdf(self, key, pdf_bytes, input_hash=None):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO pdfs (key, input_hash, pdf, size_bytes, created, last_access) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", (key, input_hash, pdf_bytes, len(pdf_bytes), now, now))
+        self.evict()
+
+    # --- 查詢 / 容量 ---
+
+    def history(self, limit=100, **filters):
+        """最近存取的結果摘要 (list of dicts，不含直方圖)；filters 為 FILTER_COLUMNS 的等值條件"""
+        unknown = set(filters) - set(FILTER_COLUMNS)
+        if unknown:
+            raise ValueError(f"不支援的查詢欄位: {', '.join(sorted(unknown))}")
+        where = " AND ".join(f"{name} = ?" for name in filters)
+        sql = (f"SELECT input_hash, engine, sim_count, seed, sampler, comp_mode, oring_type, groove_type, "
+               f"{', '.join(SUMMARY_COLUMNS)}, elapsed_s, hits, created, last_access, spec_json FROM runs"
+               + (f" WHERE {where}" if where else "") + " ORDER BY last_access DESC LIMIT ?")
+        with self._connect() as conn:
+            rows = conn.execute(sql, (*filters.values(), int(limit))).fetchall()
+        return [{**dict(row), "spec_json": json.loads(row["spec_json"])} for row in rows]
+
+    def stats(self):
+        with self._connect() as conn:
+            runs, run_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM runs").fetchone()
+            pdfs, pdf_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM pdfs").fetchone()
+        return {"runs": runs, "pdfs": pdfs, "bytes": run_bytes + pdf_bytes, "max_bytes": self.max_bytes}
+
+    def evict(self, max_bytes=None):
+        """合計大小超過上限時依 LRU 刪除至上限的 EVICT_TO → 刪除筆數"""
+        max_bytes = self.max_bytes if max_bytes is None else int(max_bytes)
+        with self._connect() as conn:
+            total = conn.execute("SELECT (SELECT COALESCE(SUM(size_bytes), 0) FROM runs)"
+                                 " + (SELECT COALESCE(SUM(size_bytes), 0) FROM pdfs)").fetchone()[0]
+            if total <= max_bytes:
+                return 0
+            target = max_bytes * EVICT_TO
+            victims = []
+            for table, key, size, _ in conn.execute(
+                    "SELECT 'runs', key, size_bytes, last_access FROM runs UNION ALL "
+                    "SELECT 'pdfs', key, size_bytes, last_access FROM pdfs ORDER BY last_access").fetchall():
+                if total <= target:
+                    break
+                victims.append((table, key))
+                total -= size
+            for table in ("runs", "pdfs"):
+                conn.executemany(f"DELETE FROM {table} WHERE key = ?", [(k,) for t, k in victims if t == table])
+        return len(victims)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查詢 / 整理持久化結果儲存")
+    parser.add_argument("--path", default=None, help=f"資料庫路徑 (預設 ${STORE_ENV} 或 {default_path()})")
+    parser.add_argument("--limit", type=int, default=20)
+    for name in FILTER_COLUMNS:
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, default=None)
+    parser.add_argument("--stats", action="store_true", help="顯示筆數與容量")
+    parser.add_argument("--evict", type=float, default=None, metavar="MB", help="依 LRU 縮減至指定容量")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.path)
+    if args.evict is not None:
+        print(f"evicted {store.evict(args.evict * 2**20)} entries")
+    if args.stats or args.evict is not None:
+        st = store.stats()
+        print(f"{st['runs']} runs, {st['pdfs']} PDFs, {st['bytes'] / 2**20:.1f} / {st['max_bytes'] / 2**20:.0f} MiB")
+    filters = {name: getattr(args, name) for name in FILTER_COLUMNS if getattr(args, name) is not None}
+    for row in store.history(args.limit, **filters):
+        last = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["last_access"]))
+        print(f"{row['input_hash']}  {row['engine']:<8} n={row['sim_count']:<9} seed={row['seed']:<10} "
+              f"yield={row['yield_combined']:8.3f}%  ppm={row['ppm_combined']:9.0f}  hits={row['hits']:<4} {last}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+設計空間掃描 (Design Sweep)
+
+對溝槽 / O-Ring 公稱尺寸的 2-D 或 3-D 網格一次批次計算良率。
+所有網格點共用同一組標準常態樣本 z (Common Random Numbers)，
+因此相鄰網格點的差異只來自設計本身，熱圖平滑、不受抽樣雜訊干擾。
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .engine import ratios_from_values
+from .spec import DesignSpec
+from .timing import tracked_cache
+
+SWEEP_SAMPLES = 20000
+MAX_BLOCK_ELEMS = 1 << 22  # 每批次 (網格點 × 樣本) 元素上限，控制記憶體
+
+DIM_LABELS = {
+    "cs": "O-Ring CS",
+    "irr_h": "O-Ring Height",
+    "irr_area": "O-Ring Area",
+    "g_depth": "Groove Height",
+    "g_width": "Groove Width",
+    "g_wtop": "Groove Width (Top)",
+    "g_wbtm": "Groove Width (Btm)",
+}
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    """掃描結果；各陣列形狀 = 各軸長度 (indexing='ij')"""
+    axis_names: tuple
+    axis_values: tuple
+    yield_comp: np.ndarray
+    yield_fill: np.ndarray
+    yield_combined: np.ndarray
+    feasible: np.ndarray  # 公稱尺寸下壓縮率與填充率皆落在目標區間
+    n_samples: int
+
+    @property
+    def ppm_combined(self):
+        return (100 - self.yield_combined) * 10000
+
+    def best(self):
+        """綜合良率最高的網格點 → ({dim_name: nominal}, yield_combined)"""
+        idx = np.unravel_index(np.argmax(self.yield_combined), self.yield_combined.shape)
+        point = {name: float(vals[i]) for name, vals, i in zip(self.axis_names, self.axis_values, idx)}
+        return point, float(self.yield_combined[idx])
+
+
+def _in_window(values, lo, hi):
+    return (values >= lo) & (values <= hi)
+
+
+def batch_yields(spec: DesignSpec, noms, z, sigmas=None):
+    """
+    以共用樣本 z (n × d, 欄位順序同 spec.active_dims()) 批次計算多組設計點的良率 (%)
+
+    noms / sigmas: {dim_name: (P,) 陣列}；未提供者沿用 spec 中的公稱值 / sigma。
+    → (yield_comp, yield_fill, yield_combined)，各為 (P,) 陣列
+    """
+    dims = spec.active_dims()
+    n_points = max(np.size(v) for v in list(noms.values()) + list((sigmas or {}).values()) + [1])
+    n_samples = len(z)
+    noms = {name: np.broadcast_to(noms.get(name, d.nom), (n_points,)) for name, d in dims}
+    sigmas = {name: np.broadcast_to((sigmas or {}).get(name, d.sigma), (n_points,)) for name, d in dims}
+
+    yield_comp = np.empty(n_points); yield_fill = np.empty(n_points); yield_combined = np.empty(n_points)
+    block = max(1, MAX_BLOCK_ELEMS // n_samples)
+    for start in range(0, n_points, block):
+        sl = slice(start, min(start + block, n_points))
+        values = {name: noms[name][sl, None] + sigmas[name][sl, None] * z[None, :, i]
+                  for i, (name, _) in enumerate(dims)}
+        compression_sim, fill_sim = ratios_from_values(spec, values)
+        pass_comp = _in_window(compression_sim, spec.target_comp_min, spec.target_comp_max)
+        pass_fill = _in_window(fill_sim, spec.target_fill_min, spec.target_fill_max)
+        yield_comp[sl] = pass_comp.mean(axis=1) * 100
+        yield_fill[sl] = pass_fill.mean(axis=1) * 100
+        yield_combined[sl] = (pass_comp & pass_fill).mean(axis=1) * 100
+    return yield_comp, yield_fill, yield_combined
+
+
+def common_normals(spec: DesignSpec, n_samples, seed=None):
+    """Common Random Numbers：所有設計點共用的標準常態樣本 (n × d)"""
+    rng = np.random.default_rng(spec.seed if seed is None else seed)
+    return rng.standard_normal((n_samples, len(spec.active_dims())))
+
+
+def nominal_feasible(spec: DesignSpec, noms):
+    """公稱尺寸下壓縮率與填充率是否皆落在目標區間"""
+    full = {name: np.asarray(noms.get(name, d.nom), dtype=float) for name, d in spec.active_dims()}
+    nominal_comp, nominal_fill = ratios_from_values(spec, full)
+    return (_in_window(nominal_comp, spec.target_comp_min, spec.target_comp_max)
+            & _in_window(nominal_fill, spec.target_fill_min, spec.target_fill_max))
+
+
+def sweep(spec: DesignSpec, axes, n_samples=SWEEP_SAMPLES, seed=None) -> SweepResult:
+    """
+    axes: [(dim_name, values), ...]，1–3 個軸，dim_name 必須是 spec.active_dims() 之一。
+    未掃描的尺寸維持 spec 中的公稱值；公差 / Cpk 不變。
+    """
+    names = [name for name, _ in spec.active_dims()]
+    if not 1 <= len(axes) <= 3:
+        raise ValueError("掃描軸數需為 1–3")
+    for name, _ in axes:
+        if name not in names:
+            raise ValueError(f"{name} 不在目前設計的尺寸中: {names}")
+
+    axis_names = tuple(name for name, _ in axes)
+    axis_values = tuple(np.asarray(vals, dtype=float) for _, vals in axes)
+    shape = tuple(len(v) for v in axis_values)
+    mesh = dict(zip(axis_names, (m.ravel() for m in np.meshgrid(*axis_values, indexing='ij'))))
+
+    z = common_normals(spec, n_samples, seed)
+    yield_comp, yield_fill, yield_combined = batch_yields(spec, mesh, z)
+    feasible = nominal_feasible(spec, mesh)
+    return SweepResult(
+        axis_names=axis_names,
+        axis_values=axis_values,
+        yield_comp=yield_comp.reshape(shape),
+        yield_fill=yield_fill.reshape(shape),
+        yield_combined=yield_combined.reshape(shape),
+        feasible=feasible.reshape(shape),
+        n_samples=n_samples,
+    )
+
+
+@tracked_cache(maxsize=8)
+def run_sweep(spec: DesignSpec, axes, n_samples=SWEEP_SAMPLES) -> SweepResult:
+    """快取入口；axes 需為 tuple of (dim_name, tuple(values))"""
+    return sweep(spec, axes, n_samples)
@@ -0,0 +1,162 @@
+"""
+各階段計時 (wall time / 樣本數 / RSS 高水位)，不依賴 Streamlit
+
+    timer = StageTimer()
+    with timer.stage("engine", samples=spec.sim_count):
+        res = run_simulation(spec)
+    timer.add_engine_stages(res)          # 引擎內部的抽樣 / 計算 / 累加耗時
+    timer.write_jsonl(log_path(), design=spec.digest())
+
+記憶體：rss_peak_bytes 為階段結束時的行程 RSS 高水位 (getrusage，幾乎無成本；只增不減)。
+不使用 tracemalloc：它是整個行程共用的狀態，多個 Streamlit session 同時量測會互相重設峰值，
+且會拖慢所有 session (單一設計的配置峰值請用 oring.bench 在獨立行程量測)。
+
+快取命中：以 tracked_cache 取代 lru_cache 的函式，在實際執行 (未命中) 時於呼叫端執行緒記一筆，
+StageTimer.call 由此判斷「這一次」呼叫是否命中；共用的 cache_info() 計數會混入其他 session 的命中。
+
+JSONL 每次執行一行：{"ts", ...context, "total_s", "stages": [...]}；
+路徑由環境變數 ORING_TIMING_LOG 指定，未設定時不寫檔。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache, wraps
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows 無 resource 模組
+    resource = None
+
+LOG_ENV = "ORING_TIMING_LOG"
+
+_calls = threading.local()  # 各執行緒實際執行 (快取未命中) 的 tracked_cache 函式次數
+
+
+def log_path():
+    """JSONL 記錄檔路徑 (環境變數 ORING_TIMING_LOG)；未設定時為 None"""
+    return os.environ.get(LOG_ENV) or None
+
+
+def rss_peak_bytes():
+    """行程 RSS 高水位 (bytes)；無 resource 模組時為 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux 單位為 KiB
+
+
+def _misses():
+    return getattr(_calls, "misses", 0)
+
+
+class _Uncached(Exception):
+    """tracked_cache 內部用：以例外帶出結果，lru_cache 不會快取拋出例外的呼叫"""
+
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+
+def tracked_cache(maxsize=128, cache_if=None):
+    """
+    同 lru_cache(maxsize)，另記錄呼叫端執行緒的未命中次數，供 StageTimer.call 判斷本次呼叫是否命中；
+    cache_if(result) 為 False 的結果照常回傳但不存入快取
+    """
+    def decorator(func):
+        @wraps(func)
+        def compute(*args, **kwargs):
+            _calls.misses = _misses() + 1
+            out = func(*args, **kwargs)
+            if cache_if is not None and not cache_if(out):
+                raise _Uncached(out)
+            return out
+
+        cached = lru_cache(maxsize=maxsize)(compute)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return cached(*args, **kwargs)
+            except _Uncached as e:
+                return e.value
+
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.tracks_hits = True
+        return wrapper
+    return decorator
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    wall_s: float
+    samples: Optional[int] = None
+    rss_peak_bytes: Optional[int] = None
+    cached: Optional[bool] = None   # 結果取自快取 (由呼叫端判斷並填入)
+
+    @property
+    def samples_per_s(self):
+        """吞吐量；快取命中時無意義，回傳 None"""
+        if not self.samples or self.wall_s <= 0 or self.cached:
+            return None
+        return self.samples / self.wall_s
+
+
+class StageTimer:
+    """依執行順序記錄各階段"""
+
+    def __init__(self):
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, samples=None, cached=None):
+        """計時區塊；yield 的 StageRecord 可在區塊內補填 samples / cached"""
+        record = StageRecord(name, 0.0, samples, cached=cached)
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_s = time.perf_counter() - t0
+            record.rss_peak_bytes = rss_peak_bytes()
+            self.records.append(record)
+
+    def call(self, name, func, *args, samples=None, **kwargs):
+        """計時一次 func 呼叫；func 為 tracked_cache 函式時另記錄本次呼叫是否命中快取"""
+        misses = _misses()
+        with self.stage(name, samples) as record:
+            out = func(*args, **kwargs)
+        if getattr(func, "tracks_hits", False):
+            record.cached = _misses() == misses
+        return out
+
+    def add_engine_stages(self, result, cached=None, prefix="engine."):
+        """
+        SimResult.stage_s (引擎內部各階段累計耗時，快取命中時為原始計算的耗時) → 子階段紀錄
+        cached 可為 {階段: 是否沿用} (增量計算時各節點不同)
+        """
+        for key, seconds in (getattr(result, "stage_s", None) or {}).items():
+            hit = cached.get(key) if isinstance(cached, dict) else cached
+            self.records.append(StageRecord(prefix + key, seconds, result.sim_count, cached=hit))
+
+    @property
+    def total_s(self):
+        """頂層階段 (不含 engine.* 子階段) 的總耗時"""
+        return sum(r.wall_s for r in self.records if "." not in r.stage)
+
+    def rows(self):
+        return [{**asdict(r), "samples_per_s": r.samples_per_s} for r in self.records]
+
+    def write_jsonl(self, path, **context):
+        """附加一行 JSON (本次執行的所有階段) 至 path；path 為 None 時不寫檔"""
+        if not path:
+            return
+        line = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **context,
+                "total_s": self.total_s, "stages": self.rows()}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
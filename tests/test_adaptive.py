@@ -0,0 +1,45 @@
+"""自適應停止：CI 寬度達標即停、與 workers 無關、樣本 / 時間預算上限"""
+import pytest
+
+from oring import DesignSpec, run_simulation, simulate_adaptive
+from test_engine import assert_same
+
+
+def test_adaptive_independent_of_workers():
+    spec = DesignSpec(seed=2, sim_count=400_000, ci_width_ppm=5000)
+    a = simulate_adaptive(spec)
+    b = simulate_adaptive(spec, workers=3)
+    assert a.stop_reason == b.stop_reason == "ci_width"
+    assert_same(a, b)
+    lo, hi = a.yield_combined_ci
+    assert (hi - lo) * 10000 <= spec.ci_width_ppm
+    assert a.sim_count < spec.sim_count
+
+
+def test_adaptive_sample_budget():
+    res = simulate_adaptive(DesignSpec(seed=2, sim_count=50_000, ci_width_ppm=1))
+    assert res.stop_reason == "sample_budget"
+    assert res.sim_count == 50_000
+
+
+def test_adaptive_requires_ci_width():
+    with pytest.raises(ValueError):
+        simulate_adaptive(DesignSpec(ci_width_ppm=0))
+
+
+def time_budget_spec(**kwargs):
+    """CI 寬度不可能達到、時間上限極短 → 第一輪後即因時間預算停止"""
+    return DesignSpec(seed=2, sim_count=10**6, ci_width_ppm=0.001, max_seconds=1e-6, **kwargs)
+
+
+def test_time_budget_result_not_cached():
+    spec = time_budget_spec()
+    first = run_simulation(spec)
+    assert first.stop_reason == "time_budget" and not first.reproducible
+    info = run_simulation.cache_info()
+    second = run_simulation(spec)
+    assert run_simulation.cache_info().misses == info.misses + 1
+    assert run_simulation.cache_info().currsize == info.currsize
+    assert second is not first
+    done = DesignSpec(seed=2, sim_count=50_000, ci_width_ppm=1)
+    assert run_simulation(done).reproducible and run_simulation(done) is run_simulation(done)
@@ -0,0 +1,48 @@
+"""解析估算：與 Monte Carlo 在抽樣誤差內一致"""
+from dataclasses import replace
+from itertools import product
+
+import numpy as np
+import pytest
+
+from oring import AXIAL, RADIAL, STANDARD, IRREGULAR, RECTANGULAR, TRAPEZOIDAL, DesignSpec, DimSpec, simulate
+from oring.analytic import estimate
+
+Z999 = 3.29  # 雙尾 99.9 %：解析估算本身有近似誤差，避免以 95 % 區間造成偶發失敗
+
+
+def centered_spec(comp_mode, oring_type, groove_type, stretch_pct, **kwargs):
+    """目標區間以解析平均 / 標準差為中心 (良率約 85 %)，側壓改用較窄的溝槽使壓縮率為正"""
+    spec = DesignSpec(comp_mode=comp_mode, oring_type=oring_type, groove_type=groove_type,
+                      stretch_pct=stretch_pct, **kwargs)
+    if comp_mode == RADIAL:
+        spec = replace(spec, g_depth=DimSpec(2.6, 0.05, 1.33), g_width=DimSpec(1.55, 0.05, 1.33),
+                       g_wtop=DimSpec(1.7, 0.05, 1.33), g_wbtm=DimSpec(1.4, 0.05, 1.33))
+    a = estimate(spec)
+    return replace(spec, target_comp_min=a.mean_comp - 1.5 * a.std_comp, target_comp_max=a.mean_comp + 2 * a.std_comp,
+                   target_fill_min=a.mean_fill - 2 * a.std_fill, target_fill_max=a.mean_fill + 1.5 * a.std_fill)
+
+
+@pytest.mark.parametrize("comp_mode,oring_type,groove_type,stretch_pct",
+                         list(product((AXIAL, RADIAL), (STANDARD, IRREGULAR), (RECTANGULAR, TRAPEZOIDAL), (0.0, 3.0))))
+def test_mc_matches_analytic(comp_mode, oring_type, groove_type, stretch_pct):
+    spec = centered_spec(comp_mode, oring_type, groove_type, stretch_pct, seed=7, sim_count=200_000)
+    mc = simulate(spec, keep_samples=False)
+    a = estimate(spec)
+    for key in ("yield_comp", "yield_fill", "yield_combined"):
+        p = getattr(mc, key) / 100
+        half = Z999 * np.sqrt(p * (1 - p) / mc.sim_count) * 100
+        assert abs(getattr(a, key) - getattr(mc, key)) <= half, key
+    assert a.mean_comp == pytest.approx(mc.mean_comp, abs=4 * mc.std_comp / np.sqrt(mc.sim_count))
+    assert a.std_fill == pytest.approx(mc.std_fill, rel=0.01)
+
+
+def test_ppm_consistent_with_yield():
+    a = estimate(DesignSpec())
+    assert a.ppm_combined == pytest.approx((100 - a.yield_combined) * 10000)
+    assert a.yield_combined <= min(a.yield_comp, a.yield_fill) + 1e-9
+
+
+def test_missing_oring_rejected():
+    with pytest.raises(ValueError):
+        estimate(DesignSpec(cs=DimSpec(0.0, 0.0, 0.0)))
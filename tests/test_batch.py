@@ -0,0 +1,72 @@
+"""批次計算：設計表解析與中斷續跑"""
+import pandas as pd
+import pytest
+
+from oring import RADIAL, DesignSpec
+from oring.batch import ENGINE_ANALYTIC, ENGINE_MC, STAT_COLUMNS, _load_done, _partial_path, run_batch, spec_from_row
+
+DESIGNS = pd.DataFrame([
+    {"design_id": "A", "sim_count": 20_000, "seed": 1},
+    {"design_id": "B", "sim_count": 20_000, "seed": 2, "comp_mode": "radial", "g_width": 1.6},
+    {"design_id": "C", "sim_count": 20_000, "seed": 3, "cs": 0.0},
+])
+
+
+def test_spec_from_row_defaults_and_choices():
+    spec = spec_from_row({"comp_mode": "Radial", "cs": 2.1, "cs_tol": None, "sim_count": 1000.0})
+    assert spec.comp_mode == RADIAL
+    assert spec.cs.nom == 2.1 and spec.cs.tol == DesignSpec().cs.tol
+    assert spec.sim_count == 1000 and isinstance(spec.sim_count, int)
+    with pytest.raises(ValueError):
+        spec_from_row({"groove_type": "hexagonal"})
+
+
+@pytest.mark.parametrize("suffix", (".csv", ".parquet"))
+def test_resume_reuses_completed_designs(tmp_path, suffix):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    output = str(tmp_path / f"results{suffix}")
+    computed = {}
+    first = run_batch(DESIGNS, output, workers=1, results_out=computed)
+    assert sorted(computed) == ["A", "B"]
+    assert list(first["status"]) == ["ok", "ok", "error"]
+
+    # 全部沿用：不重新計算，結果相同
+    computed = {}
+    second = run_batch(DESIGNS, output, workers=1, results_out=computed)
+    assert computed == {}
+    columns = ["design_id", "input_hash", "status", "sim_count", "seed"] + STAT_COLUMNS
+    pd.testing.assert_frame_equal(first[columns], second[columns], check_dtype=False)
+
+    # 只有輸入變更的設計重算
+    changed = DESIGNS.copy()
+    changed.loc[1, "seed"] = 9
+    computed = {}
+    run_batch(changed, output, workers=1, results_out=computed)
+    assert sorted(computed) == ["B"]
+
+    # 引擎不同視為不同結果
+    computed = {}
+    run_batch(changed, output, engine=ENGINE_ANALYTIC, workers=1, results_out=computed)
+    assert sorted(computed) == ["A", "B"]
+
+
+def test_resume_from_partial(tmp_path):
+    output = str(tmp_path / "results.csv")
+    run_batch(DESIGNS, output, workers=1)
+    # 模擬中斷：完整輸出不存在，只留下 partial
+    pd.read_csv(output).iloc[:1].to_csv(_partial_path(output), index=False)
+    (tmp_path / "results.csv").unlink()
+    computed = {}
+    df = run_batch(DESIGNS, output, engine=ENGINE_MC, workers=1, results_out=computed)
+    assert sorted(computed) == ["B"]
+    assert list(df["status"]) == ["ok", "ok", "error"]
+    assert not (tmp_path / "results.csv.partial.csv").exists()
+
+
+def test_load_done_keeps_numeric_looking_hash(tmp_path):
+    # 全為數字的雜湊不可被 read_csv 轉成整數 (前導 0 會遺失，續算時比對不到)
+    output = str(tmp_path / "out.csv")
+    pd.DataFrame([{"design_id": "007", "input_hash": "0012345678901234", "engine": ENGINE_MC, "status": "ok"}]) \
+        .to_csv(output, index=False)
+    assert set(_load_done(output)) == {("007", "0012345678901234", ENGINE_MC)}
@@ -0,0 +1,24 @@
+"""效能基準：重跑 (recheck) 不覆寫原始量測"""
+import copy
+
+from oring import bench
+from oring.bench import compare, recheck, run_benchmark
+
+
+def test_recheck_keeps_original_measurements(monkeypatch):
+    monkeypatch.setattr(bench, "MIN_DELTA_S", 0.0)  # 1e4 樣本的延遲低於計時雜訊門檻
+    results = run_benchmark((10**4,), designs=["std-rect-axial"], modes=["stream", "analytic"], repeat=1)
+    assert [r["status"] for r in results] == ["ok", "ok"]
+    original = copy.deepcopy(results)
+
+    assert compare(results, {"results": original}) == []
+    fast = copy.deepcopy(original)
+    for row in fast:
+        row["min_s"] /= 1000  # 基準快 1000 倍 → 必定退步
+    regressions = recheck(results, {"results": fast}, rounds=2, repeat=1, measure_memory=False)
+    assert len(regressions) == 2
+    for row, before in zip(results, original):
+        assert {k: row[k] for k in before} == before
+        assert row["rechecks"] == 2
+        assert row["recheck_min_s"] > 0 and row["recheck_wall_s"] >= row["recheck_min_s"]
+        assert "recheck_peak_bytes" not in row
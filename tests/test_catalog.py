@@ -0,0 +1,46 @@
+"""標準線徑目錄：載入排序、標準篩選、選型排序與兩種計算方法一致"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from oring import DesignSpec, DimSpec
+from oring.analytic import estimate
+from oring.catalog import METHOD_ANALYTIC, METHOD_MC, STANDARDS, load_catalog, rank_cross_sections
+
+
+def test_catalog_sorted_and_readonly():
+    catalog = load_catalog()
+    assert len(catalog) > 0
+    assert (np.diff(catalog.cs) >= 0).all()
+    assert set(catalog.standard) <= set(STANDARDS)
+    with pytest.raises(ValueError):
+        catalog.cs[0] = 1.0
+
+
+def test_rank_sorted_and_filtered():
+    fits = rank_cross_sections(DesignSpec(), standards=("AS568",), top=5)
+    assert 0 < len(fits) <= 5
+    assert all(f.standard == "AS568" for f in fits)
+    ylds = [f.yield_combined for f in fits]
+    assert ylds == sorted(ylds, reverse=True)
+    top = fits[0]
+    spec = DesignSpec()
+    expected = estimate(replace(spec, cs=DimSpec(top.cs, top.tol, spec.cs.cpk))).yield_combined
+    assert top.yield_combined == pytest.approx(expected)
+
+
+def test_mc_method_agrees_with_analytic():
+    spec = DesignSpec()
+    analytic = {(f.standard, f.series): f.yield_combined for f in rank_cross_sections(spec, top=3)}
+    mc = {(f.standard, f.series): f.yield_combined
+          for f in rank_cross_sections(spec, top=len(load_catalog()), method=METHOD_MC, n_samples=20_000)}
+    for key, y in analytic.items():
+        p = y / 100
+        assert abs(mc[key] - y) <= 4 * np.sqrt(p * (1 - p) / 20_000) * 100 + 1e-9
+
+
+def test_unknown_method_and_empty_subset():
+    with pytest.raises(ValueError):
+        rank_cross_sections(DesignSpec(), method="nope")
+    assert rank_cross_sections(DesignSpec(), standards=("nope",), method=METHOD_ANALYTIC) == []
@@ -0,0 +1,72 @@
+"""實測尺寸分佈：匯入只解析一次、配對尺寸保留相關性、與常態近似一致"""
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oring import CHUNK_SIZE, DesignSpec, SAMPLER_LHS, simulate
+from oring import empirical
+from oring.analytic import estimate
+from oring.empirical import dataset_summary, ingest, ingest_bytes, measured_values, open_dataset
+from test_engine import assert_same
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv(empirical.CACHE_ENV, str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+def _groove_csv(path, n=4000, seed=0):
+    spec = DesignSpec()
+    rng = np.random.default_rng(seed)
+    depth = rng.normal(spec.g_depth.nom, spec.g_depth.sigma, n)
+    width = spec.g_width.nom + 2.0 * (depth - spec.g_depth.nom) + rng.normal(0, spec.g_width.sigma / 4, n)
+    pd.DataFrame({"G_Depth": depth, "g_width": width, "note": "x"}).to_csv(path, index=False)
+    return path
+
+
+def test_ingest_once_and_sorted(tmp_path, monkeypatch):
+    path = _groove_csv(tmp_path / "groove.csv")
+    dataset_id = ingest(path)
+    table = open_dataset(dataset_id)
+    assert table.dtype.names == ("g_depth", "g_width") and table.dtype["g_depth"] == np.float32
+    assert (np.diff(table["g_depth"]) >= 0).all()
+    monkeypatch.setattr(empirical, "_read_table", lambda *a: pytest.fail("已匯入的檔案不應重新解析"))
+    assert ingest(path) == dataset_id
+    assert ingest_bytes(path.read_bytes()) == dataset_id
+
+
+def test_paired_dims_keep_correlation(tmp_path):
+    dataset_id = ingest(_groove_csv(tmp_path / "groove.csv"))
+    spec = DesignSpec(measurements=(dataset_id,))
+    values = measured_values(spec, 20_000, np.random.default_rng(1))
+    assert np.corrcoef(values["g_depth"], values["g_width"])[0, 1] > 0.9
+
+
+def test_measured_run_matches_normal_approx(tmp_path):
+    dataset_id = ingest(_groove_csv(tmp_path / "groove.csv", n=20_000))
+    spec = DesignSpec(seed=4, sim_count=200_000, measurements=(dataset_id,))
+    n, mean, std, _, _ = dataset_summary(dataset_id)["g_depth"]
+    assert n == 20_000
+    mc = simulate(spec, keep_samples=False)
+    assert mc.mean_comp == pytest.approx(estimate(spec).mean_comp, abs=5 * mc.std_comp / np.sqrt(mc.sim_count) + 0.01)
+
+
+@pytest.mark.parametrize("sampler", ("random", SAMPLER_LHS))
+def test_measured_run_independent_of_workers(tmp_path, sampler):
+    dataset_id = ingest(_groove_csv(tmp_path / "groove.csv"))
+    spec = DesignSpec(seed=6, sim_count=CHUNK_SIZE + 500, sampler=sampler, measurements=(dataset_id,))
+    assert_same(simulate(spec), simulate(spec, workers=2))
+
+
+def test_bad_tables_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ingest_bytes(b"a,b\n1,2\n3,4\n")
+    with pytest.raises(ValueError):
+        ingest_bytes(b"cs\n1.0\n")
+    first = ingest(_groove_csv(tmp_path / "a.csv", seed=1))
+    second = ingest(_groove_csv(tmp_path / "b.csv", seed=2))
+    with pytest.raises(ValueError):
+        simulate(replace(DesignSpec(sim_count=1000), measurements=(first, second)))
@@ -0,0 +1,52 @@
+"""引擎：不依賴 Streamlit、規格驗證與結果欄位"""
+import subprocess
+import sys
+from dataclasses import fields
+
+import numpy as np
+import pytest
+
+from oring import DesignSpec, DimSpec, simulate
+
+STATS = ("mean_comp", "std_comp", "yield_comp", "mean_fill", "std_fill", "yield_fill", "yield_combined",
+         "yield_combined_se", "yield_combined_ci", "sim_count", "seed")
+
+
+def assert_same(a, b):
+    """兩個 SimResult 的統計值、直方圖與樣本逐位元相同"""
+    for name in STATS:
+        assert getattr(a, name) == getattr(b, name), name
+    for name in ("comp_hist", "fill_hist"):
+        ha, hb = getattr(a, name), getattr(b, name)
+        assert np.array_equal(ha.counts, hb.counts) and (ha.underflow, ha.overflow) == (hb.underflow, hb.overflow)
+    for name in ("compression", "fill", "weights"):
+        xa, xb = getattr(a, name), getattr(b, name)
+        assert (xa is None) == (xb is None), name
+        if xa is not None:
+            assert np.array_equal(xa, xb), name
+
+
+
+def test_import_without_streamlit():
+    code = "import sys, oring; oring.simulate(oring.DesignSpec(seed=1, sim_count=1000)); print('streamlit' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_seeded_run_reproducible():
+    spec = DesignSpec(seed=4, sim_count=20_000)
+    a, b = simulate(spec), simulate(spec)
+    assert_same(a, b)
+    assert 0.0 <= a.yield_combined <= min(a.yield_comp, a.yield_fill) <= 100.0
+
+
+def test_invalid_spec_rejected():
+    with pytest.raises(ValueError):
+        simulate(DesignSpec(cs=DimSpec(0.0, 0.0, 0.0)))
+    with pytest.raises(ValueError):
+        simulate(DesignSpec(sim_count=0))
+
+
+def test_sim_result_fields_cover_stats():
+    names = {f.name for f in fields(simulate(DesignSpec(seed=1, sim_count=1000)))}
+    assert set(STATS) <= names
@@ -0,0 +1,32 @@
+"""溫度 / 膨潤掃描：參考溫度與室溫模擬相同、熱膨脹與膨潤的方向、輸入驗證"""
+import numpy as np
+import pytest
+
+from oring import DesignSpec, simulate
+from oring.environment import GROOVE_CTE, ORING_CTE, T_REF, env_sweep, scale_ratio
+
+
+def test_reference_point_matches_simulation():
+    spec = DesignSpec(seed=5)
+    res = env_sweep(spec, [T_REF, 80.0], [0.0, 0.05], n_samples=50_000)
+    mc = simulate(DesignSpec(seed=5, sim_count=50_000), keep_samples=False)
+    assert res.yield_combined.shape == (2, 2)
+    assert res.yield_combined[0, 0] == pytest.approx(mc.yield_combined)
+    assert res.mean_comp[0, 0] == pytest.approx(mc.mean_comp)
+    temp, swell, worst = res.worst()
+    assert worst == res.yield_combined.min() and temp in res.temps and swell in res.swells
+
+
+def test_expansion_and_swell_raise_compression():
+    assert scale_ratio([T_REF], [0.0], 2.3e-5, 2.3e-4)[0, 0] == 1.0
+    res = env_sweep(DesignSpec(seed=1), [T_REF, 100.0], [0.0, 0.1], alpha_groove=GROOVE_CTE["Aluminium"],
+                    alpha_oring=ORING_CTE["NBR"], n_samples=10_000)
+    assert res.nominal_comp[1, 0] > res.nominal_comp[0, 0]   # O-Ring 熱膨脹大於溝槽
+    assert res.nominal_comp[0, 1] > res.nominal_comp[0, 0]   # 膨潤
+    assert np.all(np.diff(res.mean_fill, axis=1) > 0)
+
+
+@pytest.mark.parametrize("temps,swells", (([], [0.0]), ([20.0], []), ([20.0], [-1.0])))
+def test_invalid_grid_rejected(temps, swells):
+    with pytest.raises(ValueError):
+        env_sweep(DesignSpec(), temps, swells, n_samples=100)
@@ -0,0 +1,50 @@
+"""預先分箱直方圖：與 np.histogram 一致、可跨批次合併、目標上下限落在 bin 邊界"""
+import numpy as np
+import pytest
+
+from oring import DesignSpec, Histogram, simulate
+from oring.analytic import histogram_edges
+
+EDGES = np.linspace(-2.0, 2.0, 41)
+
+
+def test_add_matches_numpy():
+    values = np.concatenate([np.random.default_rng(0).normal(size=10_000), EDGES[[0, -1]], [-5.0, 5.0]])
+    weights = np.random.default_rng(1).random(len(values))
+    hist = Histogram.empty(EDGES)
+    hist.add(values)
+    assert np.array_equal(hist.counts, np.histogram(values, EDGES)[0])
+    assert (hist.underflow, hist.overflow) == (np.count_nonzero(values < -2), np.count_nonzero(values > 2))
+    weighted = Histogram.empty(EDGES, dtype=float)
+    weighted.add(values, weights)
+    assert np.allclose(weighted.counts, np.histogram(values, EDGES, weights=weights)[0])
+
+
+def test_merge_adds_counts():
+    rng = np.random.default_rng(2)
+    a, b, both = Histogram.empty(EDGES), Histogram.empty(EDGES), Histogram.empty(EDGES)
+    x, y = rng.normal(size=500), rng.normal(scale=2, size=700)
+    a.add(x); b.add(y); both.add(np.concatenate([x, y]))
+    merged = a.merge(b)
+    assert np.array_equal(merged.counts, both.counts) and merged.total == 1200
+    with pytest.raises(ValueError):
+        a.merge(Histogram.empty(EDGES + 0.1))
+
+
+def test_edges_aligned_to_targets():
+    spec = DesignSpec()
+    for edges, t_min, t_max in zip(histogram_edges(spec), (spec.target_comp_min, spec.target_fill_min),
+                                   (spec.target_comp_max, spec.target_fill_max)):
+        # 等寬 bin 的格點延伸後恰好經過目標上下限 (範圍外的上下限也對齊)
+        width = edges[1] - edges[0]
+        for limit in (t_min, t_max):
+            k = (edges - limit) / width
+            assert np.allclose(k, np.round(k))
+
+
+def test_yield_from_bins_matches_samples():
+    spec = DesignSpec(seed=8, sim_count=30_000)
+    res = simulate(spec)
+    inside = (res.compression >= spec.target_comp_min) & (res.compression <= spec.target_comp_max)
+    assert res.yield_comp == pytest.approx(100 * np.count_nonzero(inside) / res.sim_count)
+    assert res.comp_hist.total == res.fill_hist.total == res.sim_count
@@ -0,0 +1,42 @@
+"""省記憶體模式：lean 與標準模式逐位元相同、lean32 在抽樣誤差內一致、各執行模式結果相同"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from oring import (
+    CHUNK_SIZE, IRREGULAR, RADIAL, TRAPEZOIDAL, DesignSpec, MEMORY_LEAN, MEMORY_LEAN32, SAMPLERS, simulate,
+)
+from test_engine import assert_same
+
+Z999 = 3.29
+SIZE = 2 * CHUNK_SIZE + 1000  # 3 個批次，最後一批不滿
+
+
+@pytest.mark.parametrize("sampler", SAMPLERS)
+def test_lean_matches_standard(sampler):
+    spec = DesignSpec(seed=3, sim_count=SIZE, sampler=sampler, comp_mode=RADIAL, stretch_pct=1.5)
+    ref = simulate(spec)
+    lean = simulate(replace(spec, memory_mode=MEMORY_LEAN))
+    assert lean.peak_bytes > 0
+    assert_same(ref, replace(lean, peak_bytes=None))
+    # lean32 的 random 抽樣為 float32 亂數序列 (與 float64 不同)，只要求在抽樣誤差內一致
+    lean32 = simulate(replace(spec, memory_mode=MEMORY_LEAN32))
+    assert lean32.compression.dtype == np.float32
+    assert lean32.yield_combined == pytest.approx(ref.yield_combined, abs=2 * Z999 * ref.yield_combined_se)
+    assert lean32.mean_fill == pytest.approx(ref.mean_fill, abs=2 * Z999 * ref.std_fill / np.sqrt(SIZE))
+
+
+@pytest.mark.parametrize("memory_mode", (MEMORY_LEAN, MEMORY_LEAN32))
+def test_lean_execution_modes_identical(memory_mode):
+    spec = DesignSpec(seed=11, sim_count=SIZE, memory_mode=memory_mode,
+                      groove_type=TRAPEZOIDAL, oring_type=IRREGULAR, stretch_pct=2.0)
+    ref = simulate(spec)
+    assert_same(ref, simulate(spec, workers=3))
+    assert_same(ref, simulate(spec, workers=2, executor="process"))
+    assert_same(replace(ref, compression=None, fill=None, weights=None), simulate(spec, keep_samples=False, workers=3))
+
+
+def test_unknown_memory_mode_rejected():
+    with pytest.raises(ValueError):
+        simulate(DesignSpec(memory_mode="tiny"))
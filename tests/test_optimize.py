@@ -0,0 +1,28 @@
+"""溝槽最佳化：成本模式的搜尋樣本上限與最終達標判定"""
+from dataclasses import replace
+
+import pytest
+
+from oring import DesignSpec, DimSpec
+from oring.optimize import OBJECTIVE_COST, SEARCH_SAMPLES, optimize_groove
+
+
+def tight_oring_spec():
+    base = DesignSpec(seed=1)
+    return replace(base, cs=DimSpec(base.cs.nom, 0.02, 2.0))
+
+
+@pytest.mark.parametrize("required_ppm", (1000, 20))
+def test_cost_mode_target_met_on_final_samples(required_ppm):
+    res = optimize_groove(tight_oring_spec(), OBJECTIVE_COST, required_ppm=required_ppm)
+    assert res.search_samples == min(res.n_samples, SEARCH_SAMPLES)
+    assert res.target_met == (res.ppm_combined <= required_ppm)
+    assert res.target_met
+    assert res.cost < res.start_cost
+
+
+def test_cost_mode_reports_unreachable_target():
+    # O-Ring 公差主導：溝槽公差收緊到解析度仍不達標
+    res = optimize_groove(DesignSpec(seed=1), OBJECTIVE_COST, required_ppm=1000)
+    assert not res.target_met
+    assert res.ppm_combined > 1000
@@ -0,0 +1,21 @@
+"""多核心：相同 seed 的結果與 workers 數、執行緒 / 行程池無關"""
+from dataclasses import replace
+
+from oring import CHUNK_SIZE, IRREGULAR, TRAPEZOIDAL, DesignSpec, simulate
+from test_engine import assert_same
+
+SIZE = 2 * CHUNK_SIZE + 1000  # 3 個批次，最後一批不滿
+
+
+def test_workers_identical():
+    spec = DesignSpec(seed=11, sim_count=SIZE,
+                      groove_type=TRAPEZOIDAL, oring_type=IRREGULAR, stretch_pct=2.0)
+    ref = simulate(spec)
+    assert_same(ref, simulate(spec, workers=3))
+    assert_same(ref, simulate(spec, workers=2, executor="process"))
+    assert_same(replace(ref, compression=None, fill=None, weights=None), simulate(spec, keep_samples=False, workers=3))
+
+
+def test_unseeded_run_records_seed():
+    res = simulate(DesignSpec(sim_count=10_000), keep_samples=False)
+    assert_same(res, simulate(DesignSpec(sim_count=10_000, seed=res.seed), keep_samples=False))
@@ -0,0 +1,72 @@
+"""增量重算：Pipeline.run 與 simulate 逐位元相同、只重算受影響的節點"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from oring import IRREGULAR, RADIAL, TRAPEZOIDAL, CHUNK_SIZE, DesignSpec, DimSpec, simulate
+from oring.pipeline import MAX_SAMPLES, SAMPLERS, Pipeline, estimated_bytes, supports
+
+from test_engine import assert_same
+
+EDITS = [
+    {},
+    {"g_width": DimSpec(4.1, 0.05, 1.33)},
+    {"target_comp_min": 12.0, "target_fill_max": 80.0},
+    {"stretch_pct": 2.0},
+    {"cs": DimSpec(2.1, 0.06, 1.0)},
+    {"comp_mode": RADIAL},
+    {"oring_type": IRREGULAR, "groove_type": TRAPEZOIDAL},
+    {"g_depth": DimSpec(1.5, 0.0, 1.33)},  # 公差 0 → random 抽樣的 z 欄位改變
+    {"seed": 2},
+]
+
+
+@pytest.mark.parametrize("sampler", SAMPLERS)
+def test_pipeline_matches_simulate(sampler):
+    pipe = Pipeline()
+    spec = DesignSpec(seed=1, sim_count=CHUNK_SIZE + 5000, sampler=sampler)
+    for edit in EDITS:
+        spec = replace(spec, **edit)
+        assert_same(simulate(spec), replace(pipe.run(spec), stage_s=None))
+
+
+def test_target_edit_reuses_upstream():
+    pipe = Pipeline()
+    spec = DesignSpec(seed=1, sim_count=50_000)
+    pipe.run(spec)
+    pipe.run(replace(spec, target_comp_min=12.0))
+    recomputed = {name for name, _, reused in pipe.last_run if not reused}
+    assert recomputed == {"hists", "masks", "stats"}  # bin 邊界對齊目標區間 → 直方圖重新計數
+    pipe.run(replace(spec, target_comp_min=12.0, g_width=DimSpec(4.1, 0.05, 1.33)))
+    assert "noise" not in {name for name, _, reused in pipe.last_run if not reused}
+
+
+def test_supports():
+    assert supports(DesignSpec(sim_count=MAX_SAMPLES))
+    assert not supports(DesignSpec(sim_count=MAX_SAMPLES + 1))
+    assert not supports(DesignSpec(sampler="importance"))
+    assert not supports(DesignSpec(ci_width_ppm=1000.0))
+    with pytest.raises(ValueError):
+        Pipeline().run(DesignSpec(sampler="importance"))
+
+
+def test_estimated_bytes_matches_kept_arrays():
+    spec = DesignSpec(seed=1, sim_count=20_000, oring_type=IRREGULAR, groove_type=TRAPEZOIDAL, stretch_pct=1.0)
+    pipe = Pipeline()
+    pipe.run(spec)
+    seen, total = set(), 0
+    for _, output in pipe._cache.values():
+        stack = [output]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, np.ndarray) and obj.size == spec.sim_count:
+                base = obj if obj.base is None else obj.base
+                if id(base) not in seen:
+                    seen.add(id(base))
+                    total += base.nbytes
+            elif isinstance(obj, (tuple, list)):
+                stack.extend(obj)
+            elif isinstance(obj, dict):
+                stack.extend(obj.values())
+    assert total == estimated_bytes(spec)
@@ -0,0 +1,39 @@
+"""繪圖：不載入 pyplot、字型查詢只做一次、示意圖依幾何快取"""
+import subprocess
+import sys
+from dataclasses import replace
+
+import numpy as np
+
+from oring import DesignSpec, DimSpec
+from oring.plots import get_chinese_font, hist_png, schematic_geometry, schematic_png
+
+
+def test_plots_do_not_import_pyplot():
+    code = ("import sys; from oring import DesignSpec; from oring.plots import schematic_png; "
+            "schematic_png(DesignSpec(), dpi=50); print(sorted(m for m in ('matplotlib.pyplot', 'reportlab') "
+            "if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_font_lookup_cached():
+    get_chinese_font()
+    hits = get_chinese_font.cache_info().hits
+    get_chinese_font()
+    assert get_chinese_font.cache_info().hits == hits + 1
+
+
+def test_png_outputs():
+    assert schematic_png(DesignSpec(), dpi=50).startswith(b"\x89PNG")
+    assert hist_png(np.array([0.0, 1.0, 2.0]), np.array([3, 4]), "#2196F3", 0.5, 1.5, "t").startswith(b"\x89PNG")
+
+
+def test_schematic_cached_on_geometry():
+    spec = DesignSpec()
+    png = schematic_png(spec, dpi=50)
+    # 目標區間 / seed / 樣本數不影響示意圖 → 直接沿用快取的 bytes
+    assert schematic_png(replace(spec, seed=3, sim_count=10, target_comp_max=40.0), dpi=50) is png
+    assert schematic_png(replace(spec, g_depth=DimSpec(2.2, 0.05, 1.33)), dpi=50) is not png
+    flat = replace(spec, g_depth=DimSpec(0.0, 0.0, 1.33))
+    assert schematic_geometry(flat) is None and schematic_png(flat) is None
@@ -0,0 +1,73 @@
+"""PDF 報告：浮水印快取；彙整報告的直方圖 / 示意圖以向量繪製 (不嵌入點陣圖)"""
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from oring import DesignSpec, DimSpec, simulate
+from oring.plots import schematic_geometry
+from oring.report import (
+    _hist_data, _nice_ticks, build_batch_report, build_oring_pdf_report, pdf_inputs, pdf_results, prepare_watermark,
+)
+
+pypdf = pytest.importorskip("pypdf")
+
+
+def _logo_png():
+    buf = BytesIO()
+    Image.new("RGB", (64, 32), (20, 80, 200)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _images(reader):
+    return [x for page in reader.pages
+            for x in page["/Resources"].get("/XObject", {}).values() if x.get_object()["/Subtype"] == "/Image"]
+
+
+def test_prepare_watermark_cached():
+    logo = _logo_png()
+    png = prepare_watermark(logo)
+    assert png.startswith(b"\x89PNG") and prepare_watermark(logo) is png
+    assert prepare_watermark(b"not an image") is None
+
+
+@pytest.mark.parametrize("with_logo", (False, True))
+def test_single_report_watermark(with_logo):
+    spec = DesignSpec(seed=1, sim_count=5000)
+    res = simulate(spec, keep_samples=False)
+    result_data, verdict_data = pdf_results(spec, res)
+    pdf = build_oring_pdf_report("P", "E", "T", pdf_inputs(spec), result_data, verdict_data, None, None, None,
+                                 _logo_png() if with_logo else None, hist_data=_hist_data(spec, res))
+    reader = pypdf.PdfReader(pdf)
+    assert "Compression Distribution" in "".join(page.extract_text() for page in reader.pages)
+    assert bool(_images(reader)) == with_logo  # 只有浮水印是點陣圖
+
+
+def test_single_report_vector_schematic():
+    spec = DesignSpec(seed=1, sim_count=5000)
+    res = simulate(spec, keep_samples=False)
+    result_data, verdict_data = pdf_results(spec, res)
+    pdf = build_oring_pdf_report("P", "E", "T", pdf_inputs(spec), result_data, verdict_data, None, None, None, None,
+                                 diagram_geometry=schematic_geometry(spec), hist_data=_hist_data(spec, res))
+    assert not _images(pypdf.PdfReader(pdf))
+
+
+def test_batch_report_is_vector_only(tmp_path):
+    items = [("A", DesignSpec(seed=1, sim_count=5000)),
+             ("B", DesignSpec(seed=2, sim_count=5000, stretch_pct=2.0)),
+             ("C", DesignSpec(seed=3, cs=DimSpec(0.0, 0.0, 0.0))),
+             ("D", "ValueError: bad row")]
+    output = tmp_path / "review.pdf"
+    results = build_batch_report(items, output, workers=1)
+    assert isinstance(results["C"], str) and results["D"] == "ValueError: bad row"
+
+    reader = pypdf.PdfReader(str(output))
+    assert [o.title for o in reader.outline] == ["A", "B", "C", "D"]
+    text = "".join(page.extract_text() for page in reader.pages)
+    assert "Compression Distribution" in text and "Fill Rate Distribution" in text
+    assert not _images(reader)
+
+
+def test_nice_ticks():
+    assert list(_nice_ticks(16.4, 24.1)) == [18, 20, 22, 24]
+    assert list(_nice_ticks(0, 100)) == [0, 20, 40, 60, 80, 100]
@@ -0,0 +1,38 @@
+"""敏感度分析：一階 Sobol 指標範圍、與解析估算一致、公差歸零的效果"""
+from dataclasses import replace
+
+import pytest
+
+from oring import DesignSpec, DimSpec
+from oring.analytic import estimate
+from oring.sensitivity import analyze
+
+
+def test_indices_bounded_and_consistent():
+    spec = DesignSpec()
+    res = analyze(spec)
+    a = estimate(spec)
+    assert [d.name for d in res.dims] == [name for name, _ in spec.active_dims()]
+    for key in ("sobol_comp", "sobol_fill"):
+        values = [getattr(d, key) for d in res.dims]
+        assert all(-1e-12 <= v <= 1 + 1e-12 for v in values)
+        assert sum(values) <= 1 + 1e-9
+    assert res.std_comp == pytest.approx(a.std_comp, rel=1e-3)
+    assert res.ppm_combined == a.ppm_combined
+    for d in res.dims:
+        assert d.ppm_zero_tol <= d.ppm_half_tol + 1e-6
+
+
+def test_zero_tolerance_dim_has_no_contribution():
+    spec = DesignSpec()
+    spec = replace(spec, g_depth=DimSpec(spec.g_depth.nom, 0.0, spec.g_depth.cpk))
+    res = analyze(spec)
+    depth = next(d for d in res.dims if d.name == "g_depth")
+    assert depth.sobol_comp == pytest.approx(0.0, abs=1e-12)
+    assert depth.ppm_zero_tol == pytest.approx(res.ppm_combined)
+
+
+def test_pareto_sorted():
+    res = analyze(DesignSpec())
+    ordered = res.pareto("comp")
+    assert [d.sobol_comp for d in ordered] == sorted((d.sobol_comp for d in res.dims), reverse=True)
@@ -0,0 +1,122 @@
+"""模擬服務：JSON 轉換往返與 HTTP API"""
+import asyncio
+import json
+import threading
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from oring import IRREGULAR, RADIAL, TRAPEZOIDAL, DesignSpec, DimSpec, simulate
+from oring.analytic import estimate
+from oring.batch import ENGINE_ANALYTIC
+from oring.service import (
+    MAX_SIM_COUNT, ServiceError, SimulationService, result_from_json, result_to_json, serve, spec_from_json, spec_to_json, submit, wait,
+)
+
+
+@pytest.mark.parametrize("spec", [
+    DesignSpec(),
+    DesignSpec(comp_mode=RADIAL, oring_type=IRREGULAR, groove_type=TRAPEZOIDAL, stretch_pct=2.5, seed=2**70,
+               sampler="sobol", ci_width_ppm=500.0, max_seconds=3.0, memory_mode="lean32",
+               g_wtop=DimSpec(2.1, 0.04, 1.0), measurements=("0123456789abcdef",)),
+])
+def test_spec_json_round_trip(spec):
+    data = json.loads(json.dumps(spec_to_json(spec)))
+    assert spec_from_json(data) == spec
+
+
+def test_spec_json_rejects_unknown_keys():
+    with pytest.raises(ValueError, match="bogus"):
+        spec_from_json({**spec_to_json(DesignSpec()), "bogus": 1})
+
+
+def test_route_validates_body():
+    service = SimulationService()  # 驗證在放入佇列前完成，不需 start()
+    for body in (b"[]", b"1", b"not json", json.dumps({"spec": {"bogus": 1}}).encode(),
+                 json.dumps({"spec": {"sim_count": MAX_SIM_COUNT + 1}}).encode()):
+        status, payload = service.route("POST", "/jobs", body)
+        assert status == 400 and "error" in payload, body
+
+
+def test_result_json_round_trip():
+    res = simulate(DesignSpec(seed=4, sim_count=20_000, sampler="importance"), keep_samples=False)
+    back = result_from_json(json.loads(json.dumps(result_to_json(res))))
+    for name in ("mean_comp", "std_fill", "yield_combined", "yield_combined_ci", "seed", "sampler", "stage_s"):
+        assert getattr(back, name) == getattr(res, name)
+    for name in ("comp_hist", "fill_hist"):
+        a, b = getattr(res, name), getattr(back, name)
+        assert np.array_equal(a.edges, b.edges) and np.array_equal(a.counts, b.counts)
+        assert a.counts.dtype.kind == b.counts.dtype.kind
+    analytic = estimate(DesignSpec())
+    back = result_from_json(json.loads(json.dumps(result_to_json(analytic))))
+    assert (back.yield_combined, back.mean_comp, back.std_fill) == \
+           (analytic.yield_combined, analytic.mean_comp, analytic.std_fill)
+
+
+@pytest.fixture(scope="module")
+def service_url():
+    """在背景 thread 啟動服務 (隨機埠)，測試結束後取消"""
+    started = threading.Event()
+    state = {}
+
+    def ready(server):
+        state["url"] = "http://127.0.0.1:%d" % server.sockets[0].getsockname()[1]
+        started.set()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        state["loop"] = loop
+        state["task"] = loop.create_task(serve(port=0, workers=2, queue_size=4, ready=ready, max_sim_count=10**6))
+        try:
+            loop.run_until_complete(state["task"])
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(30)
+    yield state["url"]
+    state["loop"].call_soon_threadsafe(state["task"].cancel)
+    thread.join(30)
+
+
+def test_service_matches_simulate(service_url):
+    spec = DesignSpec(seed=8, sim_count=600_000)
+    job = submit(service_url, spec)
+    res = wait(service_url, job, poll=0.05, timeout=60)
+    ref = simulate(spec, keep_samples=False)
+    assert (res.yield_combined, res.mean_comp, res.std_fill, res.seed) == \
+           (ref.yield_combined, ref.mean_comp, ref.std_fill, ref.seed)
+    assert np.array_equal(res.comp_hist.counts, ref.comp_hist.counts)
+    # 相同輸入直接回傳同一個工作
+    again = submit(service_url, spec)
+    assert again["dedup"] and again["id"] == job["id"]
+
+
+def test_time_budget_job_not_deduplicated(service_url):
+    spec = DesignSpec(seed=9, sim_count=10**6, ci_width_ppm=0.001, max_seconds=1e-6)
+    job = submit(service_url, spec)
+    assert wait(service_url, job, poll=0.05, timeout=60).stop_reason == "time_budget"
+    again = submit(service_url, spec)
+    assert not again["dedup"] and again["id"] != job["id"]
+    wait(service_url, again, poll=0.05, timeout=60)
+
+
+def test_service_analytic_and_errors(service_url):
+    res = wait(service_url, submit(service_url, DesignSpec(), engine=ENGINE_ANALYTIC), poll=0.05, timeout=60)
+    ref = estimate(DesignSpec())
+    assert (res.yield_combined, res.ppm_combined) == (ref.yield_combined, ref.ppm_combined)
+    with pytest.raises(ServiceError) as err:
+        submit(service_url, DesignSpec(cs=DimSpec(0.0, 0.0, 0.0)))
+    assert err.value.status == 400
+
+
+def test_service_rejects_oversized_job(service_url):
+    with pytest.raises(ServiceError) as err:
+        submit(service_url, DesignSpec(sim_count=10**6 + 1))
+    assert err.value.status == 400
+    assert wait(service_url, submit(service_url, DesignSpec(sim_count=10**7), engine=ENGINE_ANALYTIC),
+                poll=0.05, timeout=60).yield_combined == estimate(DesignSpec()).yield_combined
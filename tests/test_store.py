@@ -0,0 +1,96 @@
+"""結果儲存：結果 / PDF 往返、seed 為 None 或因時間預算停止時不寫入、LRU 淘汰與查詢"""
+from dataclasses import replace
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from oring import RADIAL, DesignSpec, simulate, simulate_adaptive
+from oring.analytic import estimate
+from oring.batch import ENGINE_ANALYTIC
+from oring import store as store_module
+from oring.store import ResultStore, report_key
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results.sqlite"), max_bytes=2**30)
+
+
+def test_result_round_trip(store):
+    spec = DesignSpec(seed=3, sim_count=20_000)
+    res = simulate(spec, keep_samples=False)
+    assert store.get(spec) is None
+    assert store.put(spec, res)
+    back = store.get(spec)
+    for name in ("yield_combined", "yield_combined_ci", "mean_comp", "std_fill", "seed", "sim_count"):
+        assert getattr(back, name) == getattr(res, name)
+    for name in ("comp_hist", "fill_hist"):
+        assert np.array_equal(getattr(back, name).counts, getattr(res, name).counts)
+    # 引擎與 seed 都是 key 的一部分
+    assert store.get(spec, ENGINE_ANALYTIC) is None
+    assert store.get(replace(spec, seed=4)) is None
+    assert store.put(spec, estimate(spec), ENGINE_ANALYTIC)
+    assert store.get(spec, ENGINE_ANALYTIC).yield_combined == estimate(spec).yield_combined
+
+
+def test_unseeded_not_stored(store):
+    spec = DesignSpec(sim_count=1000)
+    assert not store.put(spec, simulate(spec, keep_samples=False))
+    assert store.stats()["runs"] == 0
+
+
+def test_time_budget_result_not_stored(store):
+    spec = DesignSpec(seed=2, sim_count=10**6, ci_width_ppm=0.001, max_seconds=1e-6)
+    res = simulate_adaptive(spec)
+    assert res.stop_reason == "time_budget"
+    assert not store.put(spec, res)
+    assert store.get(spec) is None
+    done = replace(spec, sim_count=50_000, max_seconds=None)
+    res = simulate_adaptive(done)
+    assert res.stop_reason == "sample_budget" and store.put(done, res)
+
+
+def test_pdf_round_trip(store):
+    key = report_key(title="x", logo=b"\x89PNG", rows=[{"a": 1}])
+    assert key == report_key(title="x", logo=b"\x89PNG", rows=[{"a": 1}])
+    assert key != report_key(title="x", logo=b"\x89PNH", rows=[{"a": 1}])
+    assert store.get_pdf(key) is None
+    store.put_pdf(key, b"%PDF-1.4 test", input_hash="abc")
+    assert store.get_pdf(key) == b"%PDF-1.4 test"
+
+
+def test_history_filters_and_eviction(store):
+    specs = [DesignSpec(seed=s, sim_count=5000, comp_mode=RADIAL if s % 2 else DesignSpec().comp_mode)
+             for s in range(1, 5)]
+    for spec in specs:
+        store.put(spec, simulate(spec, keep_samples=False))
+    assert len(store.history()) == 4
+    assert {row["seed"] for row in store.history(comp_mode=RADIAL)} == {"1", "3"}
+    assert store.history(limit=1)[0]["input_hash"] == specs[-1].digest()
+    with pytest.raises(ValueError):
+        store.history(bogus=1)
+    store.get(specs[0])  # 最近存取 → 最後才淘汰
+    total = store.stats()["bytes"]
+    assert store.evict(total - 1) >= 1
+    assert store.get(specs[0]) is not None
+    assert store.get(specs[1]) is None
+    assert store.stats()["bytes"] <= (total - 1) * 0.9
+
+
+def test_result_version_invalidates(store, monkeypatch):
+    spec = DesignSpec(seed=3, sim_count=5000)
+    store.put(spec, simulate(spec, keep_samples=False))
+    monkeypatch.setattr(store_module, "RESULT_VERSION", store_module.RESULT_VERSION + 1)
+    assert store.get(spec) is None
+
+
+def test_no_wal_journal(tmp_path):
+    # 舊版以 WAL 建立的資料庫開啟後改回 rollback journal (WAL 不適用於網路磁碟)
+    path = str(tmp_path / "results.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+    ResultStore(path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
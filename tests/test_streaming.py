@@ -0,0 +1,46 @@
+"""分塊串流：不保留樣本時統計值與記憶體內計算逐位元相同"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from oring import CHUNK_SIZE, DesignSpec, run_simulation, simulate
+from oring.engine import block_plan
+from test_engine import assert_same
+
+SIZE = 2 * CHUNK_SIZE + 1000  # 3 個批次，最後一批不滿
+
+
+def test_streamed_matches_in_memory():
+    spec = DesignSpec(seed=11, sim_count=SIZE, stretch_pct=2.0)
+    ref = simulate(spec)
+    streamed = simulate(spec, keep_samples=False)
+    assert streamed.compression is None and streamed.fill is None
+    assert_same(replace(ref, compression=None, fill=None, weights=None), streamed)
+    assert len(ref.compression) == SIZE
+
+
+def test_cached_entry_point_keeps_no_samples():
+    spec = DesignSpec(seed=12, sim_count=20_000)
+    res = run_simulation(spec)
+    assert res.compression is None and res.fill is None and res.weights is None
+    assert_same(res, simulate(spec, keep_samples=False))
+
+
+def test_block_plan_chunks():
+    _, _, starts, args = block_plan(DesignSpec(seed=1, sim_count=SIZE))
+    assert list(starts) == [0, CHUNK_SIZE, 2 * CHUNK_SIZE]
+    assert [a[2] for a in args] == [CHUNK_SIZE, CHUNK_SIZE, 1000]
+
+
+def test_histogram_counts_cover_samples():
+    res = simulate(DesignSpec(seed=2, sim_count=50_000))
+    for hist, values in ((res.comp_hist, res.compression), (res.fill_hist, res.fill)):
+        assert hist.counts.sum() + hist.underflow + hist.overflow == res.sim_count
+        assert np.array_equal(hist.counts, np.histogram(values, hist.edges)[0])
+
+
+@pytest.mark.parametrize("sim_count", (0, -5))
+def test_non_positive_count_rejected(sim_count):
+    with pytest.raises(ValueError):
+        block_plan(DesignSpec(sim_count=sim_count))
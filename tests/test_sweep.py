@@ -0,0 +1,39 @@
+"""設計空間掃描：與單點模擬一致、共用樣本 (CRN)、軸驗證"""
+import numpy as np
+import pytest
+
+from oring import DesignSpec, simulate
+from oring.sweep import batch_yields, common_normals, sweep
+
+
+def test_sweep_shape_and_best():
+    spec = DesignSpec(seed=1)
+    depths = np.linspace(1.9, 2.3, 5)
+    widths = np.linspace(2.8, 3.4, 4)
+    res = sweep(spec, [("g_depth", depths), ("g_width", widths)], n_samples=5000)
+    assert res.yield_combined.shape == res.feasible.shape == (5, 4)
+    assert (res.yield_combined <= np.minimum(res.yield_comp, res.yield_fill) + 1e-9).all()
+    point, best = res.best()
+    assert set(point) == {"g_depth", "g_width"} and best == res.yield_combined.max()
+
+
+def test_sweep_point_matches_batch_yields():
+    spec = DesignSpec(seed=4)
+    res = sweep(spec, [("g_depth", [spec.g_depth.nom])], n_samples=8000)
+    z = common_normals(spec, 8000)
+    expected = batch_yields(spec, {"g_depth": np.array([spec.g_depth.nom])}, z)
+    assert res.yield_combined[0] == expected[2][0]
+    mc = simulate(spec, keep_samples=False)
+    p = mc.yield_combined / 100
+    assert abs(res.yield_combined[0] - mc.yield_combined) <= 4 * np.sqrt(p * (1 - p) / 8000) * 100
+
+
+def test_common_random_numbers_prefix():
+    spec = DesignSpec(seed=9)
+    assert np.array_equal(common_normals(spec, 100), common_normals(spec, 1000)[:100])
+
+
+@pytest.mark.parametrize("axes", ([], [("not_a_dim", [1.0])], [("g_depth", [2.0])] * 4))
+def test_invalid_axes_rejected(axes):
+    with pytest.raises(ValueError):
+        sweep(DesignSpec(), axes, n_samples=100)
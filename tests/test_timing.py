@@ -0,0 +1,74 @@
+"""階段計時：紀錄、總耗時、引擎子階段、快取命中判斷與 JSONL"""
+import json
+import threading
+
+import pytest
+
+from oring import DesignSpec, simulate
+from oring.timing import StageRecord, StageTimer, tracked_cache
+
+
+def test_stage_records_and_total():
+    timer = StageTimer()
+    with timer.stage("a", samples=1000) as record:
+        record.cached = False
+    with timer.stage("b"):
+        pass
+    res = simulate(DesignSpec(seed=1, sim_count=5000), keep_samples=False)
+    timer.add_engine_stages(res, cached={"sample": True})
+    names = [r.stage for r in timer.records]
+    assert names[:2] == ["a", "b"] and all(n.startswith("engine.") for n in names[2:])
+    assert timer.total_s == pytest.approx(timer.records[0].wall_s + timer.records[1].wall_s)
+    assert timer.records[0].samples_per_s > 0
+    assert {r.stage: r.cached for r in timer.records[2:]}["engine.sample"] is True
+
+
+def test_cached_stage_has_no_throughput():
+    assert StageRecord("x", 0.5, samples=100, cached=True).samples_per_s is None
+    assert StageRecord("x", 0.5, samples=100).samples_per_s == 200
+
+
+def test_write_jsonl(tmp_path):
+    timer = StageTimer()
+    with timer.stage("a"):
+        pass
+    path = tmp_path / "timing.jsonl"
+    timer.write_jsonl(path, event="rerun")
+    timer.write_jsonl(path, event="rerun")
+    timer.write_jsonl(None, event="ignored")
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 2 and lines[0]["event"] == "rerun" and lines[0]["stages"][0]["stage"] == "a"
+
+
+def test_call_detects_own_cache_hit():
+    @tracked_cache(maxsize=4)
+    def square(x):
+        return x * x
+
+    timer = StageTimer()
+    assert timer.call("a", square, 3) == 9
+    assert timer.call("b", square, 3) == 9
+    assert [r.cached for r in timer.records] == [False, True]
+    assert square.cache_info().hits == 1
+    assert StageTimer().call("plain", len, "abc") == 3  # 非 tracked_cache 函式不判斷
+
+
+def test_other_threads_do_not_affect_hit():
+    started, release = threading.Event(), threading.Event()
+
+    @tracked_cache(maxsize=4)
+    def slow(x):
+        if x == "slow":
+            started.set()
+            release.wait(5)
+        return x
+
+    slow("warm")
+    timer = StageTimer()
+    other = threading.Thread(target=lambda: [slow("warm") for _ in range(3)])
+    worker = threading.Thread(target=lambda: timer.call("miss", slow, "slow"))
+    worker.start()
+    started.wait(5)
+    other.start(); other.join()  # 其他執行緒在本次呼叫期間命中快取
+    release.set(); worker.join()
+    assert timer.records[0].cached is False